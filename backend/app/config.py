@@ -1,3 +1,5 @@
+import os
+import tempfile
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -17,6 +19,87 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Snake Arena API"
     VERSION: str = "1.0.0"
     
+    # Startup Settings
+    # "create" runs Base.metadata.create_all in the lifespan hook; "skip" leaves
+    # schema management to a separate step (`python -m app.database.init_db`).
+    SCHEMA_INIT: str = "create"
+    
+    # Warmup after startup (see app.services.warmup_service): GET /ready
+    # answers 503 until it finishes. Opens up to WARMUP_CONNECTIONS pooled
+    # connections and caches the top WARMUP_TOP_USERS players per leaderboard
+    WARMUP_ENABLED: bool = True
+    WARMUP_CONNECTIONS: int = 5
+    WARMUP_TOP_USERS: int = 100
+    
+    # Request instrumentation: requests slower than SLOW_REQUEST_MS or running
+    # more than SLOW_REQUEST_QUERIES queries are logged as warnings
+    SLOW_REQUEST_MS: float = 500.0
+    SLOW_REQUEST_QUERIES: int = 20
+    
+    # Live Games: sessions without a heartbeat for LIVE_GAME_TTL_SECONDS are
+    # dropped; at most LIVE_GAME_MAX_SESSIONS are tracked per worker
+    LIVE_GAME_TTL_SECONDS: float = 15.0
+    LIVE_GAME_MAX_SESSIONS: int = 10000
+    
+    # Replay verification: worker processes that re-simulate submitted replays
+    # (0 verifies in the background thread instead) and scores per batch
+    VERIFICATION_WORKERS: int = 1
+    VERIFICATION_BATCH_SIZE: int = 256
+    
+    # Shared state for token revocations and the live game listing, so that
+    # all workers agree: "memory://" (single worker), "sqlite:///path.db"
+    # (workers on one machine) or "redis://host:6379/0". Live games are
+    # written through at most every SHARED_STATE_SYNC_SECONDS per game.
+    SHARED_STATE_URL: str = "memory://"
+    SHARED_STATE_SYNC_SECONDS: float = 1.0
+    
+    # Server-Sent Event streams: changes are pushed at most every
+    # STREAM_MIN_INTERVAL_SECONDS, sources are re-read every STREAM_POLL_SECONDS
+    # to catch changes made on other workers, idle streams get a heartbeat
+    # comment and the last STREAM_HISTORY events can be replayed on reconnect
+    STREAM_POLL_SECONDS: float = 2.0
+    STREAM_MIN_INTERVAL_SECONDS: float = 0.25
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+    STREAM_HISTORY: int = 256
+    STREAM_LEADERBOARD_SIZE: int = 10
+    
+    # Users: profiles cached per worker (invalidated on change, expired after
+    # USER_CACHE_TTL_SECONDS) and the most ids accepted by GET /users?ids=
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USERS_BULK_MAX_IDS: int = 100
+    
+    # HTTP caching: Cache-Control sent with profiles (revalidated with their
+    # ETag once stale) and with the avatar list
+    CACHE_CONTROL_USER: str = "public, max-age=5, must-revalidate"
+    CACHE_CONTROL_AVATARS: str = "public, max-age=86400"
+    
+    # Avatars: rendered SVGs kept in memory (AVATAR_CACHE_SIZE entries) and in
+    # AVATAR_CACHE_DIR (empty disables the disk store, which keeps the
+    # AVATAR_CACHE_DIR_MAX_FILES most recently used); an avatar's bytes never
+    # change, so its URL is cached as immutable
+    AVATAR_CACHE_SIZE: int = 1024
+    AVATAR_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "snake-arena-avatars")
+    AVATAR_CACHE_DIR_MAX_FILES: int = 10_000
+    CACHE_CONTROL_AVATAR_IMAGE: str = "public, max-age=31536000, immutable"
+    
+    # Request profiling (see app.profiling): the stack of a request is sampled
+    # every PROFILE_INTERVAL_MS and written to PROFILE_DIR when it carries an
+    # X-Profile-Token header equal to PROFILE_TOKEN, or for a PROFILE_SAMPLE_RATE
+    # share of requests whose path starts with one of PROFILE_PATHS (any path
+    # if empty). With PROFILE_TOKEN set, /api/admin/profiling changes the rate
+    # and paths at runtime. At most PROFILE_MAX_CONCURRENT requests are
+    # profiled at once, each for at most PROFILE_MAX_SECONDS, and only the
+    # newest PROFILE_MAX_FILES profiles are kept.
+    PROFILE_TOKEN: str = ""
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_PATHS: list[str] = []
+    PROFILE_INTERVAL_MS: float = 1.0
+    PROFILE_DIR: str = os.path.join(tempfile.gettempdir(), "snake-arena-profiles")
+    PROFILE_MAX_CONCURRENT: int = 4
+    PROFILE_MAX_SECONDS: float = 30.0
+    PROFILE_MAX_FILES: int = 200
+    
     # CORS Settings
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:5173", "http://localhost:8080"]
 
@@ -0,0 +1,113 @@
+"""Create database tables ahead of time.
+
+Run as a deploy/release step when the app is started with SCHEMA_INIT=skip:
+
+    uv run python -m app.database.init_db
+"""
+import logging
+from typing import Optional
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.sqltypes import SchemaType
+from app.database import models
+from app.database.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+# Columns without a server default, filled from another column when added
+BACKFILL_FROM = {
+    ("users", "updated_at"): "created_at",
+}
+
+
+def _add_missing_columns(engine: Engine):
+    """Add columns introduced after a table was first created.
+
+    Existing rows get the column's server default, or a copy of the column
+    named in BACKFILL_FROM.
+    """
+    inspector = inspect(engine)
+    ddl = engine.dialect.ddl_compiler(engine.dialect, None)
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if isinstance(column.type, SchemaType) and engine.dialect.name == "postgresql":
+                    # Native enum types are only created along with their table
+                    column.type.create(conn, checkfirst=True)
+                column_type = column.type.compile(dialect=engine.dialect)
+                default = ddl.get_column_default_string(column)
+                clause = f" DEFAULT {default}" if default is not None else ""
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{clause}"))
+                source = BACKFILL_FROM.get((table.name, column.name))
+                if source is not None:
+                    conn.execute(text(f"UPDATE {table.name} SET {column.name} = {source} WHERE {column.name} IS NULL"))
+
+
+def _backfill_user_keys(engine: Engine):
+    """Fill the normalized username/email columns of users created before them."""
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT id, username, email FROM users WHERE username_key IS NULL OR email_key IS NULL"
+        )).all()
+        for user_id, username, email in rows:
+            conn.execute(
+                text("UPDATE users SET username_key = :username_key, email_key = :email_key WHERE id = :id"),
+                {
+                    "id": user_id,
+                    "username_key": models.normalize_key(username) if username is not None else None,
+                    "email_key": models.normalize_key(email) if email is not None else None,
+                },
+            )
+
+
+def _collate_user_keys(engine: Engine):
+    """Give PostgreSQL key columns created before KeyString the "C" collation.
+
+    Changing a column's collation rebuilds the indexes on it too.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for column in ("username_key", "email_key"):
+            collation = conn.execute(
+                text(
+                    "SELECT collation_name FROM information_schema.columns "
+                    "WHERE table_schema = current_schema() AND table_name = 'users' AND column_name = :column"
+                ),
+                {"column": column},
+            ).scalar()
+            if collation != "C":
+                conn.execute(text(f'ALTER TABLE users ALTER COLUMN {column} TYPE VARCHAR COLLATE "C"'))
+
+
+def init_db(bind: Optional[Engine] = None):
+    """Create all tables, columns and indexes that do not exist yet.
+
+    Works on the app's database unless another engine is given.
+    """
+    bind = bind if bind is not None else engine
+    models.Base.metadata.create_all(bind=bind)
+    # create_all skips tables that already exist, so columns and indexes
+    # added to existing tables later are created here
+    _add_missing_columns(bind)
+    _backfill_user_keys(bind)
+    _collate_user_keys(bind)
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=bind, checkfirst=True)
+            except IntegrityError:
+                # e.g. two existing users whose names differ only in case
+                logger.error("Could not create unique index %s: duplicate values in %s", index.name, table.name)
+
+
+if __name__ == "__main__":
+    init_db()
+    print(f"Schema ready on {engine.url.render_as_string(hide_password=True)}")
@@ -35,7 +35,7 @@ class MockDatabase:
             {
                 "username": "SnakeMaster",
                 "email": "snake@test.com",
-                "avatar": "https://api.dicebear.com/7.x/lorelei/svg?seed=Chihiro&backgroundColor=b6e3f4",
+                "avatar": "/api/avatars/Chihiro-b6e3f4.svg",
                 "password": "password123",
                 "high_score": 2450,
                 "games_played": 156,
@@ -43,7 +43,7 @@ class MockDatabase:
             {
                 "username": "ProGamer",
                 "email": "pro@test.com",
-                "avatar": "https://api.dicebear.com/7.x/lorelei/svg?seed=Totoro&backgroundColor=c0aede",
+                "avatar": "/api/avatars/Totoro-c0aede.svg",
                 "password": "password123",
                 "high_score": 2100,
                 "games_played": 89,
@@ -51,7 +51,7 @@ class MockDatabase:
             {
                 "username": "Speedster",
                 "email": "speed@test.com",
-                "avatar": "https://api.dicebear.com/7.x/lorelei/svg?seed=Ponyo&backgroundColor=ffdfbf",
+                "avatar": "/api/avatars/Ponyo-ffdfbf.svg",
                 "password": "password123",
                 "high_score": 1850,
                 "games_played": 124,
@@ -59,7 +59,7 @@ class MockDatabase:
             {
                 "username": "KikiWitch",
                 "email": "kiki@test.com",
-                "avatar": "https://api.dicebear.com/7.x/lorelei/svg?seed=Kiki&backgroundColor=d1d4f9",
+                "avatar": "/api/avatars/Kiki-d1d4f9.svg",
                 "password": "password123",
                 "high_score": 1600,
                 "games_played": 45,
@@ -67,7 +67,7 @@ class MockDatabase:
             {
                 "username": "HowlWizard",
                 "email": "howl@test.com",
-                "avatar": "https://api.dicebear.com/7.x/lorelei/svg?seed=Howl&backgroundColor=ffd5dc",
+                "avatar": "/api/avatars/Howl-ffd5dc.svg",
                 "password": "password123",
                 "high_score": 2800,
                 "games_played": 210,
@@ -128,6 +128,7 @@ class MockDatabase:
                 "score": 340,
                 "mode": GameMode.WALLS,
                 "viewers": 12,
+                "unique_viewers": 40,
                 "started_at": datetime.now(UTC) - timedelta(minutes=5),
             }
         }
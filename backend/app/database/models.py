@@ -1,9 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SqEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, LargeBinary, Enum as SqEnum, desc
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime, UTC
 from app.database.database import Base
-from app.models.game import GameMode
+from app.models.game import GameMode, VerificationStatus
 import enum
+import unicodedata
+
+# Prefix search ranges over the key columns, which only works if they sort
+# by code point. SQLite's default BINARY collation already does; PostgreSQL
+# columns and their indexes need the "C" collation (no SQLite equivalent)
+KeyString = String().with_variant(String(collation="C"), "postgresql")
+
+def normalize_key(value: str) -> str:
+    """Lookup form of a username or email: NFKC-normalized and casefolded."""
+    return unicodedata.normalize("NFKC", value).casefold()
 
 class User(Base):
     __tablename__ = "users"
@@ -11,14 +21,27 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
+    # Normalized copies kept in sync by `_set_keys`; uniqueness and lookups
+    # use these so "SnakeMaster" and "snakemaster" are the same name
+    username_key = Column(KeyString, unique=True, index=True)
+    email_key = Column(KeyString, unique=True, index=True)
     hashed_password = Column(String)
     avatar = Column(String)
     high_score = Column(Integer, default=0)
     games_played = Column(Integer, default=0)
     created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    # Bumped whenever the public profile changes; drives ETag/Last-Modified
+    version = Column(Integer, default=0, server_default="0")
+    updated_at = Column(DateTime, default=lambda: datetime.now(UTC))
 
     scores = relationship("Score", back_populates="user")
 
+    @validates("username", "email")
+    def _set_keys(self, field, value):
+        if value is not None:
+            setattr(self, f"{field}_key", normalize_key(value))
+        return value
+
 class Score(Base):
     __tablename__ = "scores"
 
@@ -28,5 +51,23 @@ class Score(Base):
     mode = Column(SqEnum(GameMode))
     duration = Column(Integer, default=0)
     date = Column(DateTime, default=lambda: datetime.now(UTC))
+    # Packed replay (see app.services.replay) and its verification result
+    replay = Column(LargeBinary, nullable=True)
+    verification = Column(
+        SqEnum(VerificationStatus),
+        default=VerificationStatus.UNVERIFIED,
+        server_default=VerificationStatus.UNVERIFIED.name,
+        index=True,
+    )
 
     user = relationship("User", back_populates="scores")
+
+    __table_args__ = (
+        # Covers a player's score history: filtered by user and mode, walked
+        # newest first by (date, id), with every listed column in the index so
+        # pages never touch the table
+        Index(
+            "ix_scores_user_mode_date",
+            "user_id", "mode", desc("date"), desc("id"), "score", "duration", "verification",
+        ),
+    )
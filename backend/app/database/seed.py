@@ -0,0 +1,198 @@
+"""Fill a database with a large synthetic player base.
+
+The mock data has a handful of users, which hides every scaling problem.
+This generates any number of players with realistic shapes:
+
+- games per player are heavy tailed (Pareto): most play a few games, a few
+  play thousands, and some sign up and never play
+- each player leans towards one mode and has a skill factor; scores are
+  log-normal per mode, pass-through running longer than walls
+- sign-ups grow over the last `--days` days, and games fall between a
+  player's sign-up and the end date
+
+Rows go in with bulk inserts, and every player shares one password hashed
+once up front. The same arguments and seed always give the same data.
+
+    uv run python -m app.database.seed --users 1000000 --seed 42
+    DATABASE_URL=postgresql://... uv run python -m app.database.seed --users 100000
+"""
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Optional
+from sqlalchemy import create_engine, delete, func, insert, select, text
+from sqlalchemy.engine import Engine
+from app.database import models
+from app.database.database import DATABASE_URL
+from app.database.init_db import init_db
+from app.models.game import GameMode, VerificationStatus
+from app.routers.avatars import AVATAR_URLS
+
+NAMES = ["Snake", "Kitsune", "Ryu", "Neko", "Sakura", "Hoshi", "Kaze", "Tora", "Yuki", "Sora", "Kumo", "Hebi"]
+
+# Log-normal parameters of food eaten per game, by mode
+SCORE_DISTRIBUTIONS = {
+    GameMode.WALLS: (3.0, 0.8),
+    GameMode.PASS_THROUGH: (3.4, 0.9),
+}
+POINTS_PER_FOOD = 10
+
+BCRYPT_ALPHABET = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def hash_password(password: str, rng: random.Random) -> str:
+    """bcrypt hash of `password` with a salt drawn from `rng`."""
+    import bcrypt
+    # 22 salt characters, the last of which only carries two bits
+    salt = "".join(rng.choices(BCRYPT_ALPHABET, k=21)) + rng.choice(".Oeu")
+    return bcrypt.hashpw(password.encode("utf-8"), f"$2b$12${salt}".encode()).decode("utf-8")
+
+
+def _games_played(rng: random.Random, alpha: float, max_games: int) -> int:
+    # Pareto from 1, stretched and shifted so about a third never play
+    return min(int(rng.paretovariate(alpha) * 1.5) - 1, max_games)
+
+
+def _score(rng: random.Random, mode: GameMode, skill: float) -> int:
+    mu, sigma = SCORE_DISTRIBUTIONS[mode]
+    return int(rng.lognormvariate(mu, sigma) * skill) * POINTS_PER_FOOD
+
+
+def populate(
+    engine: Engine,
+    users: int,
+    seed: int = 0,
+    password: str = "password123",
+    games_alpha: float = 1.3,
+    max_games: int = 10_000,
+    days: int = 365,
+    until: datetime = datetime(2026, 1, 1, tzinfo=UTC),
+    batch_size: int = 10_000,
+    reset: bool = False,
+) -> dict:
+    """Insert `users` synthetic players and their scores; return the counts."""
+    rng = random.Random(seed)
+    # Same schema setup as the app, which also migrates older databases
+    init_db(engine)
+    if reset:
+        with engine.begin() as conn:
+            conn.execute(delete(models.Score))
+            conn.execute(delete(models.User))
+    with engine.connect() as conn:
+        first_id = (conn.execute(select(func.max(models.User.id))).scalar() or 0) + 1
+
+    hashed_password = hash_password(password, rng)
+    start = until - timedelta(days=days)
+    span = (until - start).total_seconds()
+    user_rows: list[dict] = []
+    score_rows: list[dict] = []
+    total_scores = 0
+    first_email = None
+
+    def flush():
+        # Players go in before their scores for databases enforcing the key
+        with engine.begin() as conn:
+            if user_rows:
+                conn.execute(insert(models.User), user_rows)
+            if score_rows:
+                conn.execute(insert(models.Score), score_rows)
+        user_rows.clear()
+        score_rows.clear()
+
+    for user_id in range(first_id, first_id + users):
+        username = f"{rng.choice(NAMES)}{user_id}"
+        email = f"{username.lower()}@example.com"
+        first_email = first_email or email
+        # More players joined recently than a year ago
+        created_at = start + timedelta(seconds=span * math.sqrt(rng.random()))
+        walls_share = rng.betavariate(2, 2)
+        skill = rng.lognormvariate(0, 0.4)
+        games = _games_played(rng, games_alpha, max_games)
+
+        high_score = 0
+        last_played = created_at
+        since_signup = (until - created_at).total_seconds()
+        for _ in range(games):
+            mode = GameMode.WALLS if rng.random() < walls_share else GameMode.PASS_THROUGH
+            score = _score(rng, mode, skill)
+            date = created_at + timedelta(seconds=since_signup * rng.random())
+            score_rows.append({
+                "user_id": user_id,
+                "score": score,
+                "mode": mode,
+                # Roughly one food a second, plus time spent before the first
+                "duration": int(score / POINTS_PER_FOOD * rng.uniform(0.6, 1.4)) + rng.randint(3, 15),
+                "date": date,
+                "verification": VerificationStatus.UNVERIFIED,
+            })
+            high_score = max(high_score, score)
+            last_played = max(last_played, date)
+        total_scores += games
+
+        user_rows.append({
+            "id": user_id,
+            "username": username,
+            "username_key": models.normalize_key(username),
+            "email": email,
+            "email_key": models.normalize_key(email),
+            "hashed_password": hashed_password,
+            "avatar": rng.choice(AVATAR_URLS),
+            "high_score": high_score,
+            "games_played": games,
+            "created_at": created_at,
+            "version": games,
+            "updated_at": last_played,
+        })
+        if len(user_rows) >= batch_size or len(score_rows) >= batch_size:
+            flush()
+    flush()
+
+    if engine.dialect.name == "postgresql":
+        # Ids were given explicitly, so move the sequence past them
+        with engine.begin() as conn:
+            conn.execute(text("SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT max(id) FROM users))"))
+    return {"users": users, "scores": total_scores, "first_email": first_email}
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", default=DATABASE_URL, help="defaults to DATABASE_URL")
+    parser.add_argument("--password", default="password123", help="password of every generated player")
+    parser.add_argument("--games-alpha", type=float, default=1.3, help="Pareto shape of games per player; lower is heavier tailed")
+    parser.add_argument("--max-games", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--until", type=datetime.fromisoformat, default=datetime(2026, 1, 1, tzinfo=UTC))
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--reset", action="store_true", help="delete all users and scores first")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    started = time.perf_counter()
+    counts = populate(
+        engine,
+        args.users,
+        seed=args.seed,
+        password=args.password,
+        games_alpha=args.games_alpha,
+        max_games=args.max_games,
+        days=args.days,
+        until=args.until,
+        batch_size=args.batch_size,
+        reset=args.reset,
+    )
+    elapsed = time.perf_counter() - started
+    rows = counts["users"] + counts["scores"]
+    print(
+        f"Inserted {counts['users']:,} users and {counts['scores']:,} scores into "
+        f"{engine.url.render_as_string(hide_password=True)} in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s)"
+    )
+    if counts["first_email"]:
+        print(f"Every player's password is {args.password!r}, e.g. {counts['first_email']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 """FastAPI dependencies for authentication and authorization."""
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.services.auth_service import decode_access_token
 from app.services import db_service
+from app.services.loaders import UserLoader
 from app.database.database import get_db
 from app.database import models
 
@@ -13,30 +14,31 @@ from app.database import models
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> models.User:
-    """Get the current authenticated user from JWT token."""
-    token = credentials.credentials
-    
+def _get_user_from_token(token: str, db: Session) -> Optional[models.User]:
+    """Resolve a JWT token to a user, or None if it is not valid."""
     # Check if token is blacklisted
     if db_service.is_token_blacklisted(token):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authentication required",
-        )
+        return None
     
     # Decode token
     user_id = decode_access_token(token)
     if user_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authentication required",
-        )
+        return None
     
     # Get user from database
-    user = db_service.get_user_by_id(db, int(user_id))
+    return db_service.get_user_by_id(db, int(user_id))
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> models.User:
+    """Get the current authenticated user from JWT token.
+
+    Plain `def` like the other dependencies: the revocation check and user
+    lookup block, so FastAPI runs them in the threadpool.
+    """
+    user = _get_user_from_token(credentials.credentials, db)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,7 +48,7 @@ async def get_current_user(
     return user
 
 
-async def get_current_user_optional(
+def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
     db: Session = Depends(get_db)
 ) -> Optional[models.User]:
@@ -55,6 +57,28 @@ async def get_current_user_optional(
         return None
     
     try:
-        return await get_current_user(credentials, db)
+        return get_current_user(credentials, db)
     except HTTPException:
         return None
+
+
+def get_websocket_user(
+    token: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+) -> Optional[models.User]:
+    """Get the user for a WebSocket connection.
+
+    Browsers cannot set headers on WebSocket requests, so the JWT is passed as
+    a `token` query parameter instead.
+    """
+    if token is None:
+        return None
+    user = _get_user_from_token(token, db)
+    # Release the connection now: the socket may stay open for minutes
+    db.close()
+    return user
+
+
+def get_user_loader(db: Session = Depends(get_db)) -> UserLoader:
+    """Get a user batch loader scoped to the current request."""
+    return UserLoader(db)
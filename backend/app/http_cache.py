@@ -0,0 +1,70 @@
+"""HTTP conditional caching helpers.
+
+Routes compute a validator (an ETag and optionally a Last-Modified time) as
+cheaply as they can, ideally without touching the database, and call
+`not_modified` to answer a matching conditional request with an empty 304.
+Otherwise `set_headers` attaches the validators and the route's
+Cache-Control policy to the full response.
+"""
+from datetime import datetime, UTC
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag from the parts identifying one version of a resource."""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def _opaque(tag: str) -> str:
+    # Weak comparison ignores the W/ prefix
+    return tag.strip().removeprefix("W/")
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        # SQLite hands back naive datetimes; they are stored in UTC
+        value = value.replace(tzinfo=UTC)
+    return format_datetime(value.astimezone(UTC), usegmt=True)
+
+
+def is_fresh(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Whether the client's cached copy is current (RFC 9110 section 13.2.2)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        tags = [tag for tag in if_none_match.split(",") if tag.strip()]
+        return any(tag.strip() == "*" or _opaque(tag) == _opaque(etag) for tag in tags)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have whole-second precision
+    return parsedate_to_datetime(_http_date(last_modified)) <= since
+
+
+def set_headers(response: Response, etag: str, last_modified: Optional[datetime] = None, cache_control: Optional[str] = None):
+    """Attach validators and a Cache-Control policy to a response."""
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+    if cache_control:
+        response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: Optional[str] = None,
+) -> Optional[Response]:
+    """An empty 304 response if the client's copy is current, otherwise None."""
+    if not is_fresh(request, etag, last_modified):
+        return None
+    response = Response(status_code=304)
+    set_headers(response, etag, last_modified, cache_control)
+    return response
@@ -0,0 +1,109 @@
+"""Per-request SQL instrumentation.
+
+SQLAlchemy cursor events count queries and time spent in the database for the
+request currently being handled. `QueryStatsMiddleware` reports the totals in a
+`Server-Timing` header, logs requests that exceed the configured thresholds
+and records request metrics (see app.metrics).
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Query count and total DB time for one request."""
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def get_current_stats() -> Optional[QueryStats]:
+    """Get the stats of the request being handled, if any."""
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    metrics.DB_QUERIES.inc()
+    metrics.DB_SECONDS.inc(elapsed)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware that attaches query stats to every HTTP response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        streaming = False
+        status = 500
+        metrics.IN_FLIGHT.inc()
+
+        async def send_with_timing(message):
+            nonlocal streaming, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Event streams stay open by design; never report them as slow
+                streaming = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", ())
+                )
+                total_ms = (time.perf_counter() - started) * 1000
+                header = (
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+                    f"total;dur={total_ms:.2f}"
+                )
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            total_ms = elapsed * 1000
+            metrics.IN_FLIGHT.dec()
+            route = metrics.route_label(scope)
+            metrics.REQUESTS.labels(scope["method"], route, status).inc()
+            if not streaming:
+                metrics.REQUEST_SECONDS.labels(scope["method"], route).observe(elapsed)
+                metrics.REQUEST_DB_SECONDS.labels(scope["method"], route).observe(stats.duration)
+            if not streaming and (total_ms > settings.SLOW_REQUEST_MS or stats.count > settings.SLOW_REQUEST_QUERIES):
+                logger.warning(
+                    "Slow request %s %s: %.1f ms, %d queries (%.1f ms in DB)",
+                    scope["method"],
+                    scope["path"],
+                    total_ms,
+                    stats.count,
+                    stats.duration * 1000,
+                )
@@ -1,38 +1,80 @@
 """Main FastAPI application."""
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from app.config import settings
-from app.routers import auth, users, leaderboard, live_games, games, avatars
+import asyncio
+from contextlib import asynccontextmanager
+from app import startup
+
+with startup.phase("import_framework"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+
+with startup.phase("settings"):
+    from app.config import settings
+
+with startup.phase("import_routers"):
+    from app.routers import auth, users, leaderboard, live_games, games, avatars, admin
+    from app.instrumentation import QueryStatsMiddleware
+    from app.profiling import ProfilingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup work outside of module import."""
+    if settings.SCHEMA_INIT == "create":
+        with startup.phase("schema"):
+            from app.database.init_db import init_db
+            init_db()
+    startup.mark_ready()
+    # Warm up in the background: /health answers right away, /ready once done
+    from app.services import warmup_service
+    warmup = None
+    if settings.WARMUP_ENABLED:
+        warmup = asyncio.get_running_loop().run_in_executor(None, warmup_service.run)
+    else:
+        warmup_service.skip()
+    # Requests only read this worker's copy of the profiling override
+    from app import profiling
+    profiling.start_refresher()
+    yield
+    profiling.stop_refresher()
+    if warmup is not None:
+        await warmup
+    from app.services import verification_service
+    verification_service.shutdown()
 
 
 # Create FastAPI app
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    version=settings.VERSION,
-    description="Backend API for the Snake Arena game application",
-)
-
-# Create database tables
-from app.database import models
-from app.database.database import engine
-models.Base.metadata.create_all(bind=engine)
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers with API prefix
-app.include_router(auth.router, prefix=settings.API_PREFIX)
-app.include_router(users.router, prefix=settings.API_PREFIX)
-app.include_router(leaderboard.router, prefix=settings.API_PREFIX)
-app.include_router(live_games.router, prefix=settings.API_PREFIX)
-app.include_router(games.router, prefix=settings.API_PREFIX)
-app.include_router(avatars.router, prefix=settings.API_PREFIX)
+with startup.phase("create_app"):
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        version=settings.VERSION,
+        description="Backend API for the Snake Arena game application",
+        lifespan=lifespan,
+    )
+
+    # Sample the stacks of requests picked for profiling
+    app.add_middleware(ProfilingMiddleware)
+
+    # Count queries and DB time per request (Server-Timing header)
+    app.add_middleware(QueryStatsMiddleware)
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
+    )
+
+    # Include routers with API prefix
+    app.include_router(auth.router, prefix=settings.API_PREFIX)
+    app.include_router(users.router, prefix=settings.API_PREFIX)
+    app.include_router(leaderboard.router, prefix=settings.API_PREFIX)
+    app.include_router(live_games.router, prefix=settings.API_PREFIX)
+    app.include_router(games.router, prefix=settings.API_PREFIX)
+    app.include_router(avatars.router, prefix=settings.API_PREFIX)
+    app.include_router(admin.router, prefix=settings.API_PREFIX)
 
 
 @app.get("/")
@@ -49,3 +91,28 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: 503 until the worker has warmed up."""
+    from fastapi.responses import JSONResponse
+    from app.services import warmup_service
+    report = warmup_service.get_report()
+    if report is None:
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+    return {"status": "ready", **report}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Metrics in the Prometheus text format."""
+    from fastapi.responses import PlainTextResponse
+    from app import metrics
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/health/startup")
+async def startup_timings():
+    """Per-phase startup timing breakdown in milliseconds."""
+    return startup.get_timings()
@@ -0,0 +1,255 @@
+"""In-process metrics exposed in the Prometheus text format at `/metrics`.
+
+Counters, gauges and histograms are plain Python objects updated without
+locks: each update is a few attribute increments, which the GIL keeps
+consistent enough for monitoring, so recording a request costs a couple of
+microseconds. Values that are cheap to read on demand (cache statistics,
+live game counts) are collected by callbacks at scrape time instead.
+
+Metrics are per worker process; scrape each worker separately.
+"""
+import bisect
+import math
+from typing import Callable, Iterable
+
+# Latency buckets in seconds, from 1 ms to 10 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics: list["_Metric"] = []
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        _metrics.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """The child for one combination of label values."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self._children[()].inc(amount)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down."""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1):
+        self._children[()].dec(amount)
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, list(child.counts)):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {child.count}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class Collected(_Metric):
+    """Counter or gauge whose samples are read by a callback at scrape time.
+
+    The callback returns a dict of label value tuples to values.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str], collect: Callable[[], dict], kind: str = "gauge"):
+        self.collect = collect
+        self.kind = kind
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return None
+
+    def _samples(self):
+        for values, value in self.collect().items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    return "\n".join(metric.render() for metric in _metrics) + "\n"
+
+
+def reset():
+    """Zero every counter, gauge and histogram (useful for testing)."""
+    for metric in _metrics:
+        for values in list(metric._children):
+            if values or metric.labelnames:
+                del metric._children[values]
+            else:
+                metric._children[()] = metric._new_child()
+
+
+# HTTP requests, recorded by app.instrumentation.QueryStatsMiddleware
+REQUESTS = Counter("http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in database queries per HTTP request.", ("method", "route"),
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled.")
+
+# All database queries, in and out of requests
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed.")
+DB_SECONDS = Counter("db_query_seconds_total", "Time spent executing SQL statements.")
+
+# Password hashing, by operation (hash or verify)
+BCRYPT_SECONDS = Histogram(
+    "bcrypt_duration_seconds", "Time spent in bcrypt.", ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5),
+)
+
+
+def route_label(scope: dict) -> str:
+    """Route template of a handled request, bounding label cardinality.
+
+    The path of the route the request matched, e.g. `/api/users/{user_id}`,
+    with the prefix of the router it was included through.
+    """
+    route = scope.get("route")
+    if route is None or scope.get("endpoint") is None:
+        return "unmatched"
+    included = (scope.get("fastapi") or {}).get("included_router")
+    prefix = getattr(getattr(included, "include_context", None), "prefix", "")
+    return prefix + route.path
+
+
+def _cache_stats() -> dict:
+    from app.services import avatar_service, user_cache
+    return {
+        "user": (user_cache.cache.hits, user_cache.cache.misses),
+        "avatar": (avatar_service.cache.hits, avatar_service.cache.misses),
+    }
+
+
+def _cache_hits() -> dict:
+    return {(name,): hits for name, (hits, _) in _cache_stats().items()}
+
+
+def _cache_misses() -> dict:
+    return {(name,): misses for name, (_, misses) in _cache_stats().items()}
+
+
+def _cache_hit_ratio() -> dict:
+    return {
+        (name,): hits / (hits + misses) if hits + misses else 0.0
+        for name, (hits, misses) in _cache_stats().items()
+    }
+
+
+def _live_games() -> dict:
+    from app.models.game import GameMode
+    from app.services.live_registry import registry
+    return {(mode.value,): len(registry.list(mode)) for mode in GameMode}
+
+
+Collected("cache_hits_total", "Cache lookups that were hits.", ("cache",), _cache_hits, kind="counter")
+Collected("cache_misses_total", "Cache lookups that were misses.", ("cache",), _cache_misses, kind="counter")
+Collected("cache_hit_ratio", "Share of cache lookups that were hits.", ("cache",), _cache_hit_ratio)
+Collected("live_games", "Live games hosted by this worker.", ("mode",), _live_games)
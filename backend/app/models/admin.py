@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+
+class ProfilingUpdate(BaseModel):
+    """Runtime request profiling settings."""
+    sample_rate: float = Field(..., ge=0, le=1, description="Share of matching requests to profile")
+    paths: list[str] = Field(default_factory=list, description="Path prefixes to profile; empty for all")
+    ttl_seconds: float = Field(3600, gt=0, le=86400, description="Seconds until the settings revert")
+
+
+class ProfilingStatus(BaseModel):
+    """Request profiling settings in effect and the profiles written here."""
+    sample_rate: float
+    paths: list[str]
+    source: str = Field(..., description="'settings', or 'runtime' when changed through this API")
+    expires_at: float | None = None
+    profiles: list[str] = Field(default_factory=list, description="Newest first, on this worker's machine")
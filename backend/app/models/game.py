@@ -1,20 +1,63 @@
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, Literal
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from app.models.user import User
 
 
+# Size of the (square) game board, matching frontend/src/game/snakeLogic.ts
+GRID_SIZE = 20
+
+
 class GameMode(str, Enum):
     """Game mode enum."""
     PASS_THROUGH = "pass-through"
     WALLS = "walls"
 
 
+class LiveGameSort(str, Enum):
+    """Orderings of the live game list (highest first)."""
+    SCORE = "score"
+    VIEWERS = "viewers"
+
+
+class VerificationStatus(str, Enum):
+    """Replay verification state of a submitted score."""
+    UNVERIFIED = "unverified"
+    PENDING = "pending"
+    VERIFIED = "verified"
+    REJECTED = "rejected"
+
+
+class Replay(BaseModel):
+    """Inputs needed to re-simulate a game on the server.
+
+    Food is placed by mulberry32 seeded with `seed`; each input is a
+    `[tick, direction]` pair (0 up, 1 right, 2 down, 3 left) applied before
+    that tick's move.
+    """
+    seed: int = Field(..., ge=0, le=0xFFFFFFFF)
+    ticks: int = Field(..., ge=0, le=100_000)
+    inputs: list[tuple[Annotated[int, Field(ge=0)], Annotated[int, Field(ge=0, le=3)]]] = Field(
+        default_factory=list, max_length=100_000
+    )
+
+    @model_validator(mode="after")
+    def check_input_order(self) -> "Replay":
+        previous = 0
+        for tick, _ in self.inputs:
+            if tick < previous or tick >= self.ticks:
+                raise ValueError("inputs must be in tick order and within the replay")
+            previous = tick
+        return self
+
+
 class GameResult(BaseModel):
     """Game result submission model."""
     score: int = Field(..., ge=0)
     mode: GameMode
     duration: int = Field(..., ge=0, description="Game duration in seconds")
+    replay: Replay | None = None
 
 
 class ScoreSubmissionResponse(BaseModel):
@@ -37,6 +80,18 @@ class LeaderboardEntry(BaseModel):
     date: datetime
 
 
+class ScoreHistoryEntry(BaseModel):
+    """One past game in a player's score history."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    score: int = Field(..., ge=0)
+    mode: GameMode
+    duration: int = Field(..., ge=0)
+    date: datetime
+    verification: VerificationStatus
+
+
 class LiveGame(BaseModel):
     """Live game model."""
     model_config = ConfigDict(populate_by_name=True)
@@ -46,4 +101,18 @@ class LiveGame(BaseModel):
     score: int = Field(..., ge=0)
     mode: GameMode
     viewers: int = Field(..., ge=0)
+    unique_viewers: int = Field(0, ge=0, alias="uniqueViewers")
     started_at: datetime = Field(alias="startedAt")
+
+
+GridCoordinate = Annotated[int, Field(ge=0, lt=GRID_SIZE)]
+GridPoint = tuple[GridCoordinate, GridCoordinate]
+
+
+class LiveGameUpdate(BaseModel):
+    """State update streamed by a player over the live game WebSocket."""
+    type: Literal["state", "heartbeat"]
+    # Live frames carry the score as a u32
+    score: int | None = Field(None, ge=0, le=0xFFFFFFFF)
+    snake: list[GridPoint] | None = Field(None, max_length=GRID_SIZE * GRID_SIZE)
+    food: list[GridPoint] | None = Field(None, max_length=16)
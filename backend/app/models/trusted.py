@@ -0,0 +1,72 @@
+"""Response models built from trusted rows without validation.
+
+Rows loaded from our own database were validated when they were written, so
+re-validating them for every response (including an email check per user
+per leaderboard row) is wasted work. These builders use `model_construct`,
+which only assigns attributes; they must produce exactly what validation
+would, which tests/test_trusted_models.py checks.
+
+Only use them for data this application stored itself.
+"""
+from datetime import datetime
+from typing import Any
+from app.database import models
+from app.models.game import GameMode, LeaderboardEntry, LiveGame, ScoreHistoryEntry, VerificationStatus
+from app.models.user import User
+
+
+def user_from_row(user: models.User) -> User:
+    """Public user model of a `models.User` row."""
+    return User.model_construct(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        avatar=user.avatar,
+        high_score=user.high_score or 0,
+        games_played=user.games_played or 0,
+        created_at=user.created_at,
+        version=user.version,
+        updated_at=user.updated_at,
+    )
+
+
+def leaderboard_entry(rank: int, score: models.Score) -> LeaderboardEntry:
+    """Leaderboard entry of a `models.Score` row with its user loaded."""
+    return LeaderboardEntry.model_construct(
+        rank=rank,
+        user=user_from_row(score.user),
+        score=score.score,
+        mode=score.mode,
+        date=score.date,
+    )
+
+
+def score_history_entry(row: Any) -> ScoreHistoryEntry:
+    """Score history entry of a `db_service.get_score_history` row."""
+    return ScoreHistoryEntry.model_construct(
+        id=row.id,
+        score=row.score,
+        mode=row.mode,
+        duration=row.duration,
+        date=row.date,
+        # Scores stored before verification existed may have no status
+        verification=row.verification or VerificationStatus.UNVERIFIED,
+    )
+
+
+def _datetime(value: Any) -> datetime:
+    # Live games read back from shared state carry ISO strings
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def live_game(game: dict, user: models.User) -> LiveGame:
+    """Live game model of a registry / shared state dict and its player row."""
+    return LiveGame.model_construct(
+        id=game["id"],
+        player=user_from_row(user),
+        score=game["score"],
+        mode=GameMode(game["mode"]),
+        viewers=game["viewers"],
+        unique_viewers=game.get("unique_viewers", 0),
+        started_at=_datetime(game["started_at"]),
+    )
@@ -28,8 +28,17 @@ class User(UserBase):
     high_score: int = Field(default=0, alias="highScore")
     games_played: int = Field(default=0, alias="gamesPlayed")
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC), alias="createdAt")
+    # Cache validators, never serialized
+    version: int | None = Field(default=0, exclude=True)
+    updated_at: datetime | None = Field(default=None, exclude=True)
 
 
 class UserInDB(User):
     """Internal user model with hashed password."""
     hashed_password: str
+
+
+class UsersResponse(BaseModel):
+    """Users fetched by id, in request order, and the ids that were not found."""
+    users: list[User]
+    missing: list[int]
@@ -0,0 +1,333 @@
+"""Opt-in sampling profiler for individual requests.
+
+`ProfilingMiddleware` profiles a request when it carries an `X-Profile-Token`
+header matching PROFILE_TOKEN, or when it is picked by the sampling rate for
+its path. A background thread then records the Python stack of the thread
+running the event loop every PROFILE_INTERVAL_MS until the response has been
+sent, and the samples are written to PROFILE_DIR in two formats:
+
+- `<name>.collapsed`: one `frame;frame;frame count` line per distinct stack,
+  as read by flamegraph.pl, inferno and speedscope
+- `<name>.speedscope.json`: https://www.speedscope.app
+
+The response gets an `X-Profile` header with `<name>`.
+
+Samples are wall-clock: time the event loop spends on other requests, or
+waiting in `select` while this one awaits, shows up as such. Work done in
+the threadpool is not sampled.
+
+The rate and paths come from settings until changed at runtime with
+`set_override` (see /api/admin/profiling); overrides go through the shared
+state, and a background thread started by the lifespan (`start_refresher`)
+reads them every second, so every worker picks them up within a second
+while requests only ever look at this worker's copy.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from datetime import datetime, UTC
+from typing import Optional
+from app.config import settings
+from app.services import shared_state
+
+# Shared state group and shard holding the runtime override
+OVERRIDE_GROUP = "profiling"
+OVERRIDE_SHARD = "config"
+# How often the refresher reads the override from the shared state
+OVERRIDE_REFRESH_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9]+")
+
+Frame = tuple[str, str, int]
+
+_active = 0
+# This worker's copy of the override, and a count of local changes to it so
+# that a refresh which read the shared state before one does not undo it
+_override: Optional[dict] = None
+_override_version = 0
+_override_lock = threading.Lock()
+_refresher: Optional[tuple[threading.Thread, threading.Event]] = None
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float, max_seconds: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples: Counter[tuple[Frame, ...]] = Counter()
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """Stop sampling and return the count of each stack, outermost frame first."""
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+        return self.samples
+
+    def _run(self):
+        deadline = self._started + self.max_seconds
+        while not self._stop.wait(self.interval) and time.perf_counter() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.samples[tuple(stack)] += 1
+
+
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+
+
+def _short_path(filename: str) -> str:
+    # Library frames relative to site-packages or the standard library, ours
+    # relative to the backend
+    _, found, rest = filename.rpartition("site-packages" + os.sep)
+    if found:
+        return rest
+    for prefix in (_STDLIB, os.getcwd() + os.sep):
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def _frame_name(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({_short_path(filename)}:{line})"
+
+
+def collapsed(samples: Counter) -> str:
+    """Samples in the collapsed stack format, one line per distinct stack."""
+    lines = [
+        ";".join(_frame_name(frame).replace(";", ":") for frame in stack) + f" {count}"
+        for stack, count in samples.most_common()
+    ]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def speedscope(samples: Counter, name: str, interval: float) -> dict:
+    """Samples as a speedscope sampled profile, weighted in milliseconds."""
+    frames: dict[Frame, int] = {}
+    stacks, weights = [], []
+    for stack, count in samples.most_common():
+        stacks.append([frames.setdefault(frame, len(frames)) for frame in stack])
+        weights.append(round(count * interval * 1000, 3))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "snake-arena",
+        "activeProfileIndex": 0,
+        "shared": {
+            "frames": [
+                {"name": frame[0], "file": _short_path(frame[1]), "line": frame[2]}
+                for frame in frames
+            ],
+        },
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(sum(weights), 3),
+            "samples": stacks,
+            "weights": weights,
+        }],
+    }
+
+
+def profile_name(scope: dict) -> str:
+    """File name stem for a request's profile: time, method, path and a nonce."""
+    path = _UNSAFE.sub("_", scope["path"]).strip("_")[:60] or "root"
+    stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S")
+    return f"{stamp}-{scope['method']}-{path}-{secrets.token_hex(3)}"
+
+
+def write_profile(name: str, samples: Counter, interval: float, directory: Optional[str] = None) -> list[str]:
+    """Write both formats and prune old profiles; return the written paths."""
+    directory = directory or settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    paths = [os.path.join(directory, f"{name}.collapsed"), os.path.join(directory, f"{name}.speedscope.json")]
+    with open(paths[0], "w") as f:
+        f.write(collapsed(samples))
+    with open(paths[1], "w") as f:
+        json.dump(speedscope(samples, name, interval), f)
+    _prune(directory)
+    return paths
+
+
+def _prune(directory: str):
+    names = list_profiles(directory)
+    for name in names[settings.PROFILE_MAX_FILES:]:
+        for suffix in (".collapsed", ".speedscope.json"):
+            try:
+                os.remove(os.path.join(directory, name + suffix))
+            except OSError:
+                pass
+
+
+def list_profiles(directory: Optional[str] = None) -> list[str]:
+    """Names of the profiles in PROFILE_DIR, newest first."""
+    directory = directory or settings.PROFILE_DIR
+    try:
+        entries = os.listdir(directory)
+    except OSError:
+        return []
+    names = [entry[:-len(".collapsed")] for entry in entries if entry.endswith(".collapsed")]
+    return sorted(names, reverse=True)
+
+
+def get_override() -> Optional[dict]:
+    """The runtime sampling override, if one is set (never blocks)."""
+    override = _override
+    if override and override["expires_at"] <= time.time():
+        return None
+    return override
+
+
+def _set_local_override(override: Optional[dict]):
+    global _override, _override_version
+    with _override_lock:
+        _override = override
+        _override_version += 1
+
+
+def refresh_override():
+    """Read the override other workers may have set from the shared state."""
+    global _override
+    version = _override_version
+    override = shared_state.get_state().get_shards(OVERRIDE_GROUP).get(OVERRIDE_SHARD)
+    with _override_lock:
+        if version == _override_version:
+            _override = override
+
+
+def _refresh_forever(stop: threading.Event):
+    while True:
+        try:
+            refresh_override()
+        except Exception:
+            logger.exception("Failed to read the profiling override")
+        if stop.wait(OVERRIDE_REFRESH_SECONDS):
+            return
+
+
+def start_refresher():
+    """Start reading the override in a background thread."""
+    global _refresher
+    if _refresher is None:
+        stop = threading.Event()
+        thread = threading.Thread(target=_refresh_forever, args=(stop,), name="profiling-override", daemon=True)
+        thread.start()
+        _refresher = (thread, stop)
+
+
+def stop_refresher():
+    """Stop the background thread started by `start_refresher`."""
+    global _refresher
+    if _refresher is not None:
+        thread, stop = _refresher
+        stop.set()
+        thread.join()
+        _refresher = None
+
+
+def set_override(sample_rate: float, paths: list[str], ttl_seconds: float):
+    """Sample `sample_rate` of requests under `paths` on every worker for a while."""
+    override = {"sample_rate": sample_rate, "paths": paths, "expires_at": time.time() + ttl_seconds}
+    shared_state.get_state().put_shard(OVERRIDE_GROUP, OVERRIDE_SHARD, override, ttl_seconds)
+    _set_local_override(override)
+
+
+def clear_override():
+    """Go back to the configured sampling rate and paths."""
+    # Shards cannot be deleted, but one that expires at once is gone
+    shared_state.get_state().put_shard(OVERRIDE_GROUP, OVERRIDE_SHARD, {}, 0.001)
+    _set_local_override(None)
+
+
+def get_sampling() -> dict:
+    """The sampling rate and paths in effect, and where they come from."""
+    override = get_override()
+    if override:
+        return {**override, "source": "runtime"}
+    return {"sample_rate": settings.PROFILE_SAMPLE_RATE, "paths": settings.PROFILE_PATHS, "source": "settings"}
+
+
+def has_valid_token(token: Optional[bytes]) -> bool:
+    """Whether the raw header value `token` is the profiling token (never when unset)."""
+    # Compared as bytes: compare_digest refuses str with non-ASCII characters
+    return bool(settings.PROFILE_TOKEN and token) and secrets.compare_digest(token, settings.PROFILE_TOKEN.encode())
+
+
+def should_profile(scope: dict) -> bool:
+    """Whether to profile a request: by token header, or sampled by path."""
+    if scope["path"].startswith(f"{settings.API_PREFIX}/admin/"):
+        # Admin calls carry the token too, but are not what anyone is after
+        return False
+    if settings.PROFILE_TOKEN:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile-token" and has_valid_token(value):
+                return True
+    sampling = get_sampling()
+    if sampling["sample_rate"] <= 0:
+        return False
+    if sampling["paths"] and not any(scope["path"].startswith(path) for path in sampling["paths"]):
+        return False
+    return random.random() < sampling["sample_rate"]
+
+
+def reset():
+    """Forget this worker's copy of the override (useful for testing)."""
+    _set_local_override(None)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected HTTP requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _active
+        if scope["type"] != "http" or _active >= settings.PROFILE_MAX_CONCURRENT or not should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = profile_name(scope)
+        interval = settings.PROFILE_INTERVAL_MS / 1000
+        sampler = StackSampler(threading.get_ident(), interval, settings.PROFILE_MAX_SECONDS)
+
+        async def send_with_name(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (b"x-profile", name.encode())]
+            await send(message)
+
+        _active += 1
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_name)
+        finally:
+            samples = sampler.stop()
+            _active -= 1
+            await asyncio.get_running_loop().run_in_executor(None, write_profile, name, samples, interval)
@@ -0,0 +1,49 @@
+"""Fast JSON responses for hot endpoints.
+
+By default FastAPI validates whatever a route returns against its
+`response_model` before serializing it. Routes that build their response
+models themselves from trusted data can return a `FastJSONResponse` instead,
+which skips that second validation: models (and lists of one model type) are
+written straight to JSON by pydantic's serializer, everything else by orjson
+when it is installed, falling back to the standard library.
+"""
+import json
+from functools import lru_cache
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize JSON-compatible content (models, dicts, lists, datetimes...)."""
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content, by_alias=True)
+    if isinstance(content, list) and content and isinstance(content[0], BaseModel):
+        # Lists are assumed to hold a single model type
+        return _list_adapter(type(content[0])).dump_json(content, by_alias=True)
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder)
+    return json.dumps(jsonable_encoder(content), separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that serializes trusted content without revalidating it.
+
+    Return an instance from a route (keeping `response_model` for the docs);
+    headers for the response must be passed to it, since FastAPI does not
+    merge those set on an injected `Response` into a returned one.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
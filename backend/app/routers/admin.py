@@ -0,0 +1,42 @@
+"""Admin router for operational controls."""
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from app import profiling
+from app.config import settings
+from app.models.admin import ProfilingStatus, ProfilingUpdate
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], include_in_schema=False)
+
+
+def require_profile_token(x_profile_token: Optional[str] = Header(None)):
+    """Allow only requests carrying the profiling token; hidden when none is set."""
+    if not settings.PROFILE_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    # Header values are decoded as latin-1, which gives back the raw bytes
+    if x_profile_token is None or not profiling.has_valid_token(x_profile_token.encode("latin-1")):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profiling token")
+
+
+def _status() -> ProfilingStatus:
+    return ProfilingStatus(**profiling.get_sampling(), profiles=profiling.list_profiles()[:50])
+
+
+@router.get("/profiling", response_model=ProfilingStatus, dependencies=[Depends(require_profile_token)])
+async def get_profiling():
+    """Get the request profiling settings in effect."""
+    return _status()
+
+
+@router.put("/profiling", response_model=ProfilingStatus, dependencies=[Depends(require_profile_token)])
+async def update_profiling(update: ProfilingUpdate):
+    """Change which requests are profiled, on every worker, until the TTL runs out."""
+    profiling.set_override(update.sample_rate, update.paths, update.ttl_seconds)
+    return _status()
+
+
+@router.delete("/profiling", response_model=ProfilingStatus, dependencies=[Depends(require_profile_token)])
+async def reset_profiling():
+    """Go back to the configured request profiling settings."""
+    profiling.clear_override()
+    return _status()
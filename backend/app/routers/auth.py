@@ -2,18 +2,20 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from sqlalchemy.orm import Session
 from app.models.auth import LoginRequest, LoginResponse, SignupResponse, LogoutResponse, ErrorResponse
+from app.models import trusted
 from app.models.user import UserCreate, User
 from app.services.auth_service import authenticate_user, create_user, create_access_token
 from app.dependencies import get_current_user, security
 from app.database.database import get_db
 from app.services import db_service
 from app.database import models
+from app.responses import FastJSONResponse
 
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-@router.post("/login", response_model=LoginResponse)
+@router.post("/login", response_model=LoginResponse, response_class=FastJSONResponse)
 async def login(credentials: LoginRequest, db: Session = Depends(get_db)):
     """Authenticate user and return JWT token."""
     user = authenticate_user(db, credentials.email, credentials.password)
@@ -28,13 +30,13 @@ async def login(credentials: LoginRequest, db: Session = Depends(get_db)):
     access_token = create_access_token(data={"sub": str(user.id)})
     
     # Convert SQLAlchemy model to Pydantic model explicitly
-    user_model = User.model_validate(user)
+    user_model = trusted.user_from_row(user)
     
-    return LoginResponse(
+    return FastJSONResponse(LoginResponse(
         success=True,
         user=user_model,
         token=access_token,
-    )
+    ))
 
 
 @router.post("/signup", response_model=SignupResponse, status_code=status.HTTP_201_CREATED)
@@ -67,7 +69,7 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     access_token = create_access_token(data={"sub": str(user.id)})
     
     # Convert SQLAlchemy model to Pydantic model explicitly
-    user_model = User.model_validate(user)
+    user_model = trusted.user_from_row(user)
     
     return SignupResponse(
         success=True,
@@ -77,7 +79,7 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/logout", response_model=LogoutResponse)
-async def logout(credentials = Depends(security)):
+def logout(credentials = Depends(security)):
     """Logout user by blacklisting the token."""
     token = credentials.credentials
     db_service.blacklist_token(token)
@@ -1,24 +1,61 @@
 """Avatars router for avatar management."""
-from fastapi import APIRouter
+import hashlib
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+from app import http_cache
+from app.config import settings
+from app.services import avatar_service
 
 
 router = APIRouter(tags=["Users"])
 
 
-# Pre-defined avatar URLs
+# Pre-defined avatars, generated and served by this API
 AVATAR_URLS = [
-    "https://api.dicebear.com/7.x/lorelei/svg?seed=Chihiro&backgroundColor=b6e3f4",
-    "https://api.dicebear.com/7.x/lorelei/svg?seed=Totoro&backgroundColor=c0aede",
-    "https://api.dicebear.com/7.x/lorelei/svg?seed=Ponyo&backgroundColor=ffdfbf",
-    "https://api.dicebear.com/7.x/lorelei/svg?seed=Kiki&backgroundColor=ffd5dc",
-    "https://api.dicebear.com/7.x/lorelei/svg?seed=Howl&backgroundColor=d4f4dd",
-    "https://api.dicebear.com/7.x/lorelei/svg?seed=Sophie&backgroundColor=fff4e6",
-    "https://api.dicebear.com/7.x/lorelei/svg?seed=Nausicaa&backgroundColor=e3f2fd",
-    "https://api.dicebear.com/7.x/lorelei/svg?seed=Ashitaka&backgroundColor=f3e5f5",
+    avatar_service.avatar_url(seed, background)
+    for seed, background in [
+        ("Chihiro", "b6e3f4"),
+        ("Totoro", "c0aede"),
+        ("Ponyo", "ffdfbf"),
+        ("Kiki", "ffd5dc"),
+        ("Howl", "d4f4dd"),
+        ("Sophie", "fff4e6"),
+        ("Nausicaa", "e3f2fd"),
+        ("Ashitaka", "f3e5f5"),
+    ]
 ]
 
 
+# The list only changes with a deploy
+AVATARS_ETAG = http_cache.make_etag(hashlib.sha256("\n".join(AVATAR_URLS).encode()).hexdigest()[:16])
+
+
 @router.get("/avatars", response_model=list[str])
-async def get_avatars():
+async def get_avatars(request: Request, response: Response):
     """Get available avatar URLs."""
+    not_modified = http_cache.not_modified(request, AVATARS_ETAG, cache_control=settings.CACHE_CONTROL_AVATARS)
+    if not_modified:
+        return not_modified
+    http_cache.set_headers(response, AVATARS_ETAG, cache_control=settings.CACHE_CONTROL_AVATARS)
     return AVATAR_URLS
+
+
+@router.get("/avatars/{avatar_id}.svg", response_class=Response)
+async def get_avatar(avatar_id: str, request: Request):
+    """Get a generated avatar image."""
+    etag = http_cache.make_etag("avatar", avatar_id)
+    # The bytes for an id never change, so any cached copy is current
+    not_modified = http_cache.not_modified(request, etag, cache_control=settings.CACHE_CONTROL_AVATAR_IMAGE)
+    if not_modified:
+        return not_modified
+    data = avatar_service.cache.get(avatar_id)
+    if data is None:
+        data = await run_in_threadpool(avatar_service.cache.load, avatar_id)
+    if data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Avatar not found",
+        )
+    response = Response(content=data, media_type="image/svg+xml")
+    http_cache.set_headers(response, etag, cache_control=settings.CACHE_CONTROL_AVATAR_IMAGE)
+    return response
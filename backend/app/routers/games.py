@@ -1,11 +1,12 @@
 """Games router for score submission."""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
 from sqlalchemy.orm import Session
 from app.models.game import GameResult, ScoreSubmissionResponse
 from app.models.user import User
 from app.dependencies import get_current_user
 from app.database.database import get_db
-from app.services import db_service
+from app.services import db_service, event_streams, verification_service
+from app.services.replay import encode_replay
 from app.database import models
 
 
@@ -15,13 +16,21 @@ router = APIRouter(prefix="/games", tags=["Games"])
 @router.post("/score", response_model=ScoreSubmissionResponse)
 async def submit_score(
     game_result: GameResult,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Submit a game score for the authenticated user."""
+    """Submit a game score for the authenticated user.
+    
+    Scores submitted with a replay are re-simulated after the response is sent
+    and dropped from the leaderboard if the replay does not reproduce them.
+    """
     # Get user's previous high score
     previous_high_score = current_user.high_score
     
+    replay = game_result.replay
+    packed_replay = encode_replay(replay.seed, replay.ticks, replay.inputs) if replay else None
+    
     # Add score to database
     db_service.add_score(
         db,
@@ -29,7 +38,11 @@ async def submit_score(
         score=game_result.score,
         mode=game_result.mode,
         duration=game_result.duration,
+        replay=packed_replay,
     )
+    if packed_replay is not None:
+        background_tasks.add_task(verification_service.verify_pending_scores)
+    event_streams.notify("leaderboard")
     
     # Check if it's a new high score
     new_high_score = game_result.score > previous_high_score
@@ -1,16 +1,38 @@
 """Leaderboard router for game rankings."""
-from typing import Optional
-from fastapi import APIRouter, Query, Depends
+from typing import List, Optional
+from fastapi import APIRouter, Header, Query, Depends
 from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import trusted
 from app.models.game import LeaderboardEntry, GameMode
 from app.database.database import get_db
-from app.services import db_service
+from app.database import models
+from app.responses import FastJSONResponse
+from app.services import db_service, event_streams
 
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
 
 
-@router.get("", response_model=list[LeaderboardEntry])
+def _to_entries(scores: List[models.Score], offset: int = 0) -> List[LeaderboardEntry]:
+    leaderboard = []
+    for idx, score in enumerate(scores, start=offset + 1):
+        # Players are loaded with the scores, in the same query
+        if score.user:
+            leaderboard.append(trusted.leaderboard_entry(idx, score))
+    return leaderboard
+
+
+def _top_entries(mode: Optional[GameMode]) -> event_streams.Snapshot:
+    db = event_streams.session_factory()
+    try:
+        scores = db_service.get_leaderboard(db, mode=mode, limit=settings.STREAM_LEADERBOARD_SIZE)
+        return {str(entry.rank): entry.model_dump(mode="json", by_alias=True) for entry in _to_entries(scores)}
+    finally:
+        db.close()
+
+
+@router.get("", response_model=list[LeaderboardEntry], response_class=FastJSONResponse)
 async def get_leaderboard(
     mode: Optional[GameMode] = Query(None, description="Filter by game mode"),
     limit: int = Query(50, ge=1, le=100, description="Number of entries to return"),
@@ -21,18 +43,22 @@ async def get_leaderboard(
     # Get scores from database
     scores = db_service.get_leaderboard(db, mode=mode, limit=limit, offset=offset)
     
-    # Build leaderboard entries
-    leaderboard = []
-    for idx, score in enumerate(scores, start=offset + 1):
-        # Score object has user relationship loaded (or lazy loaded)
-        if score.user:
-            entry = LeaderboardEntry(
-                rank=idx,
-                user=score.user,
-                score=score.score,
-                mode=score.mode,
-                date=score.date,
-            )
-            leaderboard.append(entry)
+    # Build leaderboard entries; they are already validated
+    return FastJSONResponse(_to_entries(scores, offset))
+
+
+@router.get("/stream")
+async def stream_leaderboard(
+    mode: Optional[GameMode] = Query(None, description="Filter by game mode"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """Stream changes to the top of the leaderboard as Server-Sent Events.
     
-    return leaderboard
+    Sends a `snapshot` event with the top entries, then a `diff` event
+    (`{"upsert": [entries], "remove": [ranks]}`) whenever they change.
+    """
+    topic = event_streams.topic(
+        f"leaderboard:{mode.value if mode else 'all'}",
+        lambda: _top_entries(mode),
+    )
+    return event_streams.stream_response(topic, last_event_id)
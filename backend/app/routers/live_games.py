@@ -1,47 +1,241 @@
 """Live games router for spectating active games."""
+import asyncio
 from typing import Optional
-from fastapi import APIRouter, HTTPException, status, Query, Depends
+from fastapi import APIRouter, Header, HTTPException, status, Query, Depends, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from app.models.game import LiveGame, GameMode
+from starlette.concurrency import run_in_threadpool
+from app.models import trusted
+from app.models.game import LiveGame, LiveGameSort, LiveGameUpdate, GameMode
 from app.database.database import get_db
-from app.services import db_service
+from app.database import models
+from app.dependencies import get_user_loader, get_websocket_user
+from app.responses import FastJSONResponse
+from app.services import db_service, event_streams, shared_state
+from app.services.live_registry import registry
+from app.services.loaders import UserLoader
+from app.services.broadcast import hub, END_OF_STREAM
 
 
 router = APIRouter(prefix="/games/live", tags=["Live Games"])
 
 
-@router.get("", response_model=list[LiveGame])
+def _to_live_games(games: list[dict], users: UserLoader) -> list[LiveGame]:
+    # Load all players in one query
+    users.prime(int(game["player_id"]) for game in games)
+    live_games = []
+    for game in games:
+        user = users.get(int(game["player_id"]))
+        if user:
+            live_games.append(trusted.live_game(game, user))
+    return live_games
+
+
+async def _from_live_games(fn, *args, **kwargs):
+    # This worker's registry belongs to the event loop, while the shared
+    # state blocks: call `fn` where the games it reads are safe to read
+    if shared_state.get_state().is_shared:
+        return await run_in_threadpool(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+def _read_live_games(mode: Optional[GameMode], ids: Optional[set[str]]) -> Optional[list[dict]]:
+    # Called on the event loop, which owns this worker's registry; games in
+    # the shared state are read in the threadpool instead
+    if shared_state.get_state().is_shared:
+        return None
+    if ids is None:
+        return db_service.get_live_games(mode=mode)
+    sessions = (registry.get(game_id) for game_id in ids)
+    return [s.to_dict() for s in sessions if s is not None and mode in (None, s.mode)]
+
+
+def _live_game_snapshot(
+    mode: Optional[GameMode], ids: Optional[set[str]], games: Optional[list[dict]],
+) -> event_streams.Snapshot:
+    if games is None:
+        if ids is None:
+            games = db_service.get_live_games(mode=mode)
+        else:
+            found = (db_service.get_live_game(game_id) for game_id in ids)
+            games = [game for game in found if game is not None and mode in (None, game["mode"])]
+    db = event_streams.session_factory()
+    try:
+        live_games = _to_live_games(games, UserLoader(db))
+        return {game.id: game.model_dump(mode="json", by_alias=True) for game in live_games}
+    finally:
+        db.close()
+
+
+@router.get("", response_model=list[LiveGame], response_class=FastJSONResponse)
 async def get_live_games(
     mode: Optional[GameMode] = Query(None, description="Filter by game mode"),
-    db: Session = Depends(get_db)
+    sort: LiveGameSort = Query(LiveGameSort.SCORE, description="Order by score or viewers, highest first"),
+    limit: int = Query(50, ge=1, le=100, description="Number of games to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    users: UserLoader = Depends(get_user_loader)
 ):
-    """Get list of currently active games."""
+    """Get list of currently active games.
+    
+    When more games follow, the `X-Next-Cursor` response header holds the
+    cursor for the next page.
+    """
     # Get live games from service
-    games = db_service.get_live_games(mode=mode)
+    try:
+        games, next_cursor = await _from_live_games(
+            db_service.get_live_games_page, mode=mode, sort=sort, limit=limit, cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
     
-    # Build live game responses
-    live_games = []
-    for game in games:
-        user = db_service.get_user_by_id(db, int(game["player_id"]))
-        if user:
-            # Manually convert to dict/model as needed
-            live_game = LiveGame(
-                id=game["id"],
-                player=user,
-                score=game["score"],
-                mode=game["mode"],
-                viewers=game["viewers"],
-                started_at=game["started_at"],
-            )
-            live_games.append(live_game)
+    # Build live game responses; they are already validated
+    return FastJSONResponse(_to_live_games(games, users), headers=headers)
+
+
+@router.get("/stream")
+async def stream_live_games(
+    mode: Optional[GameMode] = Query(None, description="Filter by game mode"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """Stream changes to the live game list as Server-Sent Events.
     
-    return live_games
+    Sends a `snapshot` event with all live games, then a `diff` event
+    (`{"upsert": [games], "remove": [game ids]}`) whenever games start, end
+    or change score.
+    """
+    topic = event_streams.topic(
+        f"live:{mode.value if mode else 'all'}",
+        lambda ids, games: _live_game_snapshot(mode, ids, games),
+        lambda ids: _read_live_games(mode, ids),
+    )
+    return event_streams.stream_response(topic, last_event_id)
+
+
+@router.websocket("/play")
+async def play_live_game(
+    websocket: WebSocket,
+    mode: GameMode = Query(GameMode.WALLS),
+    user: Optional[models.User] = Depends(get_websocket_user),
+):
+    """Stream the authenticated player's game state into the live registry.
+
+    The client sends `{"type": "state", "score": ..., "snake": [[x, y], ...]}`
+    on each tick and `{"type": "heartbeat"}` while paused. The game is removed
+    from the registry when the socket closes or heartbeats stop.
+    """
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    session = registry.start(user.id, mode)
+    if session is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    
+    await websocket.accept()
+    await websocket.send_json({"type": "started", "gameId": session.id})
+    event_streams.notify("live", [session.id])
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive_text(), timeout=registry.ttl_seconds)
+            except asyncio.TimeoutError:
+                await websocket.close(code=status.WS_1001_GOING_AWAY)
+                break
+            
+            try:
+                update = LiveGameUpdate.model_validate_json(message)
+            except ValidationError:
+                await websocket.send_json({"type": "error", "detail": "Invalid message"})
+                continue
+            
+            previous_score = session.score
+            if registry.update(session.id, score=update.score, snake=update.snake, food=update.food) is None:
+                # Session expired or was replaced by a newer connection
+                await websocket.close(code=status.WS_1001_GOING_AWAY)
+                break
+            if session.score != previous_score:
+                event_streams.notify("live", [session.id])
+            
+            # Serialize once for all spectators, and only if anyone is watching
+            if update.type == "state" and hub.has_viewers(session.id):
+                frame = session.encode_frame()
+                if frame is not None:
+                    hub.publish(session.id, frame)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        registry.remove(session.id)
+        hub.close(session.id)
+        event_streams.notify("live", [session.id])
+
+
+@router.websocket("/{game_id}")
+async def watch_live_game(
+    websocket: WebSocket,
+    game_id: str,
+    user: Optional[models.User] = Depends(get_websocket_user),
+):
+    """Stream a live game's frames to a spectator.
+
+    Frames use the binary format in `app.services.frame_codec`: a keyframe
+    on join, then mostly delta frames. Viewers that cannot keep up skip frames
+    rather than falling further behind, and resynchronise at the next keyframe.
+    """
+    session = registry.get(game_id)
+    if session is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    # Subscribe before the first await: the game cannot end in between, so
+    # its end of stream always reaches this viewer. Existing viewers share the
+    # encoder's stream, so a newcomer starts from a keyframe of the last frame
+    # they were sent; otherwise start a fresh stream
+    join_frame = session.join_frame() if hub.has_viewers(game_id) else None
+    if join_frame is None:
+        join_frame = session.encode_frame(force_keyframe=True)
+    subscriber = hub.subscribe(game_id)
+    # Signed-in spectators are counted once per account, others per address
+    registry.viewer_joined(game_id, f"user:{user.id}" if user else f"addr:{websocket.client.host}")
+    try:
+        await websocket.accept()
+    except BaseException:
+        hub.unsubscribe(game_id, subscriber)
+        registry.viewer_left(game_id)
+        raise
+    
+    async def wait_for_disconnect():
+        # Spectators do not send anything; reading only detects the close
+        try:
+            while True:
+                await websocket.receive_bytes()
+        except (WebSocketDisconnect, KeyError, RuntimeError):
+            subscriber.offer(END_OF_STREAM)
+    
+    reader = asyncio.create_task(wait_for_disconnect())
+    try:
+        if join_frame is not None:
+            await websocket.send_bytes(join_frame)
+        while (payload := await subscriber.next()) is not END_OF_STREAM:
+            await websocket.send_bytes(payload)
+        if not reader.done():
+            await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        reader.cancel()
+        hub.unsubscribe(game_id, subscriber)
+        registry.viewer_left(game_id)
 
 
 @router.get("/{game_id}", response_model=LiveGame)
 async def get_live_game(game_id: str, db: Session = Depends(get_db)):
     """Get details of a specific live game."""
-    game = db_service.get_live_game(game_id)
+    game = await _from_live_games(db_service.get_live_game, game_id)
     
     if not game:
         raise HTTPException(
@@ -57,11 +251,4 @@ async def get_live_game(game_id: str, db: Session = Depends(get_db)):
             detail="Player not found",
         )
     
-    return LiveGame(
-        id=game["id"],
-        player=user,
-        score=game["score"],
-        mode=game["mode"],
-        viewers=game["viewers"],
-        started_at=game["started_at"],
-    )
+    return trusted.live_game(game, user)
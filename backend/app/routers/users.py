@@ -1,20 +1,103 @@
 """Users router for user profile management."""
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status, Depends
 from sqlalchemy.orm import Session
-from app.models.user import User, UserUpdate
+from app import http_cache
+from app.config import settings
+from app.models import trusted
+from app.models.game import GameMode, ScoreHistoryEntry
+from app.models.user import User, UserUpdate, UsersResponse
 from app.dependencies import get_current_user
 from app.database.database import get_db
-from app.services import db_service
+from app.services import db_service, user_cache
 from app.database import models
 
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
+def _load_users(db: Session, user_ids: list[int]) -> dict[int, User]:
+    """Load public users by id from the database into the cache."""
+    return {
+        user_id: user_cache.cache.put(trusted.user_from_row(user))
+        for user_id, user in db_service.get_users_by_ids(db, user_ids).items()
+    }
+
+
+def _get_cached_users(db: Session, user_ids: list[int]) -> dict[int, User]:
+    """Get public users by id, querying the database only for cache misses."""
+    found = user_cache.cache.get_many(user_ids)
+    misses = [user_id for user_id in user_ids if user_id not in found]
+    if misses:
+        found.update(_load_users(db, misses))
+    return found
+
+
+def _parse_ids(ids: str) -> list[int]:
+    """Parse a comma separated id list, dropping duplicates but keeping order."""
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be comma separated integers",
+        )
+    parsed = list(dict.fromkeys(parsed))
+    if not parsed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No ids given",
+        )
+    if len(parsed) > settings.USERS_BULK_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.USERS_BULK_MAX_IDS} ids per request",
+        )
+    return parsed
+
+
+@router.get("", response_model=UsersResponse)
+async def get_users(
+    ids: str = Query(..., description="Comma separated user ids"),
+    db: Session = Depends(get_db),
+):
+    """Get several users by ID in one request."""
+    user_ids = _parse_ids(ids)
+    found = _get_cached_users(db, user_ids)
+    return UsersResponse(
+        users=[found[user_id] for user_id in user_ids if user_id in found],
+        missing=[user_id for user_id in user_ids if user_id not in found],
+    )
+
+
+@router.get("/search", response_model=list[User])
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=20, description="Username prefix"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """Find users whose username starts with `q`, ignoring case."""
+    return db_service.search_users(db, q, limit=limit)
+
+
+def _user_validators(user: User):
+    """ETag and Last-Modified of a public profile."""
+    return http_cache.make_etag("user", user.id, user.version or 0), user.updated_at or user.created_at
+
+
 @router.get("/{user_id}", response_model=User)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
-    """Get user by ID."""
-    user = db_service.get_user_by_id(db, user_id)
+async def get_user(user_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Get user by ID.
+    
+    Conditional requests for a cached profile are answered without a query.
+    """
+    cached = user_cache.cache.get(user_id)
+    if cached is not None:
+        not_modified = http_cache.not_modified(request, *_user_validators(cached), settings.CACHE_CONTROL_USER)
+        if not_modified:
+            return not_modified
+    
+    user = cached or _load_users(db, [user_id]).get(user_id)
     
     if not user:
         raise HTTPException(
@@ -22,9 +105,45 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
             detail="User not found",
         )
     
+    etag, last_modified = _user_validators(user)
+    not_modified = http_cache.not_modified(request, etag, last_modified, settings.CACHE_CONTROL_USER)
+    if not_modified:
+        return not_modified
+    http_cache.set_headers(response, etag, last_modified, settings.CACHE_CONTROL_USER)
     return user
 
 
+@router.get("/{user_id}/scores", response_model=list[ScoreHistoryEntry])
+async def get_user_scores(
+    user_id: int,
+    response: Response,
+    mode: Optional[GameMode] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Get a player's past games, newest first.
+    
+    Pass the `X-Next-Cursor` response header back as `cursor` to get the next
+    page; the header is absent on the last page.
+    """
+    if user_id not in _get_cached_users(db, [user_id]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    try:
+        rows, next_cursor = db_service.get_score_history(db, user_id, mode=mode, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [trusted.score_history_entry(row) for row in rows]
+
+
 @router.patch("/profile")
 async def update_profile(
     update_data: UserUpdate,
@@ -35,7 +154,8 @@ async def update_profile(
     # Check if username is being changed and if it's already taken
     if update_data.username and update_data.username != current_user.username:
         existing_user = db_service.get_user_by_username(db, update_data.username)
-        if existing_user:
+        # Changing only the case of one's own name is allowed
+        if existing_user and existing_user.id != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken",
@@ -1,9 +1,13 @@
-"""Authentication service for JWT token handling and password hashing."""
+"""Authentication service for JWT token handling and password hashing.
+
+`jose` and `bcrypt` are imported inside the functions that use them so that
+importing the app (and therefore a cold start) does not pay for them.
+"""
+import time
 from datetime import datetime, timedelta, UTC
 from typing import Optional
-from jose import JWTError, jwt
-import bcrypt
 from sqlalchemy.orm import Session
+from app import metrics
 from app.config import settings
 from app.models.user import UserCreate
 from app.database import models
@@ -12,18 +16,27 @@ from app.services import db_service
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    import bcrypt
+    started = time.perf_counter()
+    try:
+        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    finally:
+        metrics.BCRYPT_SECONDS.labels("verify").observe(time.perf_counter() - started)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
+    import bcrypt
+    started = time.perf_counter()
     salt = bcrypt.gensalt()
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    metrics.BCRYPT_SECONDS.labels("hash").observe(time.perf_counter() - started)
     return hashed.decode('utf-8')
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
+    from jose import jwt
     to_encode = data.copy()
     
     if expires_delta:
@@ -38,6 +51,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_access_token(token: str) -> Optional[str]:
     """Decode a JWT token and return the user ID."""
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
@@ -0,0 +1,207 @@
+"""Self-hosted avatar generation.
+
+Avatars are identified by `<seed>-<background>` (for example
+`Chihiro-b6e3f4`) and rendered as small SVG faces whose hair, eyes, mouth
+and colors are picked from a hash of the seed, so the same id always gives
+the same bytes. Rendered avatars are kept in a bounded in-memory LRU backed
+by files in AVATAR_CACHE_DIR, which survive restarts and are shared by the
+workers on one machine. Any id can be requested, so the directory is capped
+too: past AVATAR_CACHE_DIR_MAX_FILES the least recently used files go.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+from app.config import settings
+
+AVATAR_ID = re.compile(r"^(?P<seed>[A-Za-z0-9_]{1,32})-(?P<background>[0-9a-f]{6})$")
+
+SKIN = ["#ffe0c7", "#f9d3b4", "#f1c27d", "#e0ac69", "#c68642", "#8d5524"]
+HAIR = ["#2c1b18", "#4a312c", "#724133", "#a55728", "#b58143", "#d6b370", "#e8e1e1", "#6a4c93", "#3f7cac", "#c93756"]
+EYES = ["#3b2f2f", "#1e5f74", "#2e7d32", "#6d4c41", "#5e35b1"]
+
+HAIR_STYLES = [
+    # Short with a side fringe
+    "M20 46 Q20 16 50 14 Q80 16 80 46 Q72 30 56 28 Q42 36 20 46Z",
+    # Long, framing the face
+    "M16 80 Q12 18 50 14 Q88 18 84 80 L74 80 Q78 40 62 30 Q46 38 28 36 Q22 50 26 80Z",
+    # Spiky
+    "M20 44 L24 20 L34 30 L40 12 L50 26 L60 12 L66 30 L76 20 L80 44 Q66 30 50 32 Q34 30 20 44Z",
+    # Bob with straight bangs
+    "M18 66 Q14 16 50 14 Q86 16 82 66 L76 66 L76 40 L24 40 L24 66Z",
+]
+MOUTHS = [
+    '<path d="M42 66 Q50 73 58 66" fill="none" stroke="#6b3b2a" stroke-width="2.5" stroke-linecap="round"/>',
+    '<path d="M44 66 Q50 70 56 66 Z" fill="#c0504d"/>',
+    '<circle cx="50" cy="67" r="3" fill="#c0504d"/>',
+    '<path d="M44 67 L56 67" stroke="#6b3b2a" stroke-width="2.5" stroke-linecap="round"/>',
+]
+
+
+def parse_avatar_id(avatar_id: str) -> Optional[tuple[str, str]]:
+    """Split an avatar id into (seed, background), or None if it is malformed."""
+    match = AVATAR_ID.match(avatar_id)
+    return (match["seed"], match["background"]) if match else None
+
+
+def avatar_url(seed: str, background: str) -> str:
+    """URL the API serves an avatar at."""
+    return f"{settings.API_PREFIX}/avatars/{seed}-{background}.svg"
+
+
+def render_avatar(seed: str, background: str) -> bytes:
+    """Render the SVG for a seed and background color."""
+    digest = hashlib.blake2b(seed.encode(), digest_size=16).digest()
+    skin = SKIN[digest[0] % len(SKIN)]
+    hair = HAIR[digest[1] % len(HAIR)]
+    eyes = EYES[digest[2] % len(EYES)]
+    hair_style = HAIR_STYLES[digest[3] % len(HAIR_STYLES)]
+    mouth = MOUTHS[digest[4] % len(MOUTHS)]
+    # Eyes sit a little wider or narrower, larger or smaller
+    eye_dx = 12 + digest[5] % 4
+    eye_r = 4 + digest[6] % 3
+    blush = digest[7] % 2 == 0
+    parts = [
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100" width="100" height="100">',
+        f'<rect width="100" height="100" fill="#{background}"/>',
+        f'<rect x="40" y="72" width="20" height="14" fill="{skin}"/>',
+        f'<path d="M22 100 Q24 82 50 82 Q76 82 78 100Z" fill="{hair}" opacity="0.55"/>',
+        f'<ellipse cx="50" cy="50" rx="28" ry="30" fill="{skin}"/>',
+        f'<path d="{hair_style}" fill="{hair}"/>',
+    ]
+    for cx in (50 - eye_dx, 50 + eye_dx):
+        parts.append(f'<ellipse cx="{cx}" cy="52" rx="{eye_r}" ry="{eye_r + 2}" fill="{eyes}"/>')
+        parts.append(f'<circle cx="{cx + 1.5}" cy="50" r="1.5" fill="#fff"/>')
+    if blush:
+        parts.append('<ellipse cx="32" cy="62" rx="5" ry="2.5" fill="#ff8a8a" opacity="0.5"/>')
+        parts.append('<ellipse cx="68" cy="62" rx="5" ry="2.5" fill="#ff8a8a" opacity="0.5"/>')
+    parts.append(mouth)
+    parts.append("</svg>")
+    return "".join(parts).encode()
+
+
+class AvatarCache:
+    """Rendered avatars in a bounded LRU backed by a directory on disk."""
+
+    def __init__(self, max_entries: int, directory: Optional[str] = None, max_files: int = 10_000):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_files = max_files
+        # Files in the directory as far as this worker knows; None until counted
+        self._disk_files: Optional[int] = None
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        # Misses are rendered in the threadpool, so lookups may be concurrent
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, avatar_id: str) -> str:
+        return os.path.join(self.directory, f"{avatar_id}.svg")
+
+    def get(self, avatar_id: str) -> Optional[bytes]:
+        """Cached bytes from memory only (never blocks on disk)."""
+        with self._lock:
+            data = self._entries.get(avatar_id)
+            if data is not None:
+                self._entries.move_to_end(avatar_id)
+                self.hits += 1
+            return data
+
+    def _put(self, avatar_id: str, data: bytes):
+        with self._lock:
+            self._entries[avatar_id] = data
+            self._entries.move_to_end(avatar_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, avatar_id: str) -> Optional[bytes]:
+        if not self.directory:
+            return None
+        path = self._path(avatar_id)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # The modification time orders files for eviction
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def _write_disk(self, avatar_id: str, data: bytes):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write then rename so other workers never read a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(avatar_id))
+            with self._lock:
+                if self._disk_files is None:
+                    self._disk_files = len(self._disk_entries())
+                else:
+                    self._disk_files += 1
+                full = self._disk_files > self.max_files
+            if full:
+                self._prune_disk()
+        except OSError:
+            # The disk store is an optimization; rendering again is fine
+            pass
+
+    def _disk_entries(self) -> list[os.DirEntry]:
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if entry.name.endswith(".svg")]
+
+    def _prune_disk(self):
+        # Down to 90% of the cap, so pruning (which lists the directory) only
+        # happens once every tenth of the cap's writes
+        entries = []
+        for entry in self._disk_entries():
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass
+        entries.sort()
+        excess = len(entries) - self.max_files * 9 // 10
+        for _, path in entries[:max(excess, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                # Another worker pruned it first
+                pass
+        with self._lock:
+            self._disk_files = len(entries) - max(excess, 0)
+
+    def load(self, avatar_id: str) -> Optional[bytes]:
+        """Get an avatar from memory, disk or by rendering it; None for bad ids."""
+        data = self.get(avatar_id)
+        if data is not None:
+            return data
+        parsed = parse_avatar_id(avatar_id)
+        if parsed is None:
+            return None
+        self.misses += 1
+        data = self._read_disk(avatar_id)
+        if data is None:
+            data = render_avatar(*parsed)
+            self._write_disk(avatar_id, data)
+        self._put(avatar_id, data)
+        return data
+
+    def clear(self):
+        """Drop the in-memory entries (useful for testing)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# Global cache instance
+cache = AvatarCache(
+    max_entries=settings.AVATAR_CACHE_SIZE,
+    directory=settings.AVATAR_CACHE_DIR or None,
+    max_files=settings.AVATAR_CACHE_DIR_MAX_FILES,
+)
@@ -0,0 +1,105 @@
+"""Fan-out hub that delivers live game frames to spectators.
+
+Each frame is serialized once by the publisher and the same bytes object is
+queued for every viewer. Every viewer has a small bounded queue; when a viewer
+falls behind, its oldest pending frame is dropped so publishing never blocks
+and memory stays bounded no matter how slow a consumer is.
+
+A viewer's queue belongs to the event loop it subscribed from; frames
+published from another thread are handed over with `call_soon_threadsafe`.
+"""
+import asyncio
+from typing import Optional
+
+# Pushed to a subscriber's queue to tell it the stream has ended
+END_OF_STREAM = None
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class Subscriber:
+    """One viewer's pending frames."""
+    __slots__ = ("queue", "dropped", "loop")
+
+    def __init__(self, max_pending: int):
+        self.queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.loop = _running_loop()
+
+    def offer(self, payload: Optional[bytes]):
+        """Queue a frame, dropping the oldest pending one if the queue is full."""
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait(payload)
+            self.dropped += 1
+
+    async def next(self) -> Optional[bytes]:
+        """Wait for the next frame; END_OF_STREAM when the game is over."""
+        return await self.queue.get()
+
+    def offer_from(self, loop: Optional[asyncio.AbstractEventLoop], payload: Optional[bytes]):
+        """Queue a frame from code running on `loop`, which may be another thread's."""
+        if self.loop is None or self.loop is loop:
+            self.offer(payload)
+        else:
+            self.loop.call_soon_threadsafe(self.offer, payload)
+
+
+class BroadcastHub:
+    """Per-game channels of subscribers."""
+
+    def __init__(self, max_pending: int = 8):
+        self.max_pending = max_pending
+        self._channels: dict[str, set[Subscriber]] = {}
+
+    def subscribe(self, game_id: str) -> Subscriber:
+        """Add a viewer to a game's channel."""
+        subscriber = Subscriber(self.max_pending)
+        self._channels.setdefault(game_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, game_id: str, subscriber: Subscriber):
+        """Remove a viewer from a game's channel."""
+        channel = self._channels.get(game_id)
+        if channel is None:
+            return
+        channel.discard(subscriber)
+        if not channel:
+            del self._channels[game_id]
+
+    def viewer_count(self, game_id: str) -> int:
+        """Number of viewers currently subscribed to a game."""
+        return len(self._channels.get(game_id, ()))
+
+    def has_viewers(self, game_id: str) -> bool:
+        """Whether anyone is watching a game (lets publishers skip serializing)."""
+        return game_id in self._channels
+
+    def publish(self, game_id: str, payload: bytes) -> int:
+        """Queue an already-serialized frame for every viewer of a game."""
+        channel = self._channels.get(game_id)
+        if not channel:
+            return 0
+        loop = _running_loop()
+        # Snapshot: viewers on other threads may unsubscribe meanwhile
+        subscribers = tuple(channel)
+        for subscriber in subscribers:
+            subscriber.offer_from(loop, payload)
+        return len(subscribers)
+
+    def close(self, game_id: str):
+        """Tell every viewer of a game that the stream has ended."""
+        loop = _running_loop()
+        for subscriber in self._channels.pop(game_id, ()):
+            subscriber.offer_from(loop, END_OF_STREAM)
+
+
+# Global hub instance
+hub = BroadcastHub()
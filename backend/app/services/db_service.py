@@ -1,25 +1,62 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.orm import Session, defer, joinedload
+from sqlalchemy import and_, desc, func, or_
+from app import metrics
+from app.config import settings
 from app.database import models
 from app.models.user import UserInDB, UserCreate
-from app.models.game import GameMode
+from app.models.game import GameMode, LiveGameSort, VerificationStatus
+from app.services import live_registry, shared_state, user_cache
+import base64
+import time
 from datetime import datetime, UTC, timedelta
-from typing import Optional, List
-import bcrypt
+from typing import Iterable, Optional, List
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.id == user_id).first()
 
+def get_users_by_ids(db: Session, user_ids: Iterable[int]) -> dict[int, models.User]:
+    """Fetch several users with one query, keyed by id."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    return {user.id: user for user in db.query(models.User).filter(models.User.id.in_(user_ids))}
+
 def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.email == email).first()
+    # Case-insensitive, via the normalized column
+    return db.query(models.User).filter(models.User.email_key == models.normalize_key(email)).first()
 
 def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.username == username).first()
+    # Case-insensitive, via the normalized column
+    return db.query(models.User).filter(models.User.username_key == models.normalize_key(username)).first()
+
+def search_users(db: Session, prefix: str, limit: int = 10) -> List[models.User]:
+    """Users whose username starts with `prefix`, ignoring case, in name order.
+
+    Matches are a range scan of the username_key index: every key starting
+    with the prefix sorts at or after it and before the prefix with its last
+    character incremented.
+    """
+    low = models.normalize_key(prefix)
+    # Lone surrogates cannot be encoded, so no stored name contains one
+    if not low or any(0xD800 <= ord(char) < 0xE000 for char in low):
+        return []
+    query = db.query(models.User).filter(models.User.username_key >= low)
+    last = ord(low[-1])
+    if last not in (0xD7FF, 0x10FFFF):
+        query = query.filter(models.User.username_key < low[:-1] + chr(last + 1))
+    else:
+        # The next code point is a surrogate or does not exist, so there is
+        # no upper bound to range over: match the prefix itself instead
+        query = query.filter(models.User.username_key.startswith(low, autoescape=True))
+    return query.order_by(models.User.username_key).limit(limit).all()
 
 def create_user(db: Session, user: UserCreate) -> models.User:
-    # Hash password
+    # Hash password (bcrypt is imported lazily to keep cold starts fast)
+    import bcrypt
+    started = time.perf_counter()
     salt = bcrypt.gensalt()
     hashed_password = bcrypt.hashpw(user.password.encode('utf-8'), salt).decode('utf-8')
+    metrics.BCRYPT_SECONDS.labels("hash").observe(time.perf_counter() - started)
     
     db_user = models.User(
         username=user.username,
@@ -33,6 +70,11 @@ def create_user(db: Session, user: UserCreate) -> models.User:
     db.refresh(db_user)
     return db_user
 
+def _touch_user(user: models.User):
+    """Record that a user's public profile changed (see app.http_cache)."""
+    user.version = (user.version or 0) + 1
+    user.updated_at = datetime.now(UTC)
+
 def update_user(db: Session, user_id: int, **kwargs) -> Optional[models.User]:
     user = get_user_by_id(db, user_id)
     if not user:
@@ -41,18 +83,29 @@ def update_user(db: Session, user_id: int, **kwargs) -> Optional[models.User]:
     for key, value in kwargs.items():
         if hasattr(user, key) and value is not None:
             setattr(user, key, value)
+    _touch_user(user)
             
     db.commit()
     db.refresh(user)
+    user_cache.cache.invalidate(user_id)
     return user
 
-def add_score(db: Session, user_id: int, score: int, mode: GameMode, duration: int) -> models.Score:
+def add_score(
+    db: Session,
+    user_id: int,
+    score: int,
+    mode: GameMode,
+    duration: int,
+    replay: Optional[bytes] = None,
+) -> models.Score:
     db_score = models.Score(
         user_id=user_id,
         score=score,
         mode=mode,
         duration=duration,
-        date=datetime.now(UTC)
+        date=datetime.now(UTC),
+        replay=replay,
+        verification=VerificationStatus.PENDING if replay else VerificationStatus.UNVERIFIED,
     )
     db.add(db_score)
     
@@ -62,35 +115,151 @@ def add_score(db: Session, user_id: int, score: int, mode: GameMode, duration: i
         user.games_played += 1
         if score > user.high_score:
             user.high_score = score
+        _touch_user(user)
             
     db.commit()
     db.refresh(db_score)
+    user_cache.cache.invalidate(user_id)
     return db_score
 
+def _not_rejected():
+    # Scores from before verification existed have no status; NULL != x is
+    # never true in SQL, so they have to be let through explicitly
+    return or_(models.Score.verification.is_(None), models.Score.verification != VerificationStatus.REJECTED)
+
 def get_leaderboard(db: Session, mode: Optional[GameMode] = None, limit: int = 50, offset: int = 0) -> List[models.Score]:
-    query = db.query(models.Score)
+    # Scores whose replay failed verification never appear on the leaderboard
+    # Players are joined in the same query; replays are never needed here
+    query = (
+        db.query(models.Score)
+        .options(joinedload(models.Score.user), defer(models.Score.replay))
+        .filter(_not_rejected())
+    )
     if mode:
         query = query.filter(models.Score.mode == mode)
     
     return query.order_by(desc(models.Score.score)).offset(offset).limit(limit).all()
 
-# Live games are still in-memory as they are transient
-_live_games = {}
+def encode_score_cursor(date: datetime, score_id: int) -> str:
+    """Opaque cursor pointing just after the score (date, id) in history order."""
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{score_id}".encode()).decode()
 
-def get_live_games(mode: Optional[GameMode] = None) -> List[dict]:
-    games = list(_live_games.values())
+def decode_score_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of `encode_score_cursor`; raises ValueError for malformed cursors."""
+    try:
+        date, _, score_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+        return datetime.fromisoformat(date), int(score_id)
+    except (UnicodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+def get_score_history(
+    db: Session,
+    user_id: int,
+    mode: Optional[GameMode] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> tuple[list, Optional[str]]:
+    """One page of a player's scores, newest first, and the cursor for the next.
+
+    Rows are plain (id, score, mode, duration, date, verification) tuples read
+    from ix_scores_user_mode_date; raises ValueError for a malformed cursor.
+    """
+    S = models.Score
+    query = db.query(S.id, S.score, S.mode, S.duration, S.date, S.verification).filter(S.user_id == user_id)
     if mode:
-        games = [g for g in games if g["mode"] == mode]
+        query = query.filter(S.mode == mode)
+    if cursor:
+        date, score_id = decode_score_cursor(cursor)
+        # Keyset pagination: strictly after the last row of the previous page
+        query = query.filter(or_(S.date < date, and_(S.date == date, S.id < score_id)))
+    rows = query.order_by(desc(S.date), desc(S.id)).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_score_cursor(rows[-1].date, rows[-1].id)
+
+def get_pending_scores(db: Session, limit: int = 100) -> List[models.Score]:
+    return (
+        db.query(models.Score)
+        .filter(models.Score.verification == VerificationStatus.PENDING)
+        .order_by(models.Score.id)
+        .limit(limit)
+        .all()
+    )
+
+def set_score_verification(db: Session, results: dict[int, bool]):
+    """Record replay verification results, keyed by score id."""
+    scores = db.query(models.Score).filter(models.Score.id.in_(results)).all()
+    rejected_users = set()
+    for db_score in scores:
+        if results[db_score.id]:
+            db_score.verification = VerificationStatus.VERIFIED
+        else:
+            db_score.verification = VerificationStatus.REJECTED
+            rejected_users.add(db_score.user_id)
+    db.flush()
+    
+    # A rejected score may have been the user's high score
+    for user_id in rejected_users:
+        best = (
+            db.query(func.max(models.Score.score))
+            .filter(models.Score.user_id == user_id, _not_rejected())
+            .scalar()
+        )
+        user = get_user_by_id(db, user_id)
+        if user:
+            user.high_score = best or 0
+            _touch_user(user)
+    db.commit()
+    for user_id in rejected_users:
+        user_cache.cache.invalidate(user_id)
+
+# Live games are transient; players feed them over the /games/live/play
+# WebSocket into this worker's registry, which writes them through to the
+# shared state so every worker can list them
+def get_live_games(mode: Optional[GameMode] = None) -> List[dict]:
+    state = shared_state.get_state()
+    if not state.is_shared:
+        return [session.to_dict() for session in live_registry.registry.list(mode)]
+    games = state.list_live_games()
+    if mode is not None:
+        games = [game for game in games if game["mode"] == mode]
     return games
 
-def get_live_game(game_id: str) -> Optional[dict]:
-    return _live_games.get(game_id)
+def get_live_games_page(
+    mode: Optional[GameMode] = None,
+    sort: LiveGameSort = LiveGameSort.SCORE,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> tuple[List[dict], Optional[str]]:
+    """Get one page of live games, highest first, and the cursor for the next.
 
-# Token blacklist (in-memory for now, could be Redis or DB table)
-_blacklisted_tokens = set()
+    Raises ValueError for a malformed cursor.
+    """
+    after = live_registry.decode_cursor(cursor) if cursor else None
+    state = shared_state.get_state()
+    if not state.is_shared:
+        sessions, next_key = live_registry.registry.page(mode, sort, limit, after)
+        games = [session.to_dict() for session in sessions]
+    else:
+        # Games from every worker, read in order from the backend's index
+        games = state.page_live_games(mode.value if mode else None, sort.value, after, limit + 1)
+        last = games[limit - 1] if len(games) > limit else None
+        next_key = live_registry.sort_key(last[sort.value], last["id"]) if last else None
+        games = games[:limit]
+    return games, live_registry.encode_cursor(next_key) if next_key else None
+
+def get_live_game(game_id: str) -> Optional[dict]:
+    state = shared_state.get_state()
+    if not state.is_shared:
+        session = live_registry.registry.get(game_id)
+        return session.to_dict() if session else None
+    return state.get_live_game(game_id)
 
+# Token revocations live in the shared state until the token would have
+# expired anyway
 def blacklist_token(token: str):
-    _blacklisted_tokens.add(token)
+    shared_state.get_state().revoke_token(token, settings.ACCESS_TOKEN_EXPIRE_DAYS * 86400)
 
 def is_token_blacklisted(token: str) -> bool:
-    return token in _blacklisted_tokens
+    return shared_state.get_state().is_token_revoked(token)
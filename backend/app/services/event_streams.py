@@ -0,0 +1,267 @@
+"""Server-Sent Event streams of leaderboard and live game changes.
+
+Each topic has one producer task per worker, however many clients are
+connected. The producer reloads the topic's snapshot (a dict of JSON-ready
+items keyed by id) when `notify` is called, and at least every
+STREAM_POLL_SECONDS to pick up changes made on other workers. It diffs the
+new snapshot against the previous one and, if anything changed, appends one
+serialized event to a ring buffer shared by all subscribers. Topics that
+can load single items reload only the ids passed to `notify`, so a score
+change costs one item rather than the whole list.
+
+Clients get a `snapshot` event on connect followed by `diff` events of the
+form `{"upsert": [...], "remove": [...]}`. Event ids are `<epoch>:<n>`; a
+client reconnecting with a `Last-Event-ID` still in the ring buffer is sent
+the events it missed, otherwise a fresh snapshot.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+from app.config import settings
+from app.database.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Overridable so tests can point producers at their own database
+session_factory = SessionLocal
+
+# Reconnect delay suggested to clients
+RETRY_MS = 3000
+
+Snapshot = dict[str, dict]
+
+
+def _diff(old: Snapshot, new: Snapshot, keys: Optional[set[str]] = None) -> dict:
+    # With `keys`, only those items were reloaded into `new`
+    return {
+        "upsert": [item for key, item in new.items() if old.get(key) != item],
+        "remove": [key for key in (old if keys is None else keys) if key in old and key not in new],
+    }
+
+
+def format_event(event_id: str, event: str, data: str) -> str:
+    """Encode one SSE message."""
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+
+class Topic:
+    """One stream of changes with a shared producer and replay buffer.
+
+    `load` runs in the threadpool. A topic whose items live in state owned
+    by the event loop also has `read`, called on the loop with the ids to
+    reload (None for all); `load` then gets those ids and what `read`
+    returned, and returns just the items among them that still exist.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        load: Callable[..., Snapshot],
+        read: Optional[Callable[[Optional[set[str]]], Any]] = None,
+    ):
+        self.name = name
+        self._load = load
+        self._read = read
+        # Ids to reload on the next refresh; None reloads everything
+        self._changed: Optional[set[str]] = None
+        self._epoch = uuid.uuid4().hex[:8]
+        self._events: deque[tuple[int, str]] = deque(maxlen=settings.STREAM_HISTORY)
+        self._last_id = 0
+        self._snapshot: Optional[Snapshot] = None
+        self._subscribers = 0
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Future] = None
+        self._wakeup: Optional[asyncio.Future] = None
+        self._published: Optional[asyncio.Future] = None
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def notify(self, keys: Optional[Iterable[str]] = None):
+        """Ask the producer to reload soon (coalesced with other requests).
+
+        With `keys`, only those items need reloading.
+        """
+        if self._loop is None or self._wakeup is None:
+            return
+        self._loop.call_soon_threadsafe(self._wake, None if keys is None else set(keys))
+
+    def _wake(self, keys: Optional[set[str]] = None):
+        if keys is None or self._read is None:
+            self._changed = None
+        elif self._changed is not None:
+            self._changed |= keys
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    async def refresh(self) -> bool:
+        """Reload the snapshot and record a diff event if it changed."""
+        keys, self._changed = self._changed, set()
+        if self._snapshot is None:
+            keys = None
+        if self._read is None:
+            snapshot = await run_in_threadpool(self._load)
+        elif keys:
+            snapshot = await run_in_threadpool(self._load, keys, self._read(keys))
+        elif keys is None:
+            snapshot = await run_in_threadpool(self._load, None, self._read(None))
+        else:
+            return False
+        if self._snapshot is not None:
+            diff = _diff(self._snapshot, snapshot, keys)
+            if not diff["upsert"] and not diff["remove"]:
+                return False
+            self._last_id += 1
+            self._events.append((self._last_id, json.dumps(diff, separators=(",", ":"))))
+            if keys is not None:
+                for key in diff["remove"]:
+                    del self._snapshot[key]
+                self._snapshot.update(snapshot)
+                snapshot = self._snapshot
+        self._snapshot = snapshot
+        if self._published is not None:
+            self._published.set_result(None)
+            self._published = self._loop.create_future()
+        return True
+
+    async def _produce(self):
+        try:
+            # Also records changes made while nobody was subscribed
+            await self.refresh()
+        except Exception as exc:
+            # Subscribers waiting for the first snapshot get the error; the
+            # next subscriber starts a new producer
+            self._ready.set_exception(exc)
+            self._task = None
+            return
+        self._ready.set_result(None)
+        self._wakeup = self._loop.create_future()
+        while True:
+            await asyncio.wait({self._wakeup}, timeout=settings.STREAM_POLL_SECONDS)
+            if not self._wakeup.done():
+                # Polling picks up other workers' changes, so reload it all
+                self._changed = None
+            # Notifications from now on wake the next iteration
+            self._wakeup = self._loop.create_future()
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh stream %s", self.name)
+            # Coalesce bursts of notifications into one reload
+            await asyncio.sleep(settings.STREAM_MIN_INTERVAL_SECONDS)
+
+    def _start(self) -> asyncio.Future:
+        # Returns a future that resolves once the first snapshot is loaded
+        if self._task is None:
+            # Notifications were dropped while nobody was subscribed, so the
+            # first refresh reloads everything
+            self._changed = None
+            self._loop = asyncio.get_running_loop()
+            self._ready = self._loop.create_future()
+            self._published = self._loop.create_future()
+            # A fresh context keeps the producer's queries out of the
+            # subscribing request's statistics
+            self._task = asyncio.create_task(self._produce(), context=contextvars.Context())
+        return self._ready
+
+    def _release(self):
+        self._subscribers -= 1
+        if self._subscribers == 0 and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._wakeup = None
+
+    def _event_id(self, n: int) -> str:
+        return f"{self._epoch}:{n}"
+
+    def _resume_from(self, last_event_id: Optional[str]) -> Optional[int]:
+        # The event number to continue after, or None if a snapshot is needed
+        if not last_event_id:
+            return None
+        epoch, _, n = last_event_id.partition(":")
+        if epoch != self._epoch or not n.isdigit():
+            return None
+        n = int(n)
+        if n == self._last_id:
+            return n
+        if n > self._last_id or not self._events or self._events[0][0] > n + 1:
+            return None
+        return n
+
+    def _snapshot_event(self) -> str:
+        data = json.dumps(list(self._snapshot.values()), separators=(",", ":"))
+        return format_event(self._event_id(self._last_id), "snapshot", data)
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield SSE messages for one client until it disconnects."""
+        self._subscribers += 1
+        try:
+            await asyncio.shield(self._start())
+            yield f"retry: {RETRY_MS}\n\n"
+            cursor = self._resume_from(last_event_id)
+            if cursor is None:
+                yield self._snapshot_event()
+                cursor = self._last_id
+            while True:
+                if cursor < self._last_id:
+                    if not self._events or self._events[0][0] > cursor + 1:
+                        # Fell further behind than the buffer reaches
+                        yield self._snapshot_event()
+                        cursor = self._last_id
+                    else:
+                        for n, data in list(self._events):
+                            if n > cursor:
+                                yield format_event(self._event_id(n), "diff", data)
+                                cursor = n
+                    continue
+                try:
+                    await asyncio.wait_for(asyncio.shield(self._published), settings.STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+        finally:
+            self._release()
+
+
+_topics: dict[str, Topic] = {}
+
+
+def topic(name: str, load: Callable[..., Snapshot], read: Optional[Callable[[Optional[set[str]]], Any]] = None) -> Topic:
+    """Get a topic, creating it on first use."""
+    existing = _topics.get(name)
+    if existing is None:
+        existing = _topics[name] = Topic(name, load, read)
+    return existing
+
+
+def notify(prefix: str, keys: Optional[Iterable[str]] = None):
+    """Wake the producers of every topic whose name starts with `prefix`.
+
+    With `keys`, only those items of each topic need reloading.
+    """
+    keys = None if keys is None else list(keys)
+    for name, t in _topics.items():
+        if name.startswith(prefix):
+            t.notify(keys)
+
+
+def clear():
+    """Forget all topics (useful for testing)."""
+    _topics.clear()
+
+
+def stream_response(t: Topic, last_event_id: Optional[str] = None) -> StreamingResponse:
+    """Serve a topic to one client as `text/event-stream`."""
+    return StreamingResponse(
+        t.stream(last_event_id),
+        media_type="text/event-stream",
+        # Proxies must neither cache nor buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,254 @@
+"""Compact binary wire format for live game frames.
+
+All integers are big-endian. Every frame starts with
+
+    u8 kind | u32 seq | u32 score
+
+The sequence number wraps around after 2**32 - 1; scores must fit in a u32.
+
+Keyframes (kind 0) carry the full state:
+
+    u8 mode | u8 grid size | u8 food count | food count * (u8 x, u8 y)
+    | u16 length | u8 head x | u8 head y | body directions
+
+where each body segment is stored as the 2-bit direction from the previous
+segment, four per byte. Delta frames (kind 1) describe how the snake moved
+since the previous frame:
+
+    u8 flags | [u8 food count | food ...] | u16 length | u8 moves | head moves
+
+The decoder prepends one segment per 2-bit head move and trims the tail to the
+new length, which covers both plain moves and growth. Food is only included
+when it changed (flag bit 0). The encoder falls back to a keyframe whenever a
+delta cannot describe the change, and every `keyframe_interval` frames so a
+viewer that dropped frames can resynchronise.
+"""
+import struct
+from typing import NamedTuple, Optional, Sequence
+from app.models.game import GameMode, GRID_SIZE
+
+KEYFRAME = 0
+DELTA = 1
+
+FLAG_FOOD = 0x01
+
+# Direction codes; a step is (dx, dy) in grid coordinates (y grows downwards)
+UP, RIGHT, DOWN, LEFT = range(4)
+_STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+_MODES = (GameMode.WALLS, GameMode.PASS_THROUGH)
+_MODE_CODES = {mode: code for code, mode in enumerate(_MODES)}
+
+# A delta can describe at most this many head moves since the previous frame
+MAX_DELTA_MOVES = 8
+
+_HEADER = struct.Struct("!BII")
+MAX_U32 = 0xFFFFFFFF
+_LENGTH = struct.Struct("!H")
+
+Point = tuple[int, int]
+
+
+class Frame(NamedTuple):
+    """A decoded frame."""
+    seq: int
+    score: int
+    mode: GameMode
+    snake: tuple[Point, ...]
+    food: tuple[Point, ...]
+    keyframe: bool
+
+
+def _step_direction(src: Point, dst: Point, grid_size: int) -> Optional[int]:
+    """Direction that moves `src` to `dst` in one step (wrapping at edges)."""
+    dx = (dst[0] - src[0]) % grid_size
+    dy = (dst[1] - src[1]) % grid_size
+    if dy == 0:
+        if dx == 1:
+            return RIGHT
+        if dx == grid_size - 1:
+            return LEFT
+    elif dx == 0:
+        if dy == 1:
+            return DOWN
+        if dy == grid_size - 1:
+            return UP
+    return None
+
+
+def _apply(point: Point, direction: int, grid_size: int) -> Point:
+    dx, dy = _STEPS[direction]
+    return (point[0] + dx) % grid_size, (point[1] + dy) % grid_size
+
+
+def _pack_directions(directions: Sequence[int]) -> bytes:
+    packed = bytearray((len(directions) + 3) // 4)
+    for i, direction in enumerate(directions):
+        packed[i >> 2] |= direction << ((i & 3) * 2)
+    return bytes(packed)
+
+
+def _unpack_directions(data: bytes, offset: int, count: int) -> list[int]:
+    return [(data[offset + (i >> 2)] >> ((i & 3) * 2)) & 3 for i in range(count)]
+
+
+def _pack_food(food: Sequence[Point]) -> bytes:
+    return bytes([len(food), *(c for point in food for c in point)])
+
+
+def _unpack_food(data: bytes, offset: int) -> tuple[tuple[Point, ...], int]:
+    count = data[offset]
+    offset += 1
+    food = tuple((data[offset + 2 * i], data[offset + 2 * i + 1]) for i in range(count))
+    return food, offset + 2 * count
+
+
+class FrameEncoder:
+    """Stateful encoder for one game's frame stream."""
+
+    def __init__(self, grid_size: int = GRID_SIZE, keyframe_interval: int = 30):
+        self.grid_size = grid_size
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self._since_keyframe = 0
+        self._last: Optional[tuple] = None
+        self._snapshot: Optional[bytes] = None
+
+    def encode(
+        self,
+        score: int,
+        mode: GameMode,
+        snake: Sequence[Point],
+        food: Sequence[Point] = (),
+        force_keyframe: bool = False,
+    ) -> bytes:
+        """Encode the next frame, as a delta when possible."""
+        if not 0 <= score <= MAX_U32:
+            raise ValueError("score does not fit in a frame")
+        snake = tuple(snake)
+        food = tuple(food)
+        self.seq = (self.seq + 1) & MAX_U32
+        frame = None
+        if not force_keyframe and self._last is not None and self._since_keyframe < self.keyframe_interval:
+            frame = self._encode_delta(score, mode, snake, food)
+        if frame is None:
+            frame = self._encode_keyframe(self.seq, score, mode, snake, food)
+            self._since_keyframe = 0
+        else:
+            self._since_keyframe += 1
+        self._last = (score, mode, snake, food)
+        self._snapshot = None
+        return frame
+
+    def snapshot(self) -> Optional[bytes]:
+        """Keyframe of the last encoded state, for a viewer joining mid-stream.
+
+        It carries the same sequence number as the last frame, so the next
+        delta applies on top of it. None if nothing has been encoded yet.
+        """
+        if self._last is None:
+            return None
+        if self._snapshot is None:
+            self._snapshot = self._encode_keyframe(self.seq, *self._last)
+        return self._snapshot
+
+    def _encode_keyframe(self, seq, score, mode, snake, food) -> bytes:
+        directions = []
+        for prev, segment in zip(snake, snake[1:]):
+            direction = _step_direction(prev, segment, self.grid_size)
+            if direction is None:
+                raise ValueError("snake segments must be adjacent")
+            directions.append(direction)
+        parts = [
+            _HEADER.pack(KEYFRAME, seq, score),
+            bytes([_MODE_CODES[mode], self.grid_size]),
+            _pack_food(food),
+            _LENGTH.pack(len(snake)),
+        ]
+        if snake:
+            parts.append(bytes(snake[0]))
+            parts.append(_pack_directions(directions))
+        return b"".join(parts)
+
+    def _encode_delta(self, score, mode, snake, food) -> Optional[bytes]:
+        _, last_mode, last_snake, last_food = self._last
+        if mode != last_mode or not snake or not last_snake:
+            return None
+
+        # Find how many new head segments were prepended to the old snake
+        for moves in range(min(MAX_DELTA_MOVES, len(snake)) + 1):
+            body = snake[moves:]
+            if body == last_snake[:len(body)] and len(body) > 0:
+                break
+        else:
+            return None
+
+        directions = []
+        previous = snake[moves]
+        for segment in reversed(snake[:moves]):
+            direction = _step_direction(previous, segment, self.grid_size)
+            if direction is None:
+                return None
+            directions.append(direction)
+            previous = segment
+
+        flags = FLAG_FOOD if food != last_food else 0
+        parts = [_HEADER.pack(DELTA, self.seq, score), bytes([flags])]
+        if flags & FLAG_FOOD:
+            parts.append(_pack_food(food))
+        parts.append(_LENGTH.pack(len(snake)))
+        parts.append(bytes([moves]))
+        parts.append(_pack_directions(directions))
+        return b"".join(parts)
+
+
+class FrameDecoder:
+    """Stateful decoder for one viewer's frame stream."""
+
+    def __init__(self):
+        self._last: Optional[Frame] = None
+        self._grid_size = 0
+
+    def decode(self, data: bytes) -> Optional[Frame]:
+        """Decode a frame.
+
+        Returns None for a delta that does not follow the previous frame (for
+        instance after frames were dropped); decoding resumes at the next
+        keyframe.
+        """
+        kind, seq, score = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+        if kind == KEYFRAME:
+            mode_code, grid_size = data[offset], data[offset + 1]
+            food, offset = _unpack_food(data, offset + 2)
+            (length,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            snake: list[Point] = []
+            if length:
+                snake.append((data[offset], data[offset + 1]))
+                for direction in _unpack_directions(data, offset + 2, length - 1):
+                    snake.append(_apply(snake[-1], direction, grid_size))
+            self._grid_size = grid_size
+            self._last = Frame(seq, score, _MODES[mode_code], tuple(snake), food, True)
+            return self._last
+
+        last = self._last
+        if last is None or seq != (last.seq + 1) & MAX_U32:
+            self._last = None
+            return None
+        flags = data[offset]
+        offset += 1
+        food = last.food
+        if flags & FLAG_FOOD:
+            food, offset = _unpack_food(data, offset)
+        (length,) = _LENGTH.unpack_from(data, offset)
+        moves = data[offset + _LENGTH.size]
+        offset += _LENGTH.size + 1
+        head = last.snake[0]
+        new_segments = []
+        for direction in _unpack_directions(data, offset, moves):
+            head = _apply(head, direction, self._grid_size)
+            new_segments.append(head)
+        snake = (*reversed(new_segments), *last.snake)[:length]
+        self._last = Frame(seq, score, last.mode, snake, food, False)
+        return self._last
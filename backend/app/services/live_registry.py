@@ -0,0 +1,410 @@
+"""In-memory registry of live game sessions.
+
+Sessions are kept in an OrderedDict ordered by last heartbeat, oldest first, so
+expiring stale sessions only ever looks at the sessions that actually expired.
+Memory is bounded by `max_sessions` and by capping the stored snake length.
+
+Sessions are also kept in per-mode indexes sorted by score and by viewers,
+so a page of the live game list costs O(log n + k) however many games run.
+
+The registry only holds this worker's sessions. Summaries are written through
+to `shared_state` (throttled per session) so other workers can list them.
+Called from an event loop, those writes are queued and flushed together in
+the threadpool, so a slow backend never blocks the loop; elsewhere they are
+written at once.
+"""
+import asyncio
+import base64
+import bisect
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, UTC
+from typing import Callable, Iterable, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.models.game import GameMode, GRID_SIZE, LiveGameSort
+from app.services import shared_state
+from app.services.frame_codec import FrameEncoder
+from app.services.viewer_stats import ViewerStats, WORKER_ID
+
+logger = logging.getLogger(__name__)
+
+# Index key: highest value first, ties broken by game id
+SortKey = Tuple[int, str]
+
+
+def sort_key(value: int, game_id: str) -> SortKey:
+    return (-value, game_id)
+
+
+def encode_cursor(key: SortKey) -> str:
+    """Opaque cursor pointing just after `key`."""
+    return base64.urlsafe_b64encode(f"{-key[0]}:{key[1]}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Inverse of `encode_cursor`; raises ValueError for malformed cursors."""
+    try:
+        value, _, game_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+        return sort_key(int(value), game_id)
+    except (UnicodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+class SortedIndex:
+    """Sort keys kept in order in a plain list.
+
+    Lookups bisect; inserts and removals shift the tail, a memmove that stays
+    in the microseconds for tens of thousands of keys.
+    """
+    __slots__ = ("_keys",)
+
+    def __init__(self):
+        self._keys: List[SortKey] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: SortKey):
+        bisect.insort(self._keys, key)
+
+    def remove(self, key: SortKey):
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def page(self, after: Optional[SortKey], limit: int) -> List[SortKey]:
+        """Up to `limit` keys following `after` (from the start if None)."""
+        start = bisect.bisect_right(self._keys, after) if after is not None else 0
+        return self._keys[start:start + limit]
+
+    def clear(self):
+        self._keys.clear()
+
+
+class LiveSession:
+    """State of one game being played right now."""
+    __slots__ = (
+        "id", "player_id", "score", "mode", "viewer_stats", "started_at", "last_seen", "snake", "food", "encoder",
+        "synced_at", "index_keys",
+    )
+
+    def __init__(self, game_id: str, player_id: int, mode: GameMode, now: float):
+        self.id = game_id
+        self.player_id = player_id
+        self.score = 0
+        self.mode = mode
+        self.viewer_stats = ViewerStats()
+        self.started_at = datetime.now(UTC)
+        self.last_seen = now
+        self.snake: tuple = ()
+        self.food: tuple = ()
+        self.encoder = FrameEncoder(GRID_SIZE)
+        self.synced_at: Optional[float] = None
+        # The keys this session is filed under in the registry's indexes
+        self.index_keys: dict[LiveGameSort, SortKey] = {}
+
+    @property
+    def viewers(self) -> int:
+        return self.viewer_stats.viewers
+
+    def to_dict(self) -> dict:
+        """Convert to the dict shape used by db_service."""
+        return {
+            "id": self.id,
+            "player_id": self.player_id,
+            "score": self.score,
+            "mode": self.mode,
+            "viewers": self.viewers,
+            "unique_viewers": self.viewer_stats.unique_viewers,
+            "started_at": self.started_at,
+        }
+
+    def encode_frame(self, force_keyframe: bool = False) -> Optional[bytes]:
+        """Encode the current state as the next spectator frame.
+
+        Returns None if the snake cannot be encoded (segments not adjacent).
+        """
+        try:
+            return self.encoder.encode(self.score, self.mode, self.snake, self.food, force_keyframe)
+        except ValueError:
+            return None
+
+    def join_frame(self) -> Optional[bytes]:
+        """Keyframe for a spectator joining a stream that is already running."""
+        return self.encoder.snapshot()
+
+
+class LiveGameRegistry:
+    """Registry of live sessions with heartbeat-based TTL eviction."""
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_sessions: int,
+        max_snake_length: int = GRID_SIZE * GRID_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+        sync_seconds: float = 1.0,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_snake_length = max_snake_length
+        self._clock = clock
+        self.sync_seconds = sync_seconds
+        self._sessions: OrderedDict[str, LiveSession] = OrderedDict()
+        self._by_player: dict[int, str] = {}
+        # (sort, mode) -> index; mode None indexes every game
+        self._indexes: dict[tuple[LiveGameSort, Optional[GameMode]], SortedIndex] = {
+            (sort, mode): SortedIndex() for sort in LiveGameSort for mode in (None, *GameMode)
+        }
+        # Shared state writes not made yet: game id -> publish (True) or withdraw
+        self._pending: dict[str, bool] = {}
+        self._flushing = False
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def start(self, player_id: int, mode: GameMode, game_id: Optional[str] = None) -> Optional[LiveSession]:
+        """Start a session for a player, replacing any session they already had.
+
+        Returns None when the registry is full.
+        """
+        now = self._clock()
+        self.evict_expired(now)
+
+        previous = self._by_player.get(player_id)
+        if previous is not None:
+            self.remove(previous)
+        if len(self._sessions) >= self.max_sessions:
+            return None
+
+        session = LiveSession(game_id or uuid.uuid4().hex[:12], player_id, mode, now)
+        self._sessions[session.id] = session
+        self._by_player[player_id] = session.id
+        for sort in LiveGameSort:
+            self._reindex(session, sort)
+        self._sync(session, now, force=True)
+        return session
+
+    def update(
+        self,
+        game_id: str,
+        score: Optional[int] = None,
+        snake: Optional[Iterable] = None,
+        food: Optional[Iterable] = None,
+    ) -> Optional[LiveSession]:
+        """Apply a state update from the player; also counts as a heartbeat."""
+        session = self.heartbeat(game_id)
+        if session is None:
+            return None
+        if score is not None and score != session.score:
+            session.score = score
+            self._reindex(session, LiveGameSort.SCORE)
+        if snake is not None:
+            session.snake = tuple(tuple(p) for p in snake)[:self.max_snake_length]
+        if food is not None:
+            session.food = tuple(tuple(p) for p in food)
+        self._sync(session, session.last_seen)
+        return session
+
+    def viewer_joined(self, game_id: str, viewer: str):
+        """Count a spectator joining; `viewer` identifies them for unique counts."""
+        session = self._sessions.get(game_id)
+        if session is not None:
+            session.viewer_stats.join(viewer)
+            self._reindex(session, LiveGameSort.VIEWERS)
+
+    def viewer_left(self, game_id: str):
+        """Count a spectator leaving."""
+        session = self._sessions.get(game_id)
+        if session is not None:
+            session.viewer_stats.leave()
+            self._reindex(session, LiveGameSort.VIEWERS)
+
+    def _reindex(self, session: LiveSession, sort: LiveGameSort):
+        value = session.score if sort is LiveGameSort.SCORE else session.viewers
+        key = sort_key(value, session.id)
+        old = session.index_keys.get(sort)
+        if old == key:
+            return
+        for mode in (None, session.mode):
+            index = self._indexes[sort, mode]
+            if old is not None:
+                index.remove(old)
+            index.add(key)
+        session.index_keys[sort] = key
+
+    def page(
+        self,
+        mode: Optional[GameMode] = None,
+        sort: LiveGameSort = LiveGameSort.SCORE,
+        limit: int = 50,
+        after: Optional[SortKey] = None,
+    ) -> Tuple[List[LiveSession], Optional[SortKey]]:
+        """Get a page of sessions, highest first, and the key to continue after.
+
+        The returned key is None on the last page.
+        """
+        self.evict_expired()
+        keys = self._indexes[sort, mode].page(after, limit + 1)
+        sessions = [self._sessions[game_id] for _, game_id in keys[:limit]]
+        return sessions, keys[limit - 1] if len(keys) > limit else None
+
+    def _sync(self, session: LiveSession, now: float, force: bool = False):
+        # Heartbeats arrive every tick; other workers only need a summary
+        # that is fresh enough to keep the shared entry from expiring
+        state = shared_state.get_state()
+        if not state.is_shared:
+            return
+        if not force and session.synced_at is not None and now - session.synced_at < self.sync_seconds:
+            return
+        session.synced_at = now
+        self._queue(session.id, True)
+
+    def _queue(self, game_id: str, publish: bool):
+        self._pending[game_id] = publish
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if not self._flushing:
+            self._flushing = True
+            loop.create_task(self._flush_in_threadpool())
+
+    def flush(self):
+        """Make the pending shared state writes now, from this thread."""
+        state = shared_state.get_state()
+        shards, removed = self._take_pending()
+        summaries = self._merge_shards(self._exchange_shards(state, shards))
+        self._publish(state, summaries, removed)
+
+    async def _flush_in_threadpool(self):
+        # The registry is only touched here on the loop; the backend calls,
+        # batched across every session queued meanwhile, go to the threadpool
+        try:
+            await asyncio.sleep(0)
+            while self._pending:
+                state = shared_state.get_state()
+                shards, removed = self._take_pending()
+                remote = await run_in_threadpool(self._exchange_shards, state, shards)
+                await run_in_threadpool(self._publish, state, self._merge_shards(remote), removed)
+        except Exception:
+            logger.exception("Failed to write live games to the shared state")
+        finally:
+            self._flushing = False
+
+    def _take_pending(self) -> tuple[list[tuple[str, Optional[dict]]], list[str]]:
+        shards, removed = [], []
+        now = self._clock()
+        for game_id, publish in self._pending.items():
+            session = self._sessions.get(game_id)
+            if not publish:
+                removed.append(game_id)
+            elif session is not None:
+                # None when our shard is unchanged (or we have no viewers)
+                shards.append((game_id, session.viewer_stats.shard_to_publish(now, self.ttl_seconds / 2)))
+        self._pending.clear()
+        return shards, removed
+
+    def _exchange_shards(
+        self, state: shared_state.SharedState, shards: list[tuple[str, Optional[dict]]],
+    ) -> dict[str, dict]:
+        # Viewer counts are sharded per worker: publish ours, read the rest
+        remote = {}
+        with state.batch():
+            for game_id, shard in shards:
+                group = f"viewers:{game_id}"
+                if shard is not None:
+                    state.put_shard(group, WORKER_ID, shard, self.ttl_seconds)
+                remote[game_id] = state.get_shards(group)
+        return remote
+
+    def _merge_shards(self, remote: dict[str, dict]) -> list[tuple[str, dict]]:
+        summaries = []
+        for game_id, shards in remote.items():
+            session = self._sessions.get(game_id)
+            if session is not None:
+                session.viewer_stats.merge_shards(shards)
+                self._reindex(session, LiveGameSort.VIEWERS)
+                summaries.append((game_id, session.to_dict()))
+        return summaries
+
+    def _publish(self, state: shared_state.SharedState, summaries: list[tuple[str, dict]], removed: list[str]):
+        with state.batch():
+            for game_id in removed:
+                state.remove_live_game(game_id)
+            for game_id, summary in summaries:
+                state.put_live_game(game_id, summary, self.ttl_seconds)
+
+    def heartbeat(self, game_id: str) -> Optional[LiveSession]:
+        """Mark a session as alive. Returns None if it has already expired."""
+        session = self.get(game_id)
+        if session is None:
+            return None
+        session.last_seen = self._clock()
+        self._sessions.move_to_end(game_id)
+        return session
+
+    def get(self, game_id: str) -> Optional[LiveSession]:
+        """Get a session if it exists and has not expired."""
+        session = self._sessions.get(game_id)
+        if session is None:
+            return None
+        if self._clock() - session.last_seen > self.ttl_seconds:
+            self.remove(game_id)
+            return None
+        return session
+
+    def list(self, mode: Optional[GameMode] = None) -> List[LiveSession]:
+        """List live sessions, optionally filtered by mode."""
+        self.evict_expired()
+        if mode is None:
+            return list(self._sessions.values())
+        return [s for s in self._sessions.values() if s.mode == mode]
+
+    def remove(self, game_id: str) -> Optional[LiveSession]:
+        """Remove a session."""
+        session = self._sessions.pop(game_id, None)
+        if session is None:
+            return None
+        if self._by_player.get(session.player_id) == game_id:
+            del self._by_player[session.player_id]
+        for sort, key in session.index_keys.items():
+            self._indexes[sort, None].remove(key)
+            self._indexes[sort, session.mode].remove(key)
+        if shared_state.get_state().is_shared:
+            self._queue(game_id, False)
+        return session
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Drop sessions whose last heartbeat is older than the TTL."""
+        if now is None:
+            now = self._clock()
+        deadline = now - self.ttl_seconds
+        evicted = 0
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_seen >= deadline:
+                break
+            self.remove(oldest.id)
+            evicted += 1
+        return evicted
+
+    def clear(self):
+        """Remove all sessions (useful for testing)."""
+        self._sessions.clear()
+        self._by_player.clear()
+        self._pending.clear()
+        for index in self._indexes.values():
+            index.clear()
+
+
+# Global registry instance
+registry = LiveGameRegistry(
+    ttl_seconds=settings.LIVE_GAME_TTL_SECONDS,
+    max_sessions=settings.LIVE_GAME_MAX_SESSIONS,
+    sync_seconds=settings.SHARED_STATE_SYNC_SECONDS,
+)
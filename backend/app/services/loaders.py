@@ -0,0 +1,49 @@
+"""Request-scoped batch loaders.
+
+Endpoints that attach a user to each row in a list ask a loader instead of
+calling `db_service.get_user_by_id` in a loop. Ids are collected with
+`prime` and fetched together with one `IN (...)` query on the first `get`,
+so the query count does not grow with the page size. Each request gets its
+own loader (see `dependencies.get_user_loader`), so nothing is cached
+across requests.
+"""
+from typing import Iterable, Optional
+from sqlalchemy.orm import Session
+from app.database import models
+from app.services import db_service
+
+
+class UserLoader:
+    """Batches user lookups by id within one request."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._users: dict[int, Optional[models.User]] = {}
+        self._pending: set[int] = set()
+
+    def prime(self, user_ids: Iterable[int]) -> "UserLoader":
+        """Queue ids to be fetched by the next batch."""
+        self._pending.update(i for i in user_ids if i not in self._users)
+        return self
+
+    def get(self, user_id: int) -> Optional[models.User]:
+        """Get a user, fetching every queued id in one query if needed."""
+        if user_id not in self._users:
+            self._pending.add(user_id)
+            self.dispatch()
+        return self._users[user_id]
+
+    def get_many(self, user_ids: Iterable[int]) -> list[Optional[models.User]]:
+        """Get several users in order, with at most one query."""
+        user_ids = list(user_ids)
+        self.prime(user_ids)
+        return [self.get(user_id) for user_id in user_ids]
+
+    def dispatch(self):
+        """Fetch all queued ids now."""
+        if not self._pending:
+            return
+        found = db_service.get_users_by_ids(self.db, self._pending)
+        for user_id in self._pending:
+            self._users[user_id] = found.get(user_id)
+        self._pending.clear()
@@ -0,0 +1,112 @@
+"""Compact replay storage and deterministic re-simulation.
+
+A replay is the food RNG seed, the number of ticks played and the direction
+changes as (tick, direction) pairs. Direction changes are applied before the
+step of their tick, in order. Stored form:
+
+    u32 seed | varint ticks | varint count | count * varint(tick delta << 2 | direction)
+
+so a typical direction change takes one or two bytes.
+"""
+import struct
+from typing import Sequence
+from app.models.game import GameMode
+
+_SEED = struct.Struct("!I")
+
+Input = tuple[int, int]
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_replay(seed: int, ticks: int, inputs: Sequence[Input]) -> bytes:
+    """Pack a replay into its stored form."""
+    out = bytearray(_SEED.pack(seed))
+    _write_varint(out, ticks)
+    _write_varint(out, len(inputs))
+    previous = 0
+    for tick, direction in inputs:
+        _write_varint(out, (tick - previous) << 2 | direction)
+        previous = tick
+    return bytes(out)
+
+
+def decode_replay(data: bytes) -> tuple[int, int, list[Input]]:
+    """Unpack a stored replay into (seed, ticks, inputs)."""
+    (seed,) = _SEED.unpack_from(data)
+    ticks, offset = _read_varint(data, _SEED.size)
+    count, offset = _read_varint(data, offset)
+    inputs = []
+    tick = 0
+    for _ in range(count):
+        value, offset = _read_varint(data, offset)
+        tick += value >> 2
+        inputs.append((tick, value & 3))
+    return seed, ticks, inputs
+
+
+def simulate(mode: GameMode, seed: int, ticks: int, inputs: Sequence[Input]) -> int:
+    """Replay one game and return its final score."""
+    from app.services.snake_engine import Direction, SnakeGame
+
+    game = SnakeGame(mode, seed)
+    pending = iter(inputs)
+    next_input = next(pending, None)
+    for tick in range(ticks):
+        while next_input is not None and next_input[0] == tick:
+            game.change_direction(Direction(next_input[1]))
+            next_input = next(pending, None)
+        if not game.step():
+            break
+    return game.score
+
+
+def verify_replays(jobs: Sequence[tuple[GameMode, bytes, int]]) -> list[bool]:
+    """Check claimed scores for many (mode, replay, score) jobs at once.
+
+    All replays are simulated together on a BatchSnakeEngine. This is the unit
+    of work sent to the verification process pool.
+    """
+    # Imported here so that NumPy is not loaded until a replay is verified
+    import numpy as np
+    from app.services.snake_engine import BatchSnakeEngine
+
+    decoded = [decode_replay(blob) for _, blob, _ in jobs]
+    engine = BatchSnakeEngine([mode for mode, _, _ in jobs], [seed for seed, _, _ in decoded])
+    ticks = np.array([t for _, t, _ in decoded], dtype=np.int64)
+
+    # Bucket direction changes by tick so each tick applies them in one call
+    by_tick: dict[int, tuple[list[int], list[int]]] = {}
+    for game, (_, _, inputs) in enumerate(decoded):
+        for tick, direction in inputs:
+            games, directions = by_tick.setdefault(tick, ([], []))
+            games.append(game)
+            directions.append(direction)
+
+    for tick in range(int(ticks.max(initial=0))):
+        # Games that have played all their ticks stop here
+        engine.alive[ticks == tick] = False
+        if not engine.alive.any():
+            break
+        if tick in by_tick:
+            games, directions = by_tick[tick]
+            engine.change_direction(np.array(games), np.array(directions))
+        engine.step()
+
+    return [int(engine.score[i]) == claimed for i, (_, _, claimed) in enumerate(jobs)]
@@ -0,0 +1,547 @@
+"""Shared state for data that must agree across uvicorn workers.
+
+Token revocations and the live game listing used to be per-process globals,
+so with several workers the answer depended on which worker took the
+request. They now go through a `SharedState` backend chosen by
+`SHARED_STATE_URL`:
+
+- `memory://` keeps everything in this process (single worker, tests)
+- `sqlite:///path/to/file.db` shares a SQLite file between local workers
+  (relative to the working directory, `sqlite:////...` for absolute paths);
+  put it on tmpfs (e.g. `sqlite:////dev/shm/snake-arena.db`) to keep it in
+  shared memory
+- `redis://host:port/db` talks to Redis, or anything speaking its protocol
+
+Every entry has a TTL, so crashed workers cannot leave stale data behind.
+Live games are also kept in order for each `LiveGameSort`, so a page of them
+is an index range scan rather than a sort of every game.
+"""
+import hashlib
+import json
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+from urllib.parse import urlparse
+from sqlalchemy.engine import make_url
+from app.config import settings
+from app.models.game import LiveGameSort
+
+
+def _token_key(token: str) -> str:
+    # Store a digest rather than the bearer token itself
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"cannot serialize {type(value).__name__}")
+
+
+def _dumps(data: dict) -> str:
+    return json.dumps(data, default=_json_default, separators=(",", ":"))
+
+
+# Summary fields live games are ordered by, highest first and then by id
+LIVE_GAME_ORDERS = tuple(sort.value for sort in LiveGameSort)
+
+
+def _mode(data: dict) -> Optional[str]:
+    mode = data.get("mode")
+    return getattr(mode, "value", mode)
+
+
+def _order_key(game_id: str, data: dict, sort: str) -> tuple[int, str]:
+    # Same shape as live_registry.sort_key, which cursors are made of
+    return (-data.get(sort, 0), game_id)
+
+
+class SharedState(ABC):
+    """Interface for state shared between worker processes."""
+
+    # Whether other processes see the same data (False for memory://)
+    is_shared = True
+
+    @abstractmethod
+    def revoke_token(self, token: str, ttl_seconds: float):
+        """Mark a token as revoked until it would have expired anyway."""
+
+    @abstractmethod
+    def is_token_revoked(self, token: str) -> bool:
+        """Check whether a token has been revoked."""
+
+    @abstractmethod
+    def put_live_game(self, game_id: str, data: dict, ttl_seconds: float):
+        """Publish a live game summary, replacing any previous one."""
+
+    @abstractmethod
+    def remove_live_game(self, game_id: str):
+        """Withdraw a live game."""
+
+    @abstractmethod
+    def get_live_game(self, game_id: str) -> Optional[dict]:
+        """Get a live game summary."""
+
+    @abstractmethod
+    def list_live_games(self) -> list[dict]:
+        """Get all live game summaries that have not expired."""
+
+    def page_live_games(
+        self, mode: Optional[str], sort: str, after: Optional[tuple[int, str]], limit: int
+    ) -> list[dict]:
+        """Get up to `limit` live games of `mode` (or every mode) in `sort` order.
+
+        `after` is the (-value, id) key of the game the page starts after.
+        Backends override this to read an index instead of sorting every game.
+        """
+        games = sorted(
+            (_order_key(game["id"], game, sort), game)
+            for game in self.list_live_games()
+            if mode is None or _mode(game) == mode
+        )
+        return [game for key, game in games if after is None or key > after][:limit]
+
+    @abstractmethod
+    def put_shard(self, group: str, shard: str, data: dict, ttl_seconds: float):
+        """Publish one worker's shard of a group (e.g. its viewer counts)."""
+
+    @abstractmethod
+    def get_shards(self, group: str) -> dict[str, dict]:
+        """Get every unexpired shard of a group, keyed by shard name."""
+
+    @abstractmethod
+    def clear(self):
+        """Remove everything (useful for testing)."""
+
+    @contextmanager
+    def batch(self):
+        """Group the writes made inside the block, where the backend can."""
+        yield
+
+
+class InProcessState(SharedState):
+    """Plain dicts; only correct with a single worker."""
+
+    is_shared = False
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._revoked: dict[str, float] = {}
+        self._live_games: dict[str, tuple[dict, float]] = {}
+        self._shards: dict[str, dict[str, tuple[dict, float]]] = {}
+
+    def revoke_token(self, token: str, ttl_seconds: float):
+        self._revoked[_token_key(token)] = self._clock() + ttl_seconds
+
+    def is_token_revoked(self, token: str) -> bool:
+        key = _token_key(token)
+        expires_at = self._revoked.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= self._clock():
+            del self._revoked[key]
+            return False
+        return True
+
+    def put_live_game(self, game_id: str, data: dict, ttl_seconds: float):
+        self._live_games[game_id] = (data, self._clock() + ttl_seconds)
+
+    def remove_live_game(self, game_id: str):
+        self._live_games.pop(game_id, None)
+
+    def get_live_game(self, game_id: str) -> Optional[dict]:
+        entry = self._live_games.get(game_id)
+        if entry is None or entry[1] <= self._clock():
+            return None
+        return entry[0]
+
+    def list_live_games(self) -> list[dict]:
+        now = self._clock()
+        return [data for data, expires_at in self._live_games.values() if expires_at > now]
+
+    def put_shard(self, group: str, shard: str, data: dict, ttl_seconds: float):
+        self._shards.setdefault(group, {})[shard] = (data, self._clock() + ttl_seconds)
+
+    def get_shards(self, group: str) -> dict[str, dict]:
+        now = self._clock()
+        shards = self._shards.get(group, {})
+        return {shard: data for shard, (data, expires_at) in shards.items() if expires_at > now}
+
+    def clear(self):
+        self._revoked.clear()
+        self._live_games.clear()
+        self._shards.clear()
+
+
+class SQLiteState(SharedState):
+    """A SQLite file shared by the worker processes of one machine.
+
+    Live games get a table of their own, with a `<sort>_order` column holding
+    the negated value for each ordering and an index on it (alone and after
+    the mode), so pages are read in index order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared_state ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        orders = "".join(f" {sort}_order INTEGER NOT NULL," for sort in LIVE_GAME_ORDERS)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS live_games ("
+            f" game_id TEXT PRIMARY KEY, mode TEXT,{orders} value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_live_games_expires_at ON live_games (expires_at)")
+        for sort in LIVE_GAME_ORDERS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_live_games_{sort} ON live_games ({sort}_order, game_id)")
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_live_games_mode_{sort} ON live_games (mode, {sort}_order, game_id)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit, WAL so readers never block
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _put(self, namespace: str, key: str, value: str, ttl_seconds: float):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO shared_state VALUES (?, ?, ?, ?)",
+            (namespace, key, value, time.time() + ttl_seconds),
+        )
+
+    def _get(self, namespace: str, key: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT value FROM shared_state WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def revoke_token(self, token: str, ttl_seconds: float):
+        self._put("revoked", _token_key(token), "1", ttl_seconds)
+
+    def is_token_revoked(self, token: str) -> bool:
+        return self._get("revoked", _token_key(token)) is not None
+
+    def put_live_game(self, game_id: str, data: dict, ttl_seconds: float):
+        orders = [_order_key(game_id, data, sort)[0] for sort in LIVE_GAME_ORDERS]
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO live_games VALUES (?, ?, {', '.join('?' for _ in orders)}, ?, ?)",
+            (game_id, _mode(data), *orders, _dumps(data), time.time() + ttl_seconds),
+        )
+
+    def remove_live_game(self, game_id: str):
+        self._connection().execute("DELETE FROM live_games WHERE game_id = ?", (game_id,))
+
+    def get_live_game(self, game_id: str) -> Optional[dict]:
+        row = self._connection().execute(
+            "SELECT value FROM live_games WHERE game_id = ? AND expires_at > ?", (game_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_live_games(self) -> list[dict]:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("DELETE FROM shared_state WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM live_games WHERE expires_at <= ?", (now,))
+        rows = conn.execute("SELECT value FROM live_games").fetchall()
+        return [json.loads(value) for (value,) in rows]
+
+    def page_live_games(
+        self, mode: Optional[str], sort: str, after: Optional[tuple[int, str]], limit: int
+    ) -> list[dict]:
+        if sort not in LIVE_GAME_ORDERS:
+            raise ValueError(f"Unknown live game order: {sort}")
+        conn = self._connection()
+        # Expired games are deleted through their index, so the page below
+        # is a plain range scan of the order index
+        conn.execute("DELETE FROM live_games WHERE expires_at <= ?", (time.time(),))
+        clauses, params = [], []
+        if mode is not None:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if after is not None:
+            clauses.append(f"({sort}_order, game_id) > (?, ?)")
+            params.extend(after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = conn.execute(
+            f"SELECT value FROM live_games{where} ORDER BY {sort}_order, game_id LIMIT ?", (*params, limit)
+        ).fetchall()
+        return [json.loads(value) for (value,) in rows]
+
+    def put_shard(self, group: str, shard: str, data: dict, ttl_seconds: float):
+        self._put(f"shard:{group}", shard, _dumps(data), ttl_seconds)
+
+    def get_shards(self, group: str) -> dict[str, dict]:
+        rows = self._connection().execute(
+            "SELECT key, value FROM shared_state WHERE namespace = ? AND expires_at > ?",
+            (f"shard:{group}", time.time()),
+        ).fetchall()
+        return {shard: json.loads(value) for shard, value in rows}
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM shared_state")
+        conn.execute("DELETE FROM live_games")
+
+    @contextmanager
+    def batch(self):
+        # One transaction, so one commit for the whole batch
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class RespClient:
+    """Minimal blocking client for the Redis serialization protocol (RESP2)."""
+
+    def __init__(self, host: str, port: int, db: int = 0, password: Optional[str] = None, timeout: float = 2.0):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", self.db)
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def execute(self, *args):
+        """Send one command and return its reply, reconnecting once if needed."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._call(*args)
+                except (ConnectionError, OSError):
+                    self.close()
+                    if attempt:
+                        raise
+
+    def _call(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RespError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RespError(f"unexpected reply {line!r}")
+
+
+# Width of the order part of a live game's member in an order index; values
+# are offset so any -10**19 < value <= 10**19 sorts as fixed-width digits
+_ORDER_DIGITS = 20
+_ORDER_OFFSET = 10**19
+
+
+def _order_member(key: tuple[int, str]) -> str:
+    # Byte order of the members is the order of their (-value, id) keys
+    return f"{_ORDER_OFFSET + key[0]:0{_ORDER_DIGITS}d}:{key[1]}"
+
+
+class RedisState(SharedState):
+    """Redis (or any server speaking its protocol).
+
+    Live games and shards are one key each with a TTL, indexed by a sorted set
+    scored by expiry time so listing never returns entries that have gone quiet.
+
+    Each live game is also a member of one sorted set per order, for every
+    mode and for its own mode. Members all score 0 and spell out the game's
+    sort key, so a page is a ZRANGEBYLEX; a hash remembers each game's
+    members so they can be replaced when its values change.
+    """
+
+    def __init__(self, client: RespClient, prefix: str = "snake:"):
+        self.client = client
+        self.prefix = prefix
+        self._live_index = f"{prefix}live"
+        self._live_orders = f"{prefix}live-orders"
+
+    def _put_indexed(self, index: str, member: str, data: dict, ttl_seconds: float):
+        ttl_ms = int(ttl_seconds * 1000)
+        self.client.execute("SET", f"{index}:{member}", _dumps(data), "PX", ttl_ms)
+        self.client.execute("ZADD", index, int(time.time() * 1000) + ttl_ms, member)
+
+    def _list_indexed(self, index: str) -> dict[str, dict]:
+        self.client.execute("ZREMRANGEBYSCORE", index, "-inf", int(time.time() * 1000))
+        members = [m.decode() for m in self.client.execute("ZRANGE", index, 0, -1)]
+        if not members:
+            return {}
+        values = self.client.execute("MGET", *(f"{index}:{m}" for m in members))
+        return {m: json.loads(value) for m, value in zip(members, values) if value is not None}
+
+    def revoke_token(self, token: str, ttl_seconds: float):
+        self.client.execute("SET", f"{self.prefix}revoked:{_token_key(token)}", 1, "PX", int(ttl_seconds * 1000))
+
+    def is_token_revoked(self, token: str) -> bool:
+        return self.client.execute("EXISTS", f"{self.prefix}revoked:{_token_key(token)}") == 1
+
+    def _order_index(self, sort: str, mode: Optional[str]) -> str:
+        return f"{self.prefix}live-by-{sort}:{mode or '*'}"
+
+    def _drop_orders(self, game_ids: list[str]):
+        """Take games out of the order indexes."""
+        for orders in self.client.execute("HMGET", self._live_orders, *game_ids):
+            for index, member in json.loads(orders or "{}").items():
+                self.client.execute("ZREM", index, member)
+        self.client.execute("HDEL", self._live_orders, *game_ids)
+
+    def _expire_live_games(self):
+        now_ms = int(time.time() * 1000)
+        expired = [m.decode() for m in self.client.execute("ZRANGEBYSCORE", self._live_index, "-inf", now_ms)]
+        if expired:
+            self._drop_orders(expired)
+            self.client.execute("ZREMRANGEBYSCORE", self._live_index, "-inf", now_ms)
+
+    def put_live_game(self, game_id: str, data: dict, ttl_seconds: float):
+        self._put_indexed(self._live_index, game_id, data, ttl_seconds)
+        orders = {}
+        for sort in LIVE_GAME_ORDERS:
+            member = _order_member(_order_key(game_id, data, sort))
+            orders[self._order_index(sort, None)] = member
+            if _mode(data) is not None:
+                orders[self._order_index(sort, _mode(data))] = member
+        previous = json.loads(self.client.execute("HGET", self._live_orders, game_id) or "{}")
+        if orders == previous:
+            return
+        for index, member in previous.items():
+            if orders.get(index) != member:
+                self.client.execute("ZREM", index, member)
+        for index, member in orders.items():
+            if previous.get(index) != member:
+                self.client.execute("ZADD", index, 0, member)
+        self.client.execute("HSET", self._live_orders, game_id, _dumps(orders))
+
+    def remove_live_game(self, game_id: str):
+        self.client.execute("DEL", f"{self._live_index}:{game_id}")
+        self.client.execute("ZREM", self._live_index, game_id)
+        self._drop_orders([game_id])
+
+    def get_live_game(self, game_id: str) -> Optional[dict]:
+        value = self.client.execute("GET", f"{self._live_index}:{game_id}")
+        return json.loads(value) if value is not None else None
+
+    def list_live_games(self) -> list[dict]:
+        self._expire_live_games()
+        return list(self._list_indexed(self._live_index).values())
+
+    def page_live_games(
+        self, mode: Optional[str], sort: str, after: Optional[tuple[int, str]], limit: int
+    ) -> list[dict]:
+        if sort not in LIVE_GAME_ORDERS:
+            raise ValueError(f"Unknown live game order: {sort}")
+        self._expire_live_games()
+        index = self._order_index(sort, mode)
+        start = f"({_order_member(after)}" if after is not None else "-"
+        games = []
+        while len(games) < limit:
+            members = self.client.execute("ZRANGEBYLEX", index, start, "+", "LIMIT", 0, limit - len(games))
+            if not members:
+                break
+            game_ids = [m.decode()[_ORDER_DIGITS + 1:] for m in members]
+            values = self.client.execute("MGET", *(f"{self._live_index}:{game_id}" for game_id in game_ids))
+            # A game whose key expired a moment ago is skipped, not returned
+            games.extend(json.loads(value) for value in values if value is not None)
+            start = f"({members[-1].decode()}"
+        return games
+
+    def put_shard(self, group: str, shard: str, data: dict, ttl_seconds: float):
+        self._put_indexed(f"{self.prefix}shard:{group}", shard, data, ttl_seconds)
+
+    def get_shards(self, group: str) -> dict[str, dict]:
+        return self._list_indexed(f"{self.prefix}shard:{group}")
+
+    def clear(self):
+        keys = self.client.execute("KEYS", f"{self.prefix}*")
+        if keys:
+            self.client.execute("DEL", *keys)
+
+
+def create_state(url: str) -> SharedState:
+    """Create a backend from a `memory://`, `sqlite:///` or `redis://` URL."""
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return InProcessState()
+    if parsed.scheme == "sqlite":
+        # Read the path as SQLAlchemy does: sqlite:///./state.db is relative
+        return SQLiteState(make_url(url).database)
+    if parsed.scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisState(RespClient(parsed.hostname or "localhost", parsed.port or 6379, db, parsed.password))
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+
+_state: Optional[SharedState] = None
+
+
+def get_state() -> SharedState:
+    """The configured backend, created on first use."""
+    global _state
+    if _state is None:
+        _state = create_state(settings.SHARED_STATE_URL)
+    return _state
+
+
+def set_state(state: SharedState):
+    """Replace the backend (useful for testing)."""
+    global _state
+    _state = state
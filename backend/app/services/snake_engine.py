@@ -0,0 +1,253 @@
+"""Server-side snake rules, mirroring `frontend/src/game/snakeLogic.ts`.
+
+`SnakeGame` is a straightforward single-game implementation used as the
+reference. `BatchSnakeEngine` steps many independent games at once on NumPy
+arrays: an occupancy grid per game plus a ring buffer of body cells indexed by
+head position and length, so one tick costs a fixed number of array
+operations regardless of how many games are running.
+
+Food placement uses a seeded mulberry32 generator instead of `Math.random`, so
+a game is fully determined by its mode, seed and direction changes.
+"""
+from enum import IntEnum
+from typing import Sequence
+import numpy as np
+from app.models.game import GameMode, GRID_SIZE
+
+INITIAL_SPEED = 150
+SPEED_INCREMENT = 5
+MIN_SPEED = 50
+POINTS_PER_FOOD = 10
+
+
+class Direction(IntEnum):
+    """Movement direction; codes match the live frame format."""
+    UP = 0
+    RIGHT = 1
+    DOWN = 2
+    LEFT = 3
+
+    def opposite(self) -> "Direction":
+        return Direction((self + 2) % 4)
+
+
+# (dx, dy) per direction code; y grows downwards
+_STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+_DX = np.array([dx for dx, _ in _STEPS], dtype=np.int32)
+_DY = np.array([dy for _, dy in _STEPS], dtype=np.int32)
+
+
+class Mulberry32:
+    """Small seeded PRNG, simple to reproduce exactly in TypeScript."""
+    __slots__ = ("state",)
+
+    def __init__(self, seed: int):
+        self.state = seed & 0xFFFFFFFF
+
+    def next_u32(self) -> int:
+        self.state = (self.state + 0x6D2B79F5) & 0xFFFFFFFF
+        a = self.state
+        t = ((a ^ (a >> 15)) * (1 | a)) & 0xFFFFFFFF
+        t = ((t + (((t ^ (t >> 7)) * (61 | t)) & 0xFFFFFFFF)) & 0xFFFFFFFF) ^ t
+        return (t ^ (t >> 14)) & 0xFFFFFFFF
+
+    def randrange(self, n: int) -> int:
+        """Equivalent of `Math.floor(random() * n)`."""
+        return (self.next_u32() * n) >> 32
+
+
+def _mulberry32_batch(state: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """Advance the generators of the games in `index` and return their outputs."""
+    a = state[index] + np.uint32(0x6D2B79F5)
+    state[index] = a
+    t = (a ^ (a >> 15)) * (a | 1)
+    t = (t + (t ^ (t >> 7)) * (t | 61)) ^ t
+    return t ^ (t >> 14)
+
+
+class SnakeGame:
+    """A single game in progress (the TypeScript `startGame` state)."""
+    __slots__ = (
+        "mode", "grid_size", "rng", "snake", "food", "direction", "next_direction", "score", "speed", "alive",
+    )
+
+    def __init__(self, mode: GameMode, seed: int = 0, grid_size: int = GRID_SIZE):
+        self.mode = mode
+        self.grid_size = grid_size
+        self.rng = Mulberry32(seed)
+        center = grid_size // 2
+        self.snake = [(center, center), (center - 1, center), (center - 2, center)]
+        self.direction = Direction.RIGHT
+        self.next_direction = Direction.RIGHT
+        self.score = 0
+        self.speed = INITIAL_SPEED
+        self.alive = True
+        self.food = self._generate_food()
+
+    def _generate_food(self) -> tuple[int, int]:
+        occupied = set(self.snake)
+        while True:
+            food = (self.rng.randrange(self.grid_size), self.rng.randrange(self.grid_size))
+            if food not in occupied:
+                return food
+
+    def change_direction(self, direction: Direction):
+        """Queue a turn; reversing onto the snake's own neck is ignored."""
+        if self.alive and direction != Direction(self.direction).opposite():
+            self.next_direction = Direction(direction)
+
+    def step(self) -> bool:
+        """Advance one tick. Returns whether the game is still running."""
+        if not self.alive:
+            return False
+
+        head_x, head_y = self.snake[0]
+        direction = self.next_direction
+        dx, dy = _STEPS[direction]
+        x = head_x + dx
+        y = head_y + dy
+
+        if self.mode == GameMode.WALLS:
+            if not (0 <= x < self.grid_size and 0 <= y < self.grid_size):
+                self.alive = False
+                return False
+        else:
+            x %= self.grid_size
+            y %= self.grid_size
+
+        new_head = (x, y)
+        will_eat = new_head == self.food
+        body_to_check = self.snake if will_eat else self.snake[:-1]
+        if new_head in body_to_check:
+            self.alive = False
+            return False
+
+        self.snake.insert(0, new_head)
+        self.direction = direction
+        if will_eat:
+            self.score += POINTS_PER_FOOD
+            self.speed = max(MIN_SPEED, self.speed - SPEED_INCREMENT)
+            if len(self.snake) == self.grid_size * self.grid_size:
+                # Board is full; there is nowhere left to put food
+                self.alive = False
+                return False
+            self.food = self._generate_food()
+        else:
+            self.snake.pop()
+        return True
+
+
+class BatchSnakeEngine:
+    """Many independent games stepped together on NumPy arrays."""
+
+    def __init__(self, modes: Sequence[GameMode], seeds: Sequence[int], grid_size: int = GRID_SIZE):
+        if len(modes) != len(seeds):
+            raise ValueError("modes and seeds must have the same length")
+        count = len(modes)
+        cells = grid_size * grid_size
+        self.grid_size = grid_size
+        self.count = count
+        self.walls = np.array([mode == GameMode.WALLS for mode in modes], dtype=bool)
+        self.rng = np.array([seed & 0xFFFFFFFF for seed in seeds], dtype=np.uint32)
+
+        # Body cells (y * grid_size + x) in a ring buffer; the head is at
+        # `head`, the remaining segments follow at increasing positions
+        self.body = np.zeros((count, cells), dtype=np.int16)
+        self.occupied = np.zeros((count, cells), dtype=bool)
+        self.head = np.zeros(count, dtype=np.int32)
+        self.length = np.full(count, 3, dtype=np.int32)
+
+        self.direction = np.full(count, Direction.RIGHT, dtype=np.int8)
+        self.next_direction = self.direction.copy()
+        self.score = np.zeros(count, dtype=np.int32)
+        self.speed = np.full(count, INITIAL_SPEED, dtype=np.int32)
+        self.alive = np.ones(count, dtype=bool)
+        self.food = np.zeros(count, dtype=np.int32)
+
+        center = grid_size // 2
+        rows = np.arange(count)
+        for i in range(3):
+            cell = center * grid_size + center - i
+            self.body[:, i] = cell
+            self.occupied[:, cell] = True
+        self._place_food(rows)
+
+    def _place_food(self, games: np.ndarray):
+        """Pick a free food cell for each game, by rejection sampling."""
+        pending = games
+        size = np.uint64(self.grid_size)
+        while pending.size:
+            x = (_mulberry32_batch(self.rng, pending).astype(np.uint64) * size) >> np.uint64(32)
+            y = (_mulberry32_batch(self.rng, pending).astype(np.uint64) * size) >> np.uint64(32)
+            cells = (y * size + x).astype(np.int32)
+            free = ~self.occupied[pending, cells]
+            self.food[pending[free]] = cells[free]
+            pending = pending[~free]
+
+    def change_direction(self, games: np.ndarray, directions: np.ndarray):
+        """Queue turns for several games; reversals are ignored."""
+        games = np.asarray(games)
+        directions = np.asarray(directions, dtype=np.int8)
+        valid = self.alive[games] & (directions != (self.direction[games] + 2) % 4)
+        self.next_direction[games[valid]] = directions[valid]
+
+    def step(self) -> np.ndarray:
+        """Advance every running game by one tick. Returns the alive mask."""
+        games = np.flatnonzero(self.alive)
+        if games.size == 0:
+            return self.alive
+        size = self.grid_size
+        cells = size * size
+
+        head_cell = self.body[games, self.head[games]].astype(np.int32)
+        direction = self.next_direction[games]
+        x = head_cell % size + _DX[direction]
+        y = head_cell // size + _DY[direction]
+
+        inside = (x >= 0) & (x < size) & (y >= 0) & (y < size)
+        crashed = self.walls[games] & ~inside
+        x %= size
+        y %= size
+        new_cell = y * size + x
+
+        will_eat = new_cell == self.food[games]
+        tail_pos = (self.head[games] + self.length[games] - 1) % cells
+        tail_cell = self.body[games, tail_pos]
+        # Moving into the tail is fine unless the snake grows this tick
+        hits_body = self.occupied[games, new_cell] & ~((new_cell == tail_cell) & ~will_eat)
+        crashed |= hits_body
+        self.alive[games[crashed]] = False
+
+        moving = ~crashed
+        games, new_cell, will_eat = games[moving], new_cell[moving], will_eat[moving]
+        tail_cell = tail_cell[moving]
+
+        # Free the tail before placing the head, which may take its cell
+        shrinking = ~will_eat
+        self.occupied[games[shrinking], tail_cell[shrinking]] = False
+        new_head = (self.head[games] - 1) % cells
+        self.head[games] = new_head
+        self.body[games, new_head] = new_cell
+        self.occupied[games, new_cell] = True
+        self.direction[games] = self.next_direction[games]
+
+        eaters = games[will_eat]
+        if eaters.size:
+            self.length[eaters] += 1
+            self.score[eaters] += POINTS_PER_FOOD
+            self.speed[eaters] = np.maximum(MIN_SPEED, self.speed[eaters] - SPEED_INCREMENT)
+            full = self.length[eaters] == cells
+            self.alive[eaters[full]] = False
+            self._place_food(eaters[~full])
+        return self.alive
+
+    def snake(self, game: int) -> list[tuple[int, int]]:
+        """Body of one game as (x, y) points, head first."""
+        cells = self.grid_size * self.grid_size
+        positions = (self.head[game] + np.arange(self.length[game])) % cells
+        return [(int(c) % self.grid_size, int(c) // self.grid_size) for c in self.body[game, positions]]
+
+    def food_position(self, game: int) -> tuple[int, int]:
+        """Food of one game as an (x, y) point."""
+        cell = int(self.food[game])
+        return cell % self.grid_size, cell // self.grid_size
@@ -0,0 +1,77 @@
+"""Per-user cache of public profiles.
+
+Entries are `User` models keyed by id, evicted least-recently-used beyond
+USER_CACHE_SIZE and expired after USER_CACHE_TTL_SECONDS. `db_service`
+invalidates a user whenever their profile or stats change; the TTL bounds
+how long another worker can serve a profile changed elsewhere.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+from app.config import settings
+from app.models.user import User
+
+
+class UserCache:
+    """LRU cache of public user models with a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[int, tuple[User, float]] = OrderedDict()
+        # Warmup and replay verification fill and invalidate entries from
+        # worker threads, so updates may be concurrent
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int) -> Optional[User]:
+        """Get a cached user, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] <= self._clock():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+    def get_many(self, user_ids: Iterable[int]) -> dict[int, User]:
+        """Get the cached users among `user_ids`, keyed by id."""
+        found = {}
+        for user_id in user_ids:
+            user = self.get(user_id)
+            if user is not None:
+                found[user_id] = user
+        return found
+
+    def put(self, user: User) -> User:
+        """Cache a user."""
+        with self._lock:
+            self._entries[user.id] = (user, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id: int):
+        """Drop a user whose profile or stats changed."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Remove all entries (useful for testing)."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# Global cache instance
+cache = UserCache(max_entries=settings.USER_CACHE_SIZE, ttl_seconds=settings.USER_CACHE_TTL_SECONDS)
@@ -0,0 +1,106 @@
+"""Background verification of submitted replays.
+
+Submitting a score with a replay stores it as pending. After the response is
+sent, `verify_pending_scores` loads pending scores, re-simulates them in a
+process pool (batched with `replay.verify_replays`) and records whether the
+claimed score was reproduced.
+
+Every submission schedules a run, but only one runs at a time per process:
+the others return at once, as the running one keeps going until nothing is
+pending, so a burst of submissions simulates each replay once.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from app.config import settings
+from app.database.database import SessionLocal
+from app.services import db_service, event_streams
+from app.services.replay import verify_replays
+
+logger = logging.getLogger(__name__)
+
+# Replays simulated together in one worker task
+CHUNK_SIZE = 256
+
+# Overridable so tests can point verification at their own database
+session_factory = SessionLocal
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Held by the one run of verify_pending_scores in progress
+_running = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawn rather than fork: the server process runs threads
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.VERIFICATION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def run_verification(jobs: list) -> list[bool]:
+    """Verify (mode, replay, score) jobs, in the process pool when enabled."""
+    chunks = [jobs[i:i + CHUNK_SIZE] for i in range(0, len(jobs), CHUNK_SIZE)]
+    if settings.VERIFICATION_WORKERS > 0:
+        results = _get_executor().map(verify_replays, chunks)
+    else:
+        results = map(verify_replays, chunks)
+    return [ok for chunk in results for ok in chunk]
+
+
+def verify_pending_scores() -> int:
+    """Verify pending scores until none are left. Returns how many were processed.
+
+    Returns 0 at once if another run is in progress; it takes over the scores.
+    """
+    processed = 0
+    while _running.acquire(blocking=False):
+        try:
+            while count := _verify_batch():
+                processed += count
+        finally:
+            _running.release()
+        # A score submitted after the last batch came up empty, whose own run
+        # found the lock still held, would otherwise wait for the next one
+        if not _has_pending():
+            break
+    return processed
+
+
+def _has_pending() -> bool:
+    db = session_factory()
+    try:
+        return bool(db_service.get_pending_scores(db, limit=1))
+    finally:
+        db.close()
+
+
+def _verify_batch() -> int:
+    db = session_factory()
+    try:
+        scores = db_service.get_pending_scores(db, limit=settings.VERIFICATION_BATCH_SIZE)
+        if not scores:
+            return 0
+        jobs = [(score.mode, score.replay, score.score) for score in scores]
+        results = run_verification(jobs)
+        db_service.set_score_verification(db, {s.id: ok for s, ok in zip(scores, results)})
+        rejected = results.count(False)
+        if rejected:
+            logger.warning("Rejected %d of %d replayed scores", rejected, len(scores))
+            event_streams.notify("leaderboard")
+        return len(scores)
+    finally:
+        db.close()
+
+
+def shutdown():
+    """Stop the worker processes."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
@@ -0,0 +1,205 @@
+"""Viewer statistics for live games: sharded counts and unique viewers.
+
+Each worker counts the spectators connected to it in its own shard, so
+joins and leaves only touch worker-local state. The live registry publishes
+the worker's shard to `shared_state` on its throttled sync and merges the
+other workers' shards back in. Unique viewers are estimated with a
+HyperLogLog, which merges the same way and stays a few KB per game however
+many people watch. A shard is only republished when it changed (or before
+it would expire), and a remote sketch only merged when it differs from the
+one merged last time, so syncing idle games costs next to nothing.
+"""
+import base64
+import hashlib
+import math
+import os
+import socket
+from typing import Optional
+
+# This worker's shard name
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ShardedCounter:
+    """A counter split into named shards that are summed on read."""
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards: dict[str, int] = {}
+
+    def add(self, shard: str, delta: int = 1):
+        """Change one shard's count."""
+        self._shards[shard] = self._shards.get(shard, 0) + delta
+
+    def get(self, shard: str) -> int:
+        """Get one shard's count."""
+        return self._shards.get(shard, 0)
+
+    def set(self, shard: str, value: int):
+        """Replace one shard's count (when merging another worker's shard)."""
+        self._shards[shard] = value
+
+    def retain(self, shards):
+        """Drop shards that are not in `shards` (their workers have gone)."""
+        for shard in self._shards.keys() - set(shards):
+            del self._shards[shard]
+
+    @property
+    def value(self) -> int:
+        return max(sum(self._shards.values()), 0)
+
+
+class HyperLogLog:
+    """Approximate distinct counting in 2**precision bytes.
+
+    The standard error is about 1.04 / sqrt(2**precision), i.e. 1.6% at the
+    default precision of 12. The sum the estimate is computed from is kept up
+    to date as registers change, so counting does not read every register.
+    """
+    __slots__ = ("precision", "registers", "_inverse_sum", "_zeros")
+
+    def __init__(self, precision: int = 12, registers: bytes = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        m = 1 << precision
+        if registers is None:
+            self.registers = bytearray(m)
+            self._inverse_sum = float(m)
+            self._zeros = m
+            return
+        self.registers = bytearray(registers)
+        if len(self.registers) != m:
+            raise ValueError("register count does not match precision")
+        self._recount()
+
+    def _recount(self):
+        # Imported here so that NumPy is not loaded until sketches are merged
+        import numpy as np
+        registers = np.frombuffer(self.registers, dtype=np.uint8)
+        self._inverse_sum = float(np.ldexp(1.0, -registers.astype(np.int32)).sum())
+        self._zeros = self.registers.count(0)
+
+    def add(self, item: str):
+        """Count an item."""
+        x = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "big")
+        bits = 64 - self.precision
+        index = x >> bits
+        rank = bits - (x & ((1 << bits) - 1)).bit_length() + 1
+        previous = self.registers[index]
+        if rank > previous:
+            self.registers[index] = rank
+            self._inverse_sum += 2.0 ** -rank - 2.0 ** -previous
+            self._zeros -= previous == 0
+
+    def merge(self, other: "HyperLogLog"):
+        """Fold another sketch into this one (union of the counted items)."""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches of different precision")
+        self.merge_registers(other.registers)
+
+    def merge_registers(self, registers: bytes) -> bool:
+        """Fold in another sketch's raw registers; return whether any grew."""
+        if len(registers) != len(self.registers):
+            raise ValueError("cannot merge sketches of different precision")
+        import numpy as np
+        ours = np.frombuffer(self.registers, dtype=np.uint8)
+        merged = np.maximum(ours, np.frombuffer(registers, dtype=np.uint8))
+        if np.array_equal(merged, ours):
+            return False
+        self.registers = bytearray(merged.tobytes())
+        self._recount()
+        return True
+
+    def is_empty(self) -> bool:
+        """Whether nothing has been added."""
+        return self._zeros == len(self.registers)
+
+    def count(self) -> int:
+        """Estimated number of distinct items added."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / self._inverse_sum
+        zeros = self._zeros
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_str(self) -> str:
+        """Serialize for storage in shared state."""
+        return base64.b64encode(self.registers).decode()
+
+    @classmethod
+    def from_str(cls, data: str, precision: int = 12) -> "HyperLogLog":
+        """Deserialize a sketch written by `to_str`."""
+        return cls(precision, base64.b64decode(data))
+
+
+class ViewerStats:
+    """Current and unique viewers of one live game."""
+    __slots__ = ("current", "unique", "_all_unique", "_changed", "_published_at", "_merged")
+
+    def __init__(self):
+        self.current = ShardedCounter()
+        # Spectators of this worker, as published in its shard
+        self.unique = HyperLogLog()
+        # Union with the other workers' sketches, merged on sync; reading its
+        # count is constant time, so listings never merge sketches
+        self._all_unique = HyperLogLog()
+        # Whether our shard changed since it was last published, and when
+        self._changed = False
+        self._published_at: Optional[float] = None
+        # The sketch last merged from each other worker, as published
+        self._merged: dict[str, str] = {}
+
+    def join(self, viewer: str):
+        """Count a spectator connecting to this worker."""
+        self.current.add(WORKER_ID)
+        self.unique.add(viewer)
+        self._all_unique.add(viewer)
+        self._changed = True
+
+    def leave(self):
+        """Count a spectator disconnecting from this worker."""
+        self.current.add(WORKER_ID, -1)
+        self._changed = True
+
+    @property
+    def viewers(self) -> int:
+        return self.current.value
+
+    @property
+    def unique_viewers(self) -> int:
+        return self._all_unique.count()
+
+    def local_shard(self) -> dict:
+        """This worker's shard, as published to shared state."""
+        return {"viewers": self.current.get(WORKER_ID), "unique": self.unique.to_str()}
+
+    def shard_to_publish(self, now: float, refresh_seconds: float) -> Optional[dict]:
+        """This worker's shard if it needs publishing at `now`, else None.
+
+        That is when it changed, or was last published `refresh_seconds` ago
+        (so it does not expire), and never if nobody watched on this worker.
+        """
+        if self.unique.is_empty() and not self.current.get(WORKER_ID):
+            return None
+        if not self._changed and self._published_at is not None and now - self._published_at < refresh_seconds:
+            return None
+        self._changed = False
+        self._published_at = now
+        return self.local_shard()
+
+    def merge_shards(self, shards: dict[str, dict]):
+        """Take in the shards published by other workers."""
+        remote = {shard: data for shard, data in shards.items() if shard != WORKER_ID}
+        self.current.retain([WORKER_ID, *remote])
+        for shard in self._merged.keys() - remote.keys():
+            del self._merged[shard]
+        for shard, data in remote.items():
+            self.current.set(shard, data["viewers"])
+            # Sketches only grow, so an unchanged one adds nothing
+            if self._merged.get(shard) != data["unique"]:
+                self._all_unique.merge_registers(base64.b64decode(data["unique"]))
+                self._merged[shard] = data["unique"]
@@ -0,0 +1,120 @@
+"""Worker warmup run after startup.
+
+A fresh worker pays for opening database connections, SQLAlchemy compiling
+each query the first time it runs, lazy imports and empty caches. `run`
+does that work up front: it opens pooled connections, runs every read query
+in `db_service` once and loads the players at the top of each leaderboard
+into the user cache. `GET /ready` reports not ready until it has finished.
+
+Warmup is best effort: a failing step is logged and reported, and the worker
+still becomes ready once all steps have been tried.
+"""
+import logging
+import time
+from typing import Callable, Optional
+from app.config import settings
+from app.database.database import SessionLocal
+from app.models import trusted
+from app.models.game import GameMode
+from app.services import db_service, user_cache
+
+logger = logging.getLogger(__name__)
+
+# Overridable so tests can point warmup at their own database
+session_factory = SessionLocal
+
+_report: Optional[dict] = None
+
+
+def _open_connections(db):
+    # Check out several connections at once so the pool holds them afterwards
+    pool = db.get_bind().pool
+    size = pool.size() if hasattr(pool, "size") else 1
+    connections = [db.get_bind().connect() for _ in range(max(1, min(size, settings.WARMUP_CONNECTIONS)))]
+    for conn in connections:
+        conn.exec_driver_sql("SELECT 1")
+        conn.close()
+
+
+def _compile_queries(db):
+    # One run of each read query fills SQLAlchemy's compiled statement cache
+    db_service.get_user_by_id(db, 0)
+    db_service.get_users_by_ids(db, [0])
+    db_service.get_user_by_email(db, "")
+    db_service.get_user_by_username(db, "")
+    db_service.search_users(db, "a", limit=1)
+    db_service.get_score_history(db, 0, mode=GameMode.WALLS, limit=1)
+    db_service.get_score_history(db, 0, limit=1)
+    db_service.get_pending_scores(db, limit=1)
+
+
+def _prime_caches(db):
+    # Players at the top of each leaderboard are the profiles asked for most
+    for mode in (None, *GameMode):
+        for score in db_service.get_leaderboard(db, mode=mode, limit=settings.WARMUP_TOP_USERS):
+            if score.user is not None:
+                user_cache.cache.put(trusted.user_from_row(score.user))
+
+
+def _import_lazy_dependencies():
+    # Kept out of app import for fast cold starts, but needed by the first
+    # login/signup (bcrypt, jose) and replay check (numpy)
+    import bcrypt  # noqa: F401
+    from jose import jwt  # noqa: F401
+    import numpy  # noqa: F401
+
+
+STEPS: list[tuple[str, Callable]] = [
+    ("connections", _open_connections),
+    ("queries", _compile_queries),
+    ("caches", _prime_caches),
+    ("imports", lambda db: _import_lazy_dependencies()),
+]
+
+
+def run() -> dict:
+    """Run every warmup step and record the report `GET /ready` returns."""
+    global _report
+    started = time.perf_counter()
+    steps, errors = {}, {}
+    db = session_factory()
+    try:
+        for name, step in STEPS:
+            step_started = time.perf_counter()
+            try:
+                step(db)
+            except Exception as exc:
+                logger.exception("Warmup step %s failed", name)
+                errors[name] = str(exc)
+                db.rollback()
+            steps[name] = round((time.perf_counter() - step_started) * 1000, 2)
+    finally:
+        db.close()
+    _report = {
+        "warmup_ms": round((time.perf_counter() - started) * 1000, 2),
+        "steps": steps,
+        "errors": errors,
+    }
+    logger.info("Warmup finished in %.1f ms (%s)", _report["warmup_ms"], steps)
+    return _report
+
+
+def skip():
+    """Mark the worker ready without warming up."""
+    global _report
+    _report = {"warmup_ms": 0.0, "steps": {}, "errors": {}}
+
+
+def is_ready() -> bool:
+    return _report is not None
+
+
+def get_report() -> Optional[dict]:
+    """The last warmup report, or None while warmup is still running."""
+    return _report
+
+
+def reset():
+    """Forget the last warmup (useful for testing)."""
+    global _report
+    _report = None
@@ -0,0 +1,41 @@
+"""Startup phase timing for cold-start diagnostics."""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Reference point for all phases: the moment the app starts importing.
+_started_at = time.perf_counter()
+_phases: dict[str, float] = {}
+_ready_ms: Optional[float] = None
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Record how long the enclosed block takes as a named startup phase."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases[name] = (time.perf_counter() - start) * 1000
+
+
+def mark_ready():
+    """Record the time from import to the app being ready to serve."""
+    global _ready_ms
+    _ready_ms = (time.perf_counter() - _started_at) * 1000
+    logger.info(
+        "Startup finished in %.1f ms (%s)",
+        _ready_ms,
+        ", ".join(f"{name}={ms:.1f}ms" for name, ms in _phases.items()),
+    )
+
+
+def get_timings() -> dict:
+    """Get the per-phase startup breakdown in milliseconds."""
+    return {
+        "phases": {name: round(ms, 2) for name, ms in _phases.items()},
+        "ready_ms": round(_ready_ms, 2) if _ready_ms is not None else None,
+    }
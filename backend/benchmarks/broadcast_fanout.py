@@ -0,0 +1,65 @@
+"""Measure spectator fan-out throughput of the broadcast hub.
+
+For 1, 100 and 1000 viewers of one game, publishes frames as fast as the hub
+accepts them while every viewer drains its queue, and reports frames per
+second delivered in total. The "per-viewer" column serializes the frame once
+per viewer instead, which is what the hub avoids.
+
+    uv run python -m benchmarks.broadcast_fanout --frames 2000
+"""
+import argparse
+import asyncio
+import time
+from app.models.game import GameMode, GRID_SIZE
+from app.services.broadcast import BroadcastHub, END_OF_STREAM
+from app.services.live_registry import LiveSession
+
+
+def _session() -> LiveSession:
+    return LiveSession("bench", player_id=1, mode=GameMode.PASS_THROUGH, now=0.0)
+
+
+async def _viewer(subscriber, counter: list):
+    while (payload := await subscriber.next()) is not END_OF_STREAM:
+        counter[0] += 1
+
+
+async def run(viewers: int, frames: int, serialize_once: bool) -> float:
+    """Return delivered frames per second."""
+    hub = BroadcastHub(max_pending=64)
+    session = _session()
+    delivered = [0]
+    tasks = [asyncio.create_task(_viewer(hub.subscribe("bench"), delivered)) for _ in range(viewers)]
+
+    started = time.perf_counter()
+    for tick in range(frames):
+        session.score = tick
+        session.snake = tuple(((tick + 15 - i) % GRID_SIZE, 10) for i in range(15))
+        if serialize_once:
+            hub.publish("bench", session.encode_frame())
+        else:
+            for subscriber in list(hub._channels["bench"]):
+                subscriber.offer(session.encode_frame())
+        # Let viewers drain, as the event loop would between player messages
+        await asyncio.sleep(0)
+    hub.close("bench")
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return delivered[0] / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'viewers':>8} {'serialize-once':>16} {'per-viewer':>16}   (frames/sec delivered)")
+    for viewers in (1, 100, 1000):
+        frames = max(args.frames // max(viewers // 10, 1), 50)
+        once = asyncio.run(run(viewers, frames, serialize_once=True))
+        each = asyncio.run(run(viewers, frames, serialize_once=False))
+        print(f"{viewers:>8} {once:>16,.0f} {each:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
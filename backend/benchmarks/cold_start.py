@@ -0,0 +1,88 @@
+"""Measure time-to-first-response for a freshly started server.
+
+Starts uvicorn in a subprocess, polls `/health` until it answers and reports
+how long that took, together with the server's own per-phase breakdown from
+`/health/startup`.
+
+    uv run python -m benchmarks.cold_start --runs 5
+    uv run python -m benchmarks.cold_start --schema-init skip
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str, timeout: float = 1.0) -> bytes | None:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.read()
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None
+
+
+def measure_once(schema_init: str, timeout: float) -> dict:
+    """Start one server process and time it until the first response."""
+    port = _free_port()
+    env = {**os.environ, "SCHEMA_INIT": schema_init}
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        while _get(f"{base}/health") is None:
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"server did not answer within {timeout}s")
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {proc.returncode}")
+            time.sleep(0.005)
+        first_response_ms = (time.perf_counter() - started) * 1000
+        phases = json.loads(_get(f"{base}/health/startup") or b"{}")
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {"first_response_ms": first_response_ms, **phases}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--schema-init", default="create", choices=["create", "skip"])
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    results = [measure_once(args.schema_init, args.timeout) for _ in range(args.runs)]
+    times = [r["first_response_ms"] for r in results]
+
+    print(f"time to first response over {args.runs} runs (SCHEMA_INIT={args.schema_init})")
+    print(f"  min    {min(times):8.1f} ms")
+    print(f"  median {statistics.median(times):8.1f} ms")
+    print(f"  max    {max(times):8.1f} ms")
+    print("server-side phases (last run):")
+    for name, ms in results[-1].get("phases", {}).items():
+        print(f"  {name:<18} {ms:8.1f} ms")
+    print(f"  {'ready':<18} {results[-1].get('ready_ms') or 0:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
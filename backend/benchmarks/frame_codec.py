@@ -0,0 +1,82 @@
+"""Compare the binary live frame format with JSON snapshots.
+
+Plays a random pass-through game and encodes every tick both ways, reporting
+average bytes per frame and encode/decode throughput.
+
+    uv run python -m benchmarks.frame_codec --ticks 20000
+"""
+import argparse
+import json
+import random
+import time
+from app.models.game import GameMode, GRID_SIZE
+from app.services.frame_codec import FrameDecoder, FrameEncoder
+
+
+def play(ticks: int, seed: int) -> list[tuple]:
+    """Generate (score, snake, food) states of a wandering, growing snake."""
+    rng = random.Random(seed)
+    snake = [(10, 10), (9, 10), (8, 10)]
+    food = [(rng.randrange(GRID_SIZE), rng.randrange(GRID_SIZE))]
+    score = 0
+    direction = (1, 0)
+    states = []
+    for _ in range(ticks):
+        if rng.random() < 0.2:
+            direction = rng.choice([d for d in ((0, -1), (1, 0), (0, 1), (-1, 0)) if d != (-direction[0], -direction[1])])
+        head = ((snake[0][0] + direction[0]) % GRID_SIZE, (snake[0][1] + direction[1]) % GRID_SIZE)
+        snake.insert(0, head)
+        if rng.random() < 0.05 and len(snake) < 120:
+            score += 10
+            food = [(rng.randrange(GRID_SIZE), rng.randrange(GRID_SIZE))]
+        else:
+            snake.pop()
+        states.append((score, tuple(snake), tuple(food)))
+    return states
+
+
+def _json_frame(score, snake, food) -> bytes:
+    return json.dumps(
+        {"type": "frame", "score": score, "mode": "pass-through", "snake": snake, "food": food},
+        separators=(",", ":"),
+    ).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    states = play(args.ticks, args.seed)
+
+    encoder = FrameEncoder()
+    started = time.perf_counter()
+    binary = [encoder.encode(score, GameMode.PASS_THROUGH, snake, food) for score, snake, food in states]
+    binary_encode = time.perf_counter() - started
+
+    decoder = FrameDecoder()
+    started = time.perf_counter()
+    for frame in binary:
+        decoder.decode(frame)
+    binary_decode = time.perf_counter() - started
+
+    started = time.perf_counter()
+    as_json = [_json_frame(*state) for state in states]
+    json_encode = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for frame in as_json:
+        json.loads(frame)
+    json_decode = time.perf_counter() - started
+
+    binary_size = sum(map(len, binary)) / len(binary)
+    json_size = sum(map(len, as_json)) / len(as_json)
+    print(f"{args.ticks} frames, final snake length {len(states[-1][1])}")
+    print(f"{'format':<8} {'bytes/frame':>12} {'encode/s':>12} {'decode/s':>12}")
+    print(f"{'binary':<8} {binary_size:>12.1f} {args.ticks / binary_encode:>12,.0f} {args.ticks / binary_decode:>12,.0f}")
+    print(f"{'json':<8} {json_size:>12.1f} {args.ticks / json_encode:>12,.0f} {args.ticks / json_decode:>12,.0f}")
+    print(f"binary is {json_size / binary_size:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
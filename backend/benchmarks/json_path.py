@@ -0,0 +1,87 @@
+"""Measure per-request CPU of serializing the leaderboard.
+
+Builds `/leaderboard?limit=100` worth of entries from an in-memory database
+and times, in CPU time per request, the ways of turning them into a body:
+
+- `jsonable_encoder`: the classic path, a dict tree plus json.dumps
+- `response_model`: FastAPI's default, revalidating then dumping to JSON
+- `FastJSONResponse`: app.responses, dumping the trusted models directly
+
+For scale it also times building the entries from loaded rows, and whole
+requests through the app with the fast path in place.
+
+    uv run python -m benchmarks.json_path --limit 100
+"""
+import argparse
+import json
+import time
+from datetime import datetime, UTC, timedelta
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import models
+from app.database.database import get_db
+from app.models.game import GameMode, LeaderboardEntry
+from app.responses import FastJSONResponse
+from app.routers.leaderboard import _to_entries
+from app.services import db_service
+
+
+def cpu_us(fn, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+    for i in range(args.limit):
+        user = models.User(username=f"Player{i}", email=f"player{i}@example.com", hashed_password="x", avatar="")
+        db.add(user)
+        db.flush()
+        db.add(models.Score(user_id=user.id, score=i * 7, mode=GameMode.WALLS, duration=60, date=start + timedelta(minutes=i)))
+    db.commit()
+
+    scores = db_service.get_leaderboard(db, limit=args.limit)
+    entries = _to_entries(scores)
+    adapter = TypeAdapter(list[LeaderboardEntry])
+
+    stages = {
+        "jsonable_encoder": lambda: json.dumps(jsonable_encoder(entries)).encode(),
+        "response_model": lambda: adapter.dump_json(adapter.validate_python(entries), by_alias=True),
+        "FastJSONResponse": lambda: FastJSONResponse(entries).body,
+    }
+    print(f"serializing {len(entries)} entries (CPU µs per request)")
+    for name, fn in stages.items():
+        print(f"  {name:>18} {cpu_us(fn, args.repeat):>10,.1f}")
+    # For scale: turning the loaded rows into response models
+    print(f"  {'building entries':>18} {cpu_us(lambda: _to_entries(scores), args.repeat):>10,.1f}")
+
+    from app.main import app
+
+    def override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as client:
+        url = f"/api/leaderboard?limit={args.limit}"
+        client.get(url)
+        full = cpu_us(lambda: client.get(url), max(args.repeat // 5, 1))
+    print(f"  {'whole request':>18} {full:>10,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Measure live game listing latency with many concurrent games.
+
+Fills a registry with N games, then times fetching one page from the sorted
+indexes against the previous approach of filtering and sorting every game,
+plus the cost of a score update keeping the indexes current.
+
+    uv run python -m benchmarks.live_listing --games 50000 --limit 50
+"""
+import argparse
+import random
+import time
+from app.models.game import GameMode, LiveGameSort
+from app.services.live_registry import LiveGameRegistry
+
+
+def per_call_us(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'games':>8} {'indexed page':>14} {'sort all':>14} {'score update':>14}   (µs per call)")
+    for games in args.games:
+        rng = random.Random(games)
+        registry = LiveGameRegistry(ttl_seconds=3600, max_sessions=games)
+        for player in range(games):
+            session = registry.start(player, rng.choice(list(GameMode)))
+            registry.update(session.id, score=rng.randrange(10000))
+
+        indexed = per_call_us(lambda: registry.page(GameMode.WALLS, LiveGameSort.SCORE, args.limit), args.repeat)
+        linear = per_call_us(
+            lambda: sorted(registry.list(GameMode.WALLS), key=lambda s: -s.score)[:args.limit],
+            max(args.repeat // 20, 1),
+        )
+        ids = [s.id for s in registry.list()]
+        update = per_call_us(lambda: registry.update(rng.choice(ids), score=rng.randrange(10000)), args.repeat)
+        print(f"{games:>8} {indexed:>14,.1f} {linear:>14,.1f} {update:>14,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""Load-test the API with a weighted mix of production-like traffic.
+
+Virtual users loop for a fixed duration, each picking a scenario by weight:
+
+- `leaderboard`: poll the global or a per-mode leaderboard
+- `live_games`: list live games, sometimes filtered by mode
+- `submit_score`: submit a score as a signed-in player
+- `login`: log an existing player in (a bcrypt verify)
+- `signup`: sign a new player up and log them in (a bcrypt hash and verify)
+
+By default the app runs in this process behind httpx's ASGI transport, on a
+fresh SQLite database in a temporary directory, with one live game per seeded
+player. DATABASE_URL is ignored, so a run never writes to a real database by
+accident; pass `--database-url` to point the app at another (disposable)
+database on purpose. Client and server then share one event loop, so numbers are best
+compared with each other rather than read as server capacity. Pass `--url`
+to load a running server instead (for example uvicorn with several workers);
+live games are then whatever players are connected.
+
+Throughput and p50/p95/p99 latency are reported per request type. `--output`
+writes them to a JSON file, and `--compare` prints the change between two.
+
+    uv run python -m benchmarks.load_test --duration 30 --concurrency 20
+    uv run python -m benchmarks.load_test --mix leaderboard=3,login=1 --output after.json
+    uv run python -m benchmarks.load_test --url http://127.0.0.1:8000 --output after.json
+    uv run python -m benchmarks.load_test --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, UTC
+from pathlib import Path
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+API = "/api"
+MODES = ["walls", "pass-through"]
+PASSWORD = "load-test-password"
+
+DEFAULT_MIX = {
+    "leaderboard": 40,
+    "live_games": 25,
+    "submit_score": 20,
+    "login": 10,
+    "signup": 5,
+}
+
+
+class Recorder:
+    """Latency and status of every request, grouped by request name."""
+
+    def __init__(self):
+        self.enabled = False
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.started = self.stopped = 0.0
+
+    def start(self):
+        self.enabled = True
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.enabled = False
+        self.stopped = time.perf_counter()
+
+    def record(self, name: str, seconds: float, ok: bool):
+        if not self.enabled:
+            return
+        self.samples.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self) -> dict:
+        """Per-request and overall throughput and latency percentiles."""
+        elapsed = self.stopped - self.started
+        results = {name: _stats(samples, self.errors.get(name, 0), elapsed) for name, samples in sorted(self.samples.items())}
+        every = [value for samples in self.samples.values() for value in samples]
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "overall": _stats(every, sum(self.errors.values()), elapsed),
+            "requests": results,
+        }
+
+
+def _percentile(ordered: list[float], percent: float) -> float:
+    # Nearest-rank percentile of sorted values
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def _stats(samples: list[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(_percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+class LoadTest:
+    """Shared state of one run: the client, seeded players and results."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder):
+        self.client = client
+        self.recorder = recorder
+        # Keeps usernames and emails unique across runs against one server
+        self.tag = secrets.token_hex(3)
+        self.players: list[dict] = []
+        self.signups = 0
+
+    async def request(self, name: str, method: str, url: str, expect: int = 200, **kwargs) -> httpx.Response | None:
+        """Send one request and record its latency under `name`."""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(name, time.perf_counter() - started, ok=False)
+            return None
+        self.recorder.record(name, time.perf_counter() - started, ok=response.status_code == expect)
+        return response if response.status_code == expect else None
+
+    async def sign_up(self, name: str = "signup") -> dict | None:
+        self.signups += 1
+        username = f"lt{self.tag}_{self.signups}"
+        response = await self.request(
+            name, "POST", f"{API}/auth/signup", expect=201,
+            json={"username": username, "email": f"{username}@example.com", "password": PASSWORD, "avatar": ""},
+        )
+        if response is None:
+            return None
+        body = response.json()
+        return {"id": body["user"]["id"], "email": body["user"]["email"], "token": body["token"]}
+
+    async def seed(self, players: int):
+        """Sign players up and give each a first score."""
+        for _ in range(players):
+            player = await self.sign_up()
+            if player is None:
+                raise RuntimeError("could not sign up load test players; is the server up?")
+            self.players.append(player)
+        rng = random.Random(0)
+        for player in self.players:
+            await submit_score(self, rng, player)
+
+
+async def leaderboard(test: LoadTest, rng: random.Random):
+    params = {"limit": rng.choice([10, 50, 100])}
+    if rng.random() < 0.5:
+        params["mode"] = rng.choice(MODES)
+    await test.request("leaderboard", "GET", f"{API}/leaderboard", params=params)
+
+
+async def live_games(test: LoadTest, rng: random.Random):
+    params = {"limit": 50}
+    if rng.random() < 0.3:
+        params["mode"] = rng.choice(MODES)
+    await test.request("live_games", "GET", f"{API}/games/live", params=params)
+
+
+async def submit_score(test: LoadTest, rng: random.Random, player: dict | None = None):
+    player = player or rng.choice(test.players)
+    await test.request(
+        "submit_score", "POST", f"{API}/games/score",
+        json={"score": int(rng.paretovariate(1.5) * 10), "mode": rng.choice(MODES), "duration": rng.randint(10, 600)},
+        headers={"Authorization": f"Bearer {player['token']}"},
+    )
+
+
+async def login(test: LoadTest, rng: random.Random):
+    player = rng.choice(test.players)
+    await test.request("login", "POST", f"{API}/auth/login", json={"email": player["email"], "password": PASSWORD})
+
+
+async def signup(test: LoadTest, rng: random.Random):
+    player = await test.sign_up()
+    if player is not None:
+        await test.request("login", "POST", f"{API}/auth/login", json={"email": player["email"], "password": PASSWORD})
+
+
+SCENARIOS = {
+    "leaderboard": leaderboard,
+    "live_games": live_games,
+    "submit_score": submit_score,
+    "login": login,
+    "signup": signup,
+}
+
+
+async def _virtual_user(test: LoadTest, mix: dict[str, int], seed: int, deadline: float):
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = list(mix.values())
+    while time.perf_counter() < deadline:
+        await SCENARIOS[rng.choices(names, weights)[0]](test, rng)
+
+
+@asynccontextmanager
+async def _in_process_client(database_url: str | None = None):
+    # Point the app at a throwaway database, and keep its live games and
+    # revocations in process, before it is imported
+    if "app.database.database" in sys.modules:
+        raise RuntimeError("the app was imported before its database could be chosen")
+    with tempfile.TemporaryDirectory(prefix="snake-arena-load-") as directory:
+        os.environ["DATABASE_URL"] = database_url or f"sqlite:///{directory}/load_test.db"
+        os.environ["SHARED_STATE_URL"] = "memory://"
+        from app.main import app
+        # Slow request warnings would drown the report under load
+        logging.getLogger("app").setLevel(logging.ERROR)
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+                yield client
+
+
+def _start_live_games(test: LoadTest):
+    # Players normally start games over a WebSocket; in process we can
+    # register them directly so the listing has something to page through
+    from app.models.game import GameMode
+    from app.services.live_registry import registry
+    rng = random.Random(1)
+    for player in test.players:
+        session = registry.start(player["id"], GameMode(rng.choice(MODES)))
+        if session is not None:
+            registry.update(session.id, score=rng.randrange(1000))
+
+
+async def run(args, mix: dict[str, int]) -> dict:
+    recorder = Recorder()
+    if args.url:
+        client_context = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        client_context = _in_process_client(args.database_url)
+    async with client_context as client:
+        test = LoadTest(client, recorder)
+        await test.seed(args.players)
+        if not args.url:
+            _start_live_games(test)
+
+        # Warm up first so connection setup and lazy work do not skew results
+        if args.warmup > 0:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(_virtual_user(test, mix, -i, deadline) for i in range(args.concurrency)))
+        recorder.start()
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*(_virtual_user(test, mix, args.seed + i, deadline) for i in range(args.concurrency)))
+        recorder.stop()
+    return recorder.summary()
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def _parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f"expected scenario=weight with scenarios {', '.join(SCENARIOS)}")
+        mix[name] = int(weight)
+    return {name: weight for name, weight in mix.items() if weight}
+
+
+def print_summary(results: dict):
+    print(f"{'request':<14} {'count':>8} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = [*results["requests"].items(), ("overall", results["overall"])]
+    for name, stats in rows:
+        print(
+            f"{name:<14} {stats['count']:>8} {stats['errors']:>7} {stats['rps']:>9.1f} "
+            f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+        )
+
+
+def print_comparison(before: dict, after: dict):
+    print(f"comparing {before['meta'].get('commit')} -> {after['meta'].get('commit')}")
+    print(f"{'request':<14} {'req/s':>18} {'p50 ms':>20} {'p95 ms':>20} {'p99 ms':>20}")
+
+    def change(key: str, old: dict, new: dict) -> str:
+        delta = f"{(new[key] - old[key]) / old[key]:+.0%}" if old[key] else "n/a"
+        return f"{new[key]:>10.1f} ({delta:>5})"
+
+    names = [name for name in after["requests"] if name in before["requests"]] + ["overall"]
+    for name in names:
+        old = before["overall"] if name == "overall" else before["requests"][name]
+        new = after["overall"] if name == "overall" else after["requests"][name]
+        columns = [change(key, old, new) for key in ("rps", "p50_ms", "p95_ms", "p99_ms")]
+        print(f"{name:<14} {columns[0]:>18} {columns[1]:>20} {columns[2]:>20} {columns[3]:>20}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running server; default runs the app in process")
+    parser.add_argument(
+        "--database-url", help="database of the in-process app, which it fills with test players; default a fresh SQLite file",
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to measure")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured load first")
+    parser.add_argument("--concurrency", type=int, default=10, help="virtual users")
+    parser.add_argument("--players", type=int, default=20, help="players signed up before the run")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX, help="scenario weights, e.g. leaderboard=3,login=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout against --url")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two results files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        before, after = (json.loads(Path(path).read_text()) for path in args.compare)
+        print_comparison(before, after)
+        return
+    if not args.mix:
+        parser.error("--mix needs at least one scenario with a positive weight")
+    if args.url and args.database_url:
+        parser.error("--database-url only applies to the in-process app, not --url")
+
+    results = asyncio.run(run(args, args.mix))
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "date": datetime.now(UTC).isoformat(timespec="seconds"),
+            "target": args.url or "in-process",
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "players": args.players,
+            "mix": args.mix,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        **results,
+    }
+    print(f"{results['meta']['target']}: {args.concurrency} virtual users for {args.duration:g}s")
+    print_summary(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Microbenchmarks for hot service functions, checked against baselines.
+
+Times `db_service.get_leaderboard`, `add_score` and `get_user_by_email`
+over scratch SQLite databases holding each requested number of scores, and
+`auth_service.create_access_token`, `decode_access_token` and the
+`get_current_user` dependency chain (blacklist check, token decode, user
+lookup). Each case runs several rounds of back-to-back calls timed in CPU
+time; the fastest round is the one compared, as it is the least disturbed by
+the rest of the machine.
+
+Baselines live in benchmarks/baselines/micro.json. `--check` flags every
+case more than `--threshold` slower than its baseline and exits non-zero;
+`--save` records the current numbers as the new baselines. Fastest rounds
+still move by up to about 40% between runs on a shared machine, so the
+default threshold is 50%, a case whose rounds were spread wider when its
+baseline was recorded (median over fastest) gets that much more room, and
+flagged cases are timed again (`--retries`) keeping their fastest result,
+so only slowdowns that persist fail the check.
+Baselines only mean something on the machine that recorded them, so
+re-record them when the machine changes.
+
+    uv run python -m benchmarks.micro
+    uv run python -m benchmarks.micro --check --threshold 0.5
+    uv run python -m benchmarks.micro --sizes 1000 10000 --save
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, UTC, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from app.database import models
+from app.dependencies import get_current_user
+from app.models.game import GameMode, VerificationStatus
+from app.services import auth_service, db_service
+
+BASELINES = Path(__file__).resolve().parent / "baselines" / "micro.json"
+
+
+def time_case(fn: Callable, rounds: int, min_time: float) -> dict:
+    """Per-call time in µs: the fastest and median of `rounds` rounds."""
+    # As timeit does, keep collections from landing in random rounds
+    gc.collect()
+    gc.disable()
+    try:
+        return _time_rounds(fn, rounds, min_time)
+    finally:
+        gc.enable()
+
+
+def _time_rounds(fn: Callable, rounds: int, min_time: float) -> dict:
+    # Calibrate so one round lasts at least `min_time`
+    number = 1
+    while True:
+        started = time.process_time()
+        for _ in range(number):
+            fn()
+        elapsed = time.process_time() - started
+        if elapsed >= min_time or number >= 100_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    per_call = [elapsed / number]
+    for _ in range(rounds - 1):
+        started = time.process_time()
+        for _ in range(number):
+            fn()
+        per_call.append((time.process_time() - started) / number)
+    return {
+        "min_us": round(min(per_call) * 1e6, 2),
+        "median_us": round(statistics.median(per_call) * 1e6, 2),
+        "calls": number,
+    }
+
+
+def fill(engine, scores: int, rng: random.Random) -> int:
+    """Bulk insert `scores` scores spread over one user per 20 scores."""
+    users = max(100, scores // 20)
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+    with engine.begin() as conn:
+        batch = []
+        for i in range(users):
+            email = f"player{i}@example.com"
+            batch.append({
+                "username": f"Player{i}", "username_key": f"player{i}",
+                "email": email, "email_key": email,
+                "hashed_password": "x", "avatar": "", "high_score": 0, "games_played": 0, "version": 0,
+            })
+            if len(batch) == 10_000:
+                conn.execute(insert(models.User), batch)
+                batch.clear()
+        if batch:
+            conn.execute(insert(models.User), batch)
+        batch = []
+        for i in range(scores):
+            batch.append({
+                "user_id": rng.randint(1, users), "score": rng.randrange(10_000),
+                "mode": rng.choice(list(GameMode)), "duration": rng.randint(10, 600),
+                "date": start + timedelta(seconds=i), "verification": VerificationStatus.UNVERIFIED,
+            })
+            if len(batch) == 10_000:
+                conn.execute(insert(models.Score), batch)
+                batch.clear()
+        if batch:
+            conn.execute(insert(models.Score), batch)
+    return users
+
+
+def database_cases(db: Session, users: int, rng: random.Random) -> dict[str, Callable]:
+    """Cases whose cost depends on how many rows there are."""
+    token = auth_service.create_access_token({"sub": str(rng.randint(1, users))})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    # Each call starts with an empty identity map, as a request's session does
+    def get_leaderboard():
+        db.expunge_all()
+        db_service.get_leaderboard(db, limit=50)
+
+    def get_leaderboard_mode():
+        db.expunge_all()
+        db_service.get_leaderboard(db, mode=GameMode.WALLS, limit=50)
+
+    def add_score():
+        db.expunge_all()
+        db_service.add_score(db, rng.randint(1, users), rng.randrange(10_000), GameMode.WALLS, 60)
+
+    def get_user_by_email():
+        db.expunge_all()
+        db_service.get_user_by_email(db, f"Player{rng.randrange(users)}@Example.com")
+
+    def current_user():
+        db.expunge_all()
+        get_current_user(credentials, db)
+
+    return {
+        "get_leaderboard": get_leaderboard,
+        "get_leaderboard[mode]": get_leaderboard_mode,
+        "add_score": add_score,
+        "get_user_by_email": get_user_by_email,
+        "get_current_user": current_user,
+    }
+
+
+def token_cases() -> dict[str, Callable]:
+    """Cases that do not touch the database."""
+    token = auth_service.create_access_token({"sub": "1"})
+    return {
+        "create_access_token": lambda: auth_service.create_access_token({"sub": "1"}),
+        "decode_access_token": lambda: auth_service.decode_access_token(token),
+    }
+
+
+def run(sizes: list[int], rounds: int, min_time: float, only: Optional[set[str]] = None) -> dict[str, dict]:
+    """Time every case, or just the `only` ones, at each database size."""
+    results = {}
+    for name, fn in token_cases().items():
+        if only is not None and name not in only:
+            continue
+        results[name] = time_case(fn, rounds, min_time)
+        print(f"  {name:<38} {results[name]['min_us']:>12,.1f} µs", file=sys.stderr)
+    for size in sizes:
+        if only is not None and not any(key.endswith(f"@{size}") for key in only):
+            continue
+        rng = random.Random(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'micro.db')}")
+            models.Base.metadata.create_all(bind=engine)
+            users = fill(engine, size, rng)
+            with Session(engine) as db:
+                for name, fn in database_cases(db, users, rng).items():
+                    key = f"{name}@{size}"
+                    if only is not None and key not in only:
+                        continue
+                    results[key] = time_case(fn, rounds, min_time)
+                    print(f"  {key:<38} {results[key]['min_us']:>12,.1f} µs", file=sys.stderr)
+            engine.dispose()
+    return results
+
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).resolve().parent, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.now(UTC).isoformat(timespec="seconds"),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} cpus",
+        "python": platform.python_version(),
+    }
+
+
+def check(results: dict[str, dict], baseline: dict, threshold: float) -> list[str]:
+    """Print each case against its baseline; return the slowed-down ones."""
+    if baseline["meta"].get("machine") != _meta()["machine"]:
+        print(f"warning: baselines were recorded on {baseline['meta'].get('machine')}", file=sys.stderr)
+    slower = []
+    print(f"{'case':<38} {'baseline µs':>12} {'now µs':>12} {'change':>8}")
+    for key, result in results.items():
+        expected = baseline["results"].get(key)
+        if expected is None:
+            print(f"{key:<38} {'-':>12} {result['min_us']:>12,.1f} {'new':>8}")
+            continue
+        change = result["min_us"] / expected["min_us"] - 1
+        noise = expected["median_us"] / expected["min_us"] - 1
+        flag = "  SLOWER" if change > threshold + noise else ""
+        print(f"{key:<38} {expected['min_us']:>12,.1f} {result['min_us']:>12,.1f} {change:>+8.0%}{flag}")
+        if flag:
+            slower.append(key)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000], help="scores in the database")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per round")
+    parser.add_argument("--baselines", type=Path, default=BASELINES)
+    parser.add_argument("--check", action="store_true", help="compare with the baselines and fail on slowdowns")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown, as a fraction, plus each baseline's spread")
+    parser.add_argument("--retries", type=int, default=2, help="times to re-time cases flagged as slower")
+    parser.add_argument("--save", action="store_true", help="record the results as the new baselines")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.rounds, args.min_time)
+
+    if args.check:
+        baseline = json.loads(args.baselines.read_text())
+        slower = check(results, baseline, args.threshold)
+        for _ in range(args.retries):
+            if not slower:
+                break
+            print(f"timing {len(slower)} slower case(s) again", file=sys.stderr)
+            for key, result in run(args.sizes, args.rounds, args.min_time, only=set(slower)).items():
+                if result["min_us"] < results[key]["min_us"]:
+                    results[key] = result
+            slower = check({key: results[key] for key in slower}, baseline, args.threshold)
+        if slower:
+            print(f"{len(slower)} case(s) more than {args.threshold:.0%} slower than baseline", file=sys.stderr)
+            sys.exit(1)
+    else:
+        print(f"{'case':<38} {'min µs':>12} {'median µs':>12}")
+        for key, result in results.items():
+            print(f"{key:<38} {result['min_us']:>12,.1f} {result['median_us']:>12,.1f}")
+
+    if args.save:
+        # Keep baselines for sizes that were not run this time
+        previous = json.loads(args.baselines.read_text())["results"] if args.baselines.exists() else {}
+        args.baselines.parent.mkdir(parents=True, exist_ok=True)
+        args.baselines.write_text(json.dumps({"meta": _meta(), "results": {**previous, **results}}, indent=2) + "\n")
+        print(f"baselines written to {args.baselines}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Measure replay verification throughput in replays per second per core.
+
+Records N games played by a food-seeking bot with random detours, then
+verifies them by simulating one at a time, in one batch on a single core and
+through the verification process pool.
+
+    uv run python -m benchmarks.replay_verification --replays 2000 --workers 4
+"""
+import argparse
+import random
+import time
+from app.config import settings
+from app.models.game import GameMode
+from app.services import verification_service
+from app.services.replay import decode_replay, encode_replay, simulate, verify_replays
+from app.services.snake_engine import Direction, SnakeGame
+
+
+def record(seed: int, max_ticks: int) -> tuple[GameMode, bytes, int]:
+    rng = random.Random(seed)
+    mode = GameMode.WALLS if seed % 2 else GameMode.PASS_THROUGH
+    game = SnakeGame(mode, seed)
+    inputs = []
+    tick = 0
+    while tick < max_ticks and game.alive:
+        (hx, hy), (fx, fy) = game.snake[0], game.food
+        if rng.random() < 0.1:
+            wanted = Direction(rng.randrange(4))
+        elif fx != hx:
+            wanted = Direction.RIGHT if fx > hx else Direction.LEFT
+        else:
+            wanted = Direction.DOWN if fy > hy else Direction.UP
+        if wanted != game.direction and wanted != game.direction.opposite():
+            game.change_direction(wanted)
+            inputs.append((tick, int(wanted)))
+        game.step()
+        tick += 1
+    return mode, encode_replay(seed, tick, inputs), game.score
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replays", type=int, default=2000)
+    parser.add_argument("--max-ticks", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    jobs = [record(seed, args.max_ticks) for seed in range(args.replays)]
+    avg_ticks = sum(decode_replay(blob)[1] for _, blob, _ in jobs) / len(jobs)
+    avg_bytes = sum(len(blob) for _, blob, _ in jobs) / len(jobs)
+    print(f"{len(jobs)} replays, {avg_ticks:.0f} ticks and {avg_bytes:.0f} stored bytes on average")
+
+    started = time.perf_counter()
+    for mode, blob, score in jobs:
+        assert simulate(mode, *decode_replay(blob)) == score
+    single = len(jobs) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    assert all(verify_replays(jobs))
+    batch = len(jobs) / (time.perf_counter() - started)
+
+    settings.VERIFICATION_WORKERS = args.workers
+    verification_service.run_verification(jobs[:1])  # start the workers
+    started = time.perf_counter()
+    assert all(verification_service.run_verification(jobs))
+    pool = len(jobs) / (time.perf_counter() - started) / args.workers
+    verification_service.shutdown()
+
+    print(f"{'one at a time':<22} {single:>10,.0f} replays/sec/core")
+    print(f"{'batched, 1 core':<22} {batch:>10,.0f} replays/sec/core")
+    print(f"{f'pool, {args.workers} workers':<22} {pool:>10,.0f} replays/sec/core")
+
+
+if __name__ == "__main__":
+    main()
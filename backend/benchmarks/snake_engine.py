@@ -0,0 +1,57 @@
+"""Measure snake simulation throughput in game-steps per second.
+
+Runs N independent pass-through games with random turns, stepping them with
+the batch engine and with one `SnakeGame` per game for comparison.
+
+    uv run python -m benchmarks.snake_engine --games 10000 --ticks 200
+"""
+import argparse
+import time
+import numpy as np
+from app.models.game import GameMode
+from app.services.snake_engine import BatchSnakeEngine, Direction, SnakeGame
+
+
+def run_batch(games: int, ticks: int, seed: int) -> float:
+    rng = np.random.default_rng(seed)
+    engine = BatchSnakeEngine([GameMode.PASS_THROUGH] * games, list(range(games)))
+    steps = 0
+    started = time.perf_counter()
+    for _ in range(ticks):
+        turning = np.flatnonzero(rng.random(games) < 0.2)
+        engine.change_direction(turning, rng.integers(0, 4, turning.size))
+        steps += int(engine.alive.sum())
+        engine.step()
+    return steps / (time.perf_counter() - started)
+
+
+def run_single(games: int, ticks: int, seed: int) -> float:
+    rng = np.random.default_rng(seed)
+    states = [SnakeGame(GameMode.PASS_THROUGH, i) for i in range(games)]
+    steps = 0
+    started = time.perf_counter()
+    for _ in range(ticks):
+        turning = np.flatnonzero(rng.random(games) < 0.2)
+        for i, direction in zip(turning.tolist(), rng.integers(0, 4, turning.size).tolist()):
+            states[i].change_direction(Direction(direction))
+        for game in states:
+            steps += game.step()
+    return steps / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'games':>8} {'batch':>14} {'single':>14}   (game-steps/sec)")
+    for games in args.games:
+        batch = run_batch(games, args.ticks, args.seed)
+        single = run_single(games, args.ticks, args.seed)
+        print(f"{games:>8} {batch:>14,.0f} {single:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
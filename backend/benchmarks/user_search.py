@@ -0,0 +1,79 @@
+"""Measure username prefix search over a large users table.
+
+Fills a scratch SQLite database with N users, then times `search_users` (a
+range scan of the normalized username index) against a case-insensitive
+LIKE on the raw column, which has to scan the whole table.
+
+    uv run python -m benchmarks.user_search --users 1000000
+"""
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import Session
+from app.database import models
+from app.services import db_service
+
+
+def fill(engine, users: int, rng: random.Random):
+    """Bulk insert `users` users with random mixed-case names."""
+    batch = []
+    with engine.begin() as conn:
+        for i in range(users):
+            name = "".join(rng.choices(string.ascii_letters, k=rng.randint(3, 12))) + str(i)
+            batch.append({
+                "username": name, "username_key": models.normalize_key(name),
+                "email": f"user{i}@example.com", "email_key": f"user{i}@example.com",
+                "hashed_password": "x", "avatar": "",
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(models.User), batch)
+                batch.clear()
+        if batch:
+            conn.execute(insert(models.User), batch)
+
+
+def per_call_us(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(args.users)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'users.db')}")
+        models.Base.metadata.create_all(bind=engine)
+        started = time.perf_counter()
+        fill(engine, args.users, rng)
+        print(f"inserted {args.users:,} users in {time.perf_counter() - started:.1f} s")
+
+        prefixes = ["".join(rng.choices(string.ascii_letters, k=k)) for k in (1, 2, 3) for _ in range(20)]
+        with Session(engine) as db:
+            def indexed():
+                db_service.search_users(db, rng.choice(prefixes), limit=args.limit)
+
+            def scan():
+                prefix = rng.choice(prefixes).lower()
+                (db.query(models.User)
+                    .filter(func.lower(models.User.username).like(f"{prefix}%"))
+                    .order_by(func.lower(models.User.username))
+                    .limit(args.limit).all())
+
+            print(f"{'index range scan':>18} {per_call_us(indexed, args.repeat):>12,.1f} µs per search")
+            print(f"{'LIKE table scan':>18} {per_call_us(scan, max(args.repeat // 50, 1)):>12,.1f} µs per search")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
 """Test fixtures and configuration."""
+from contextlib import contextmanager
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from app.main import app
+from app import profiling
 from app.database.database import Base, get_db
 from app.database import models
-from app.services import db_service
+from app.services import avatar_service, db_service, event_streams, live_registry, shared_state, user_cache, verification_service, warmup_service
 from app.models.user import UserCreate
 
 # Setup in-memory SQLite database for testing
@@ -20,6 +22,9 @@ engine = create_engine(
 )
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+verification_service.session_factory = TestingSessionLocal
+event_streams.session_factory = TestingSessionLocal
+warmup_service.session_factory = TestingSessionLocal
 
 
 @pytest.fixture(scope="function")
@@ -28,9 +33,13 @@ def db_session():
     # Create tables
     Base.metadata.create_all(bind=engine)
     
-    # Clear global state in db_service
-    db_service._blacklisted_tokens.clear()
-    db_service._live_games.clear()
+    # Clear global state
+    shared_state.get_state().clear()
+    live_registry.registry.clear()
+    event_streams.clear()
+    user_cache.cache.clear()
+    avatar_service.cache.clear()
+    profiling.reset()
     
     db = TestingSessionLocal()
     try:
@@ -110,3 +119,54 @@ def existing_user_token(client, db_session):
     
     token = response.json()["token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def assert_max_queries():
+    """Fail if the enclosed block runs more than `limit` SQL statements.
+
+    Usage:
+        with assert_max_queries(2):
+            client.get("/api/leaderboard")
+    """
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        assert len(statements) <= limit, (
+            f"expected at most {limit} queries, got {len(statements)}:\n"
+            + "\n".join(statements)
+        )
+
+    return _assert_max_queries
+
+
+@pytest.fixture
+def baseline_engine(tmp_path, monkeypatch):
+    """A SQLite file with the original schema and one score, migrated by init_db.
+
+    Returns the engine; init_db is pointed at it.
+    """
+    import sqlite3
+    from app.database import init_db
+    
+    path = tmp_path / "baseline.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR UNIQUE, email VARCHAR UNIQUE, "
+                     "hashed_password VARCHAR, avatar VARCHAR, high_score INTEGER, games_played INTEGER, created_at DATETIME)")
+        conn.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users (id), score INTEGER, "
+                     "mode VARCHAR(12), duration INTEGER, date DATETIME)")
+        conn.execute("INSERT INTO users VALUES (1, 'SnakeMaster', 'snake@test.com', 'x', '', 2450, 1, '2025-01-01 00:00:00')")
+        conn.execute("INSERT INTO scores VALUES (1, 1, 2450, 'WALLS', 300, '2025-01-02 00:00:00')")
+    baseline = create_engine(f"sqlite:///{path}")
+    monkeypatch.setattr(init_db, "engine", baseline)
+    yield baseline
+    baseline.dispose()
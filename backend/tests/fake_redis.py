@@ -0,0 +1,166 @@
+"""Local stand-in for a Redis server, speaking just enough RESP for RedisState."""
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class _Store:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values: dict[bytes, bytes] = {}
+        self.zsets: dict[bytes, dict[bytes, float]] = {}
+        self.hashes: dict[bytes, dict[bytes, bytes]] = {}
+        self.expiry: dict[bytes, float] = {}
+
+    def _alive(self, key: bytes) -> bool:
+        expires_at = self.expiry.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.values.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.values or key in self.zsets or key in self.hashes
+
+    def execute(self, name: str, args: list[bytes]):
+        with self.lock:
+            return getattr(self, f"cmd_{name.lower()}")(*args)
+
+    def cmd_ping(self):
+        return "PONG"
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_set(self, key, value, *options):
+        self.values[key] = value
+        self.expiry.pop(key, None)
+        if options and options[0].upper() == b"PX":
+            self.expiry[key] = time.time() + int(options[1]) / 1000
+        return "OK"
+
+    def cmd_get(self, key):
+        return self.values.get(key) if self._alive(key) else None
+
+    def cmd_mget(self, *keys):
+        return [self.cmd_get(key) for key in keys]
+
+    def cmd_exists(self, *keys):
+        return sum(self._alive(key) for key in keys)
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += self._alive(key)
+            self.values.pop(key, None)
+            self.zsets.pop(key, None)
+            self.hashes.pop(key, None)
+            self.expiry.pop(key, None)
+        return removed
+
+    def cmd_keys(self, pattern):
+        return [key for key in list(self.values) + list(self.zsets) + list(self.hashes)
+                if self._alive(key) and fnmatch.fnmatchcase(key.decode(), pattern.decode())]
+
+    def cmd_zadd(self, key, score, member):
+        zset = self.zsets.setdefault(key, {})
+        added = member not in zset
+        zset[member] = float(score)
+        return int(added)
+
+    def cmd_zrem(self, key, member):
+        return int(self.zsets.get(key, {}).pop(member, None) is not None)
+
+    def cmd_zrange(self, key, start, stop):
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+        stop = int(stop)
+        return [member for member, _ in members[int(start):None if stop == -1 else stop + 1]]
+
+    def cmd_zrangebyscore(self, key, low, high):
+        low, high = float(low), float(high)
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+        return [member for member, score in members if low <= score <= high]
+
+    def cmd_zrangebylex(self, key, low, high, limit=None, offset=0, count=-1):
+        # Only what RedisState sends: an exclusive "(" or open "-" start, "+" end
+        members = sorted(self.zsets.get(key, {}))
+        if low != b"-":
+            members = [member for member in members if member > low[1:]]
+        count = int(count)
+        return members[int(offset):None if count < 0 else int(offset) + count]
+
+    def cmd_hset(self, key, field, value):
+        fields = self.hashes.setdefault(key, {})
+        added = field not in fields
+        fields[field] = value
+        return int(added)
+
+    def cmd_hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def cmd_hmget(self, key, *fields):
+        return [self.cmd_hget(key, field) for field in fields]
+
+    def cmd_hdel(self, key, *fields):
+        values = self.hashes.get(key, {})
+        removed = sum(values.pop(field, None) is not None for field in fields)
+        if not values:
+            self.hashes.pop(key, None)
+        return removed
+
+    def cmd_zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        low, high = float(low), float(high)
+        doomed = [member for member, score in zset.items() if low <= score <= high]
+        for member in doomed:
+            del zset[member]
+        return len(doomed)
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode()
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while line := self.rfile.readline():
+            count = int(line[1:-2])
+            args = []
+            for _ in range(count):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            try:
+                reply = _encode(self.server.store.execute(args[0].decode(), args[1:]))
+            except Exception as exc:
+                reply = f"-ERR {exc}\r\n".encode()
+            self.wfile.write(reply)
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded RESP server on an ephemeral localhost port."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.store = _Store()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"redis://{host}:{port}/0"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -58,6 +58,21 @@ def test_signup_duplicate_username(client, test_user):
     assert "Username already taken" in data["detail"]
 
 
+def test_signup_username_and_email_ignore_case(client, test_user):
+    """Test names and emails differing only in case count as taken."""
+    response = client.post("/api/auth/signup", json={
+        "username": "testuser",
+        "email": "other@example.com",
+        "password": "password123",
+        "avatar": "https://api.dicebear.com/7.x/lorelei/svg?seed=Case"
+    })
+    assert response.status_code == 400
+    assert "Username already taken" in response.json()["detail"]
+    
+    response = client.post("/api/auth/login", json={"email": "TEST@Example.com", "password": test_user["password"]})
+    assert response.status_code == 200
+
+
 def test_login_success(client, test_user):
     """Test successful login."""
     # User is already created by fixture
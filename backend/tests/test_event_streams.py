@@ -0,0 +1,206 @@
+"""Tests for the Server-Sent Event streams."""
+import asyncio
+import json
+import pytest
+from app.config import settings
+from app.main import app
+from app.models.game import GameMode
+from app.services import event_streams, live_registry
+
+
+class StreamClient:
+    """Reads an SSE response straight from the ASGI app.
+
+    The test client buffers whole responses, which never ends for a stream.
+    """
+
+    def __init__(self, path: str, last_event_id: str = None):
+        path, _, query = path.partition("?")
+        headers = [(b"host", b"test"), (b"accept", b"text/event-stream")]
+        if last_event_id:
+            headers.append((b"last-event-id", last_event_id.encode()))
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+            "root_path": "", "headers": headers, "client": ("test", 1), "server": ("test", 80),
+        }
+        self.headers = {}
+        self._buffer = ""
+
+    async def __aenter__(self):
+        self._disconnected = asyncio.Event()
+        self._chunks = asyncio.Queue()
+        self._task = asyncio.create_task(app(self.scope, self._receive, self._send))
+        return self
+
+    async def __aexit__(self, *exc):
+        self._disconnected.set()
+        await asyncio.wait_for(self._task, 5)
+
+    async def _receive(self):
+        await self._disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] == "http.response.start":
+            self.headers = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            await self._chunks.put(message.get("body", b"").decode())
+
+    async def next_block(self) -> str:
+        while "\n\n" not in self._buffer:
+            self._buffer += await asyncio.wait_for(self._chunks.get(), 5)
+        block, self._buffer = self._buffer.split("\n\n", 1)
+        return block
+
+    async def next_event(self) -> dict:
+        """Next message with an event type, skipping retry hints and heartbeats."""
+        while True:
+            fields = dict(
+                line.split(": ", 1) for line in (await self.next_block()).split("\n")
+                if not line.startswith(":")
+            )
+            if "event" in fields:
+                fields["data"] = json.loads(fields["data"])
+                return fields
+
+
+@pytest.fixture
+def fast_streams(monkeypatch, db_session):
+    monkeypatch.setattr(settings, "STREAM_MIN_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "STREAM_POLL_SECONDS", 5)
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_stream_pushes_new_scores(client, auth_headers, fast_streams):
+    """Test a submitted score reaches stream subscribers as a diff."""
+    async with StreamClient("/api/leaderboard/stream?mode=walls") as stream:
+        snapshot = await stream.next_event()
+        assert stream.headers["content-type"].startswith("text/event-stream")
+        assert snapshot["event"] == "snapshot"
+        assert snapshot["data"] == []
+
+        response = client.post("/api/games/score", json={"score": 120, "mode": "walls", "duration": 30}, headers=auth_headers)
+        assert response.status_code == 200
+
+        diff = await stream.next_event()
+        assert diff["event"] == "diff"
+        assert diff["data"]["upsert"][0]["rank"] == 1
+        assert diff["data"]["upsert"][0]["score"] == 120
+        assert diff["data"]["remove"] == []
+
+
+@pytest.mark.asyncio
+async def test_live_games_stream(db_session, test_user, fast_streams):
+    """Test live games starting and ending are streamed as diffs."""
+    from app.services import db_service
+
+    user = db_service.get_user_by_email(db_session, test_user["email"])
+    async with StreamClient("/api/games/live/stream") as stream:
+        assert (await stream.next_event())["data"] == []
+
+        session = live_registry.registry.start(user.id, GameMode.WALLS)
+        event_streams.notify("live")
+        diff = await stream.next_event()
+        assert [game["id"] for game in diff["data"]["upsert"]] == [session.id]
+        assert diff["data"]["upsert"][0]["player"]["username"] == "TestUser"
+
+        live_registry.registry.remove(session.id)
+        event_streams.notify("live")
+        assert (await stream.next_event())["data"] == {"upsert": [], "remove": [session.id]}
+
+
+@pytest.mark.asyncio
+async def test_live_games_stream_reloads_changed_games(db_session, test_user, fast_streams, monkeypatch):
+    """Test a keyed notification reloads that game only, reading the registry on the loop."""
+    import threading
+    from app.services import db_service
+    
+    user = db_service.get_user_by_email(db_session, test_user["email"])
+    registry = live_registry.registry
+    first = registry.start(user.id, GameMode.WALLS)
+    second = registry.start(user.id + 1, GameMode.WALLS)
+    readers = []
+    for name in ("get", "list"):
+        method = getattr(registry, name)
+        monkeypatch.setattr(
+            registry, name,
+            lambda *args, _name=name, _method=method: readers.append((threading.get_ident(), _name, args)) or _method(*args),
+        )
+    
+    async with StreamClient("/api/games/live/stream") as stream:
+        assert [game["id"] for game in (await stream.next_event())["data"]] == [first.id]
+        
+        assert [name for _, name, _ in readers] == ["list"]
+        
+        registry.update(first.id, score=40)
+        registry.update(second.id, score=70)
+        readers.clear()
+        event_streams.notify("live", [first.id])
+        diff = (await stream.next_event())["data"]
+        assert [(game["id"], game["score"]) for game in diff["upsert"]] == [(first.id, 40)]
+        assert diff["remove"] == []
+        # Only the notified game was read, on the event loop
+        assert readers == [(threading.get_ident(), "get", (first.id,))]
+        
+        registry.remove(first.id)
+        event_streams.notify("live", [first.id])
+        assert (await stream.next_event())["data"] == {"upsert": [], "remove": [first.id]}
+
+
+@pytest.mark.asyncio
+async def test_stream_resumes_from_last_event_id(client, auth_headers, fast_streams):
+    """Test a reconnecting client gets the events it missed, not a snapshot."""
+    async with StreamClient("/api/leaderboard/stream") as stream:
+        last_id = (await stream.next_event())["id"]
+
+    # Changes made while the client was away
+    client.post("/api/games/score", json={"score": 10, "mode": "walls", "duration": 5}, headers=auth_headers)
+
+    async with StreamClient("/api/leaderboard/stream", last_event_id=last_id) as stream:
+        missed = await stream.next_event()
+        assert missed["event"] == "diff"
+        assert missed["data"]["upsert"][0]["score"] == 10
+
+    async with StreamClient("/api/leaderboard/stream", last_event_id="unknown:3") as stream:
+        assert (await stream.next_event())["event"] == "snapshot"
+
+
+@pytest.mark.asyncio
+async def test_stream_shares_one_producer_and_sends_heartbeats(monkeypatch, fast_streams):
+    """Test subscribers share a topic's producer and idle streams get heartbeats."""
+    monkeypatch.setattr(settings, "STREAM_HEARTBEAT_SECONDS", 0.05)
+    async with StreamClient("/api/leaderboard/stream") as first, StreamClient("/api/leaderboard/stream") as second:
+        await first.next_event()
+        await second.next_event()
+        topic = event_streams._topics["leaderboard:all"]
+        assert topic.subscribers == 2
+        assert await first.next_block() == ": heartbeat"
+
+    assert topic.subscribers == 0
+
+
+@pytest.mark.asyncio
+async def test_keyed_topic_reloads_changes_made_while_unsubscribed(fast_streams):
+    """Test a resubscribing client sees changes made while nobody listened."""
+    items = {"a": {"v": 1}}
+    topic = event_streams.Topic(
+        "test", lambda keys, data: {key: items[key] for key in (keys or items) if key in items}, lambda keys: None,
+    )
+    
+    async def first_event():
+        stream = topic.stream()
+        try:
+            await anext(stream)
+            return await anext(stream)
+        finally:
+            await stream.aclose()
+    
+    assert '"v":1' in await first_event()
+    
+    items["a"] = {"v": 2}
+    items["b"] = {"v": 3}
+    topic.notify(["a", "b"])
+    
+    snapshot = await first_event()
+    assert '"v":2' in snapshot and '"v":3' in snapshot
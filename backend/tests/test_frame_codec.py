@@ -0,0 +1,115 @@
+"""Tests for the binary live frame format."""
+from app.models.game import GameMode, GRID_SIZE
+from app.services.frame_codec import FrameDecoder, FrameEncoder
+import random
+import pytest
+
+
+def play(ticks, seed):
+    """Generate (score, snake, food) states of a wandering, growing snake."""
+    rng = random.Random(seed)
+    snake = [(10, 10), (9, 10), (8, 10)]
+    food = ((0, 0),)
+    score = 0
+    direction = (1, 0)
+    states = []
+    for _ in range(ticks):
+        if rng.random() < 0.3:
+            direction = rng.choice([(0, -1), (0, 1)] if direction[1] == 0 else [(-1, 0), (1, 0)])
+        snake.insert(0, ((snake[0][0] + direction[0]) % GRID_SIZE, (snake[0][1] + direction[1]) % GRID_SIZE))
+        if rng.random() < 0.1:
+            score += 10
+            food = ((rng.randrange(GRID_SIZE), rng.randrange(GRID_SIZE)),)
+        else:
+            snake.pop()
+        states.append((score, tuple(snake), food))
+    return states
+
+
+def test_keyframe_round_trip():
+    """Test that a keyframe decodes to the encoded state."""
+    encoder = FrameEncoder()
+    snake = ((5, 5), (4, 5), (4, 6), (3, 6))
+    frame = FrameDecoder().decode(encoder.encode(120, GameMode.WALLS, snake, [(1, 2)]))
+    
+    assert frame.keyframe is True
+    assert frame.score == 120
+    assert frame.mode == GameMode.WALLS
+    assert frame.snake == snake
+    assert frame.food == ((1, 2),)
+
+
+def test_delta_frames_round_trip():
+    """Test a long stream of mostly delta frames, including wrap-around and growth."""
+    encoder = FrameEncoder()
+    decoder = FrameDecoder()
+    
+    for score, snake, food in play(2000, seed=7):
+        data = encoder.encode(score, GameMode.PASS_THROUGH, snake, food)
+        frame = decoder.decode(data)
+        assert (frame.score, frame.snake, frame.food) == (score, snake, food)
+
+
+def test_delta_is_smaller_than_keyframe():
+    """Test that a plain move is sent as a small delta."""
+    encoder = FrameEncoder()
+    snake = tuple((x, 3) for x in range(10, 0, -1))
+    keyframe = encoder.encode(0, GameMode.WALLS, snake)
+    delta = encoder.encode(0, GameMode.WALLS, ((11, 3), *snake[:-1]))
+    
+    assert len(delta) < len(keyframe)
+    assert len(delta) <= 14
+
+
+def test_wrapped_snake_in_keyframe():
+    """Test a snake crossing the board edge in pass-through mode."""
+    snake = ((0, 0), (GRID_SIZE - 1, 0), (GRID_SIZE - 1, GRID_SIZE - 1))
+    data = FrameEncoder().encode(0, GameMode.PASS_THROUGH, snake)
+    
+    assert FrameDecoder().decode(data).snake == snake
+
+
+def test_decoder_resyncs_after_dropped_frames():
+    """Test that a gap is detected and decoding resumes at the next keyframe."""
+    encoder = FrameEncoder(keyframe_interval=3)
+    decoder = FrameDecoder()
+    frames = [encoder.encode(s, GameMode.PASS_THROUGH, snake, food) for s, snake, food in play(8, seed=3)]
+    
+    assert decoder.decode(frames[0]) is not None
+    # frames[1] dropped
+    assert decoder.decode(frames[2]) is None
+    assert decoder.decode(frames[3]) is None
+    assert decoder.decode(frames[4]).keyframe is True
+    assert decoder.decode(frames[5]) is not None
+
+
+def test_snapshot_lets_late_viewer_join():
+    """Test that a snapshot keyframe is followed by the next delta."""
+    encoder = FrameEncoder()
+    states = play(5, seed=1)
+    for score, snake, food in states[:4]:
+        encoder.encode(score, GameMode.PASS_THROUGH, snake, food)
+    
+    decoder = FrameDecoder()
+    decoder.decode(encoder.snapshot())
+    score, snake, food = states[4]
+    frame = decoder.decode(encoder.encode(score, GameMode.PASS_THROUGH, snake, food))
+    
+    assert frame.snake == snake
+
+
+def test_out_of_range_score_and_wrapping_seq():
+    """Test scores beyond 32 bits are refused and the sequence number wraps."""
+    encoder = FrameEncoder()
+    snake = ((5, 5), (4, 5))
+    with pytest.raises(ValueError):
+        encoder.encode(2**32, GameMode.WALLS, snake)
+    
+    encoder.seq = 2**32 - 2
+    decoder = FrameDecoder()
+    decoder.decode(encoder.encode(2**32 - 1, GameMode.WALLS, snake))
+    frame = decoder.decode(encoder.encode(2**32 - 1, GameMode.WALLS, ((6, 5), (5, 5))))
+    
+    assert frame.seq == 0
+    assert frame.keyframe is False
+    assert frame.snake == ((6, 5), (5, 5))
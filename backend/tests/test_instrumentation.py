@@ -0,0 +1,42 @@
+"""Tests for per-request SQL instrumentation."""
+import logging
+import re
+from app.config import settings
+
+
+def test_server_timing_header(client, existing_user_token):
+    """Test that responses report query count and DB time."""
+    response = client.get("/api/users/1")
+
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    match = re.search(r'db;dur=([\d.]+);desc="(\d+) queries"', timing)
+    assert match
+    assert int(match.group(2)) == 1
+    assert "total;dur=" in timing
+
+
+def test_slow_request_logged(client, monkeypatch, caplog):
+    """Test that requests over the query threshold are logged."""
+    monkeypatch.setattr(settings, "SLOW_REQUEST_QUERIES", 0)
+
+    with caplog.at_level(logging.WARNING, logger="app.instrumentation"):
+        client.get("/api/users/999")
+
+    assert any("Slow request GET /api/users/999" in r.message for r in caplog.records)
+
+
+def test_get_user_query_count(client, existing_user_token, assert_max_queries):
+    """Test that fetching a user profile runs a single query."""
+    with assert_max_queries(1):
+        response = client.get("/api/users/1")
+
+    assert response.status_code == 200
+
+
+def test_current_user_query_count(client, auth_headers, assert_max_queries):
+    """Test that resolving the current user runs a single query."""
+    with assert_max_queries(1):
+        response = client.get("/api/auth/me", headers=auth_headers)
+
+    assert response.status_code == 200
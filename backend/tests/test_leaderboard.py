@@ -109,3 +109,41 @@ def test_get_leaderboard_invalid_mode(client):
     
     # Should return 422 for invalid enum value
     assert response.status_code == 422
+
+
+def test_leaderboard_query_count_independent_of_page_size(client, db_session, assert_max_queries):
+    """Test the leaderboard loads players with its scores rather than per row."""
+    from app.database import models
+    from app.models.game import GameMode
+    
+    for i in range(30):
+        user = models.User(username=f"Bulk{i}", email=f"bulk{i}@example.com", hashed_password="x", avatar="")
+        db_session.add(user)
+        db_session.flush()
+        db_session.add(models.Score(user_id=user.id, score=i, mode=GameMode.WALLS, duration=10))
+    db_session.commit()
+    db_session.expire_all()
+    
+    with assert_max_queries(1):
+        response = client.get("/api/leaderboard?limit=50")
+    
+    assert response.status_code == 200
+    assert len(response.json()) == 30
+    assert response.json()[0]["user"]["username"] == "Bulk29"
+
+
+def test_leaderboard_keeps_scores_from_before_verification(baseline_engine):
+    """Test scores stored before replay verification existed stay listed."""
+    from sqlalchemy.orm import Session
+    from app.database import init_db
+    from app.models.game import GameMode
+    from app.services import db_service
+    
+    init_db.init_db()
+    
+    with Session(baseline_engine) as db:
+        assert [score.id for score in db_service.get_leaderboard(db)] == [1]
+        # Rejecting a newer score falls back to the old one as the high score
+        rejected = db_service.add_score(db, user_id=1, score=9000, mode=GameMode.WALLS, duration=10, replay=b"x")
+        db_service.set_score_verification(db, {rejected.id: False})
+        assert db_service.get_user_by_id(db, 1).high_score == 2450
@@ -37,10 +37,9 @@ def test_get_live_games_filter_by_mode(client, populated_live_games):
 @pytest.fixture
 def populated_live_games(db_session):
     """Populate live games for tests."""
-    from app.services import db_service
+    from app.services import db_service, live_registry
     from app.models.user import UserCreate
     from app.models.game import GameMode
-    from datetime import datetime, UTC
     
     # Create a player
     user_data = UserCreate(
@@ -51,30 +50,28 @@ def populated_live_games(db_session):
     )
     user = db_service.create_user(db_session, user_data)
     
-    # Add live game directly to service memory
-    db_service._live_games["live1"] = {
-        "id": "live1",
-        "player_id": user.id,
-        "score": 150,
-        "mode": GameMode.PASS_THROUGH,
-        "viewers": 5,
-        "started_at": datetime.now(UTC)
-    }
-    
-    # Add another for walls mode
-    db_service._live_games["live2"] = {
-        "id": "live2",
-        "player_id": user.id,
-        "score": 200,
-        "mode": GameMode.WALLS,
-        "viewers": 10,
-        "started_at": datetime.now(UTC)
-    }
+    # Add live games directly to the registry
+    live_registry.registry.start(user.id, GameMode.PASS_THROUGH, game_id="live1")
+    live_registry.registry.update("live1", score=150)
+    for i in range(5):
+        live_registry.registry.viewer_joined("live1", f"viewer{i}")
+    
+    # Add another for walls mode (from a second player)
+    other = db_service.create_user(db_session, UserCreate(
+        username="LivePlayer2",
+        email="live2@example.com",
+        password="password123",
+        avatar="https://api.dicebear.com/7.x/lorelei/svg?seed=Live2"
+    ))
+    live_registry.registry.start(other.id, GameMode.WALLS, game_id="live2")
+    live_registry.registry.update("live2", score=200)
+    for i in range(10):
+        live_registry.registry.viewer_joined("live2", f"viewer{i}")
     
     yield
     
     # Cleanup
-    db_service._live_games.clear()
+    live_registry.registry.clear()
 
 
 def test_get_live_game_by_id(client, populated_live_games):
@@ -113,3 +110,247 @@ def test_live_game_player_info(client, populated_live_games):
     assert "avatar" in player
     assert "password" not in player
     assert "hashed_password" not in player
+
+
+def test_live_games_query_count_independent_of_game_count(client, db_session, assert_max_queries):
+    """Test players of all live games are loaded with a single query."""
+    from app.database import models
+    from app.models.game import GameMode
+    from app.services import live_registry
+    
+    for i in range(20):
+        user = models.User(username=f"Live{i}", email=f"live{i}@example.com", hashed_password="x", avatar="")
+        db_session.add(user)
+        db_session.flush()
+        live_registry.registry.start(user.id, GameMode.WALLS)
+    db_session.commit()
+    db_session.expire_all()
+    
+    with assert_max_queries(1):
+        response = client.get("/api/games/live")
+    
+    assert response.status_code == 200
+    assert len(response.json()) == 20
+
+
+@pytest.fixture
+def many_live_games(db_session):
+    """Start 25 live games with distinct scores and viewer counts."""
+    from app.database import models
+    from app.models.game import GameMode
+    from app.services import live_registry
+    
+    for i in range(25):
+        user = models.User(username=f"Many{i}", email=f"many{i}@example.com", hashed_password="x", avatar="")
+        db_session.add(user)
+        db_session.flush()
+        mode = GameMode.WALLS if i % 2 else GameMode.PASS_THROUGH
+        session = live_registry.registry.start(user.id, mode, game_id=f"g{i:02d}")
+        live_registry.registry.update(session.id, score=i * 10)
+        for v in range(25 - i):
+            live_registry.registry.viewer_joined(session.id, f"viewer{v}")
+    db_session.commit()
+
+
+def test_live_games_sorted_and_paginated(client, many_live_games):
+    """Test following X-Next-Cursor walks every game in score order."""
+    seen = []
+    cursor = None
+    while True:
+        url = "/api/games/live?limit=10" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url)
+        assert response.status_code == 200
+        seen.extend(game["score"] for game in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    
+    assert seen == sorted(range(0, 250, 10), reverse=True)
+
+
+def test_live_games_sort_by_viewers_and_mode(client, many_live_games):
+    """Test the viewers ordering and the per-mode index."""
+    data = client.get("/api/games/live?sort=viewers&mode=walls&limit=3").json()
+    
+    assert [game["id"] for game in data] == ["g01", "g03", "g05"]
+    assert [game["viewers"] for game in data] == [24, 22, 20]
+
+
+def test_live_games_index_follows_updates(client, many_live_games):
+    """Test score changes and removals are reflected in the index."""
+    from app.services import live_registry
+    
+    live_registry.registry.update("g00", score=1000)
+    live_registry.registry.remove("g24")
+    
+    ids = [game["id"] for game in client.get("/api/games/live?limit=2").json()]
+    assert ids == ["g00", "g23"]
+
+
+def test_live_games_invalid_cursor(client):
+    """Test a malformed cursor is rejected."""
+    response = client.get("/api/games/live?cursor=not-a-cursor")
+    
+    assert response.status_code == 400
+
+
+def test_play_websocket_streams_game(client, auth_headers):
+    """Test that a player's WebSocket stream shows up as a live game."""
+    token = auth_headers["Authorization"].split()[1]
+    
+    with client.websocket_connect(f"/api/games/live/play?token={token}&mode=walls") as ws:
+        started = ws.receive_json()
+        assert started["type"] == "started"
+        
+        ws.send_json({"type": "state", "score": 30, "snake": [[5, 5], [4, 5], [3, 5]]})
+        # Invalid messages are answered, which also tells us the state was applied
+        ws.send_json({"type": "bogus"})
+        assert ws.receive_json()["type"] == "error"
+        # Scores too large for a live frame are refused
+        ws.send_json({"type": "state", "score": 2**32, "snake": [[6, 5], [5, 5], [4, 5]]})
+        assert ws.receive_json()["type"] == "error"
+        
+        response = client.get("/api/games/live")
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["id"] == started["gameId"]
+        assert data[0]["score"] == 30
+        assert data[0]["mode"] == "walls"
+    
+    # Game is removed once the player disconnects
+    response = client.get(f"/api/games/live/{started['gameId']}")
+    assert response.status_code == 404
+
+
+def test_play_websocket_requires_auth(client):
+    """Test that streaming a game requires a valid token."""
+    from starlette.websockets import WebSocketDisconnect
+    
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/api/games/live/play?token=invalid") as ws:
+            ws.receive_json()
+    
+    assert exc_info.value.code == 1008
+
+
+def test_registry_evicts_sessions_without_heartbeat():
+    """Test heartbeat-based TTL eviction."""
+    from app.services.live_registry import LiveGameRegistry
+    from app.models.game import GameMode
+    
+    now = [0.0]
+    registry = LiveGameRegistry(ttl_seconds=10, max_sessions=100, clock=lambda: now[0])
+    stale = registry.start(1, GameMode.WALLS)
+    alive = registry.start(2, GameMode.WALLS)
+    
+    now[0] = 8.0
+    registry.heartbeat(alive.id)
+    now[0] = 12.0
+    
+    assert [s.id for s in registry.list()] == [alive.id]
+    assert registry.get(stale.id) is None
+
+
+def test_registry_is_bounded():
+    """Test that the registry refuses sessions beyond capacity and caps snake length."""
+    from app.services.live_registry import LiveGameRegistry
+    from app.models.game import GameMode
+    
+    registry = LiveGameRegistry(ttl_seconds=10, max_sessions=2, max_snake_length=3)
+    first = registry.start(1, GameMode.WALLS)
+    registry.start(2, GameMode.WALLS)
+    
+    assert registry.start(3, GameMode.WALLS) is None
+    # Restarting replaces the player's previous session instead of adding one
+    assert registry.start(1, GameMode.PASS_THROUGH) is not None
+    assert registry.get(first.id) is None
+    assert len(registry) == 2
+    
+    session = registry.list(GameMode.PASS_THROUGH)[0]
+    registry.update(session.id, snake=[[i, 0] for i in range(10)])
+    assert len(session.snake) == 3
+
+
+def test_spectate_live_game(client, auth_headers):
+    """Test that spectators receive frames and are counted as viewers."""
+    from app.services.frame_codec import FrameDecoder
+    token = auth_headers["Authorization"].split()[1]
+    decoder = FrameDecoder()
+    
+    with client.websocket_connect(f"/api/games/live/play?token={token}") as player:
+        game_id = player.receive_json()["gameId"]
+        player.send_json({"type": "state", "score": 0, "snake": [[1, 1], [0, 1]]})
+        player.send_json({"type": "bogus"})
+        player.receive_json()
+        
+        with client.websocket_connect(f"/api/games/live/{game_id}") as spectator:
+            initial = decoder.decode(spectator.receive_bytes())
+            assert initial.keyframe is True
+            assert initial.snake == ((1, 1), (0, 1))
+            assert client.get(f"/api/games/live/{game_id}").json()["viewers"] == 1
+            
+            player.send_json({"type": "state", "score": 10, "snake": [[2, 1], [1, 1], [0, 1]], "food": [[5, 5]]})
+            frame = decoder.decode(spectator.receive_bytes())
+            assert frame.keyframe is False
+            assert frame.score == 10
+            assert frame.snake == ((2, 1), (1, 1), (0, 1))
+            assert frame.food == ((5, 5),)
+        
+        # Ask for an error reply to be sure the spectator's exit was processed
+        player.send_json({"type": "bogus"})
+        player.receive_json()
+        data = client.get(f"/api/games/live/{game_id}").json()
+        assert data["viewers"] == 0
+        assert data["uniqueViewers"] == 1
+
+
+def test_spectate_game_ending_during_accept(client, monkeypatch):
+    """Test a game ending while the spectator's socket is accepted ends their stream."""
+    from starlette.websockets import WebSocket, WebSocketDisconnect
+    from app.models.game import GameMode
+    from app.services import live_registry
+    from app.services.broadcast import hub
+    from app.services.frame_codec import FrameDecoder
+    
+    session = live_registry.registry.start(1, GameMode.WALLS)
+    live_registry.registry.update(session.id, score=0, snake=[[1, 1], [0, 1]])
+    accept = WebSocket.accept
+    
+    async def accept_after_game_ends(self, *args, **kwargs):
+        # What the player's socket does when it closes
+        live_registry.registry.remove(session.id)
+        hub.close(session.id)
+        await accept(self, *args, **kwargs)
+    
+    monkeypatch.setattr(WebSocket, "accept", accept_after_game_ends)
+    with client.websocket_connect(f"/api/games/live/{session.id}") as spectator:
+        assert FrameDecoder().decode(spectator.receive_bytes()).keyframe is True
+        with pytest.raises(WebSocketDisconnect):
+            spectator.receive_bytes()
+    assert not hub.has_viewers(session.id)
+
+
+def test_spectate_unknown_game(client):
+    """Test that watching a game that does not exist is refused."""
+    from starlette.websockets import WebSocketDisconnect
+    
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/api/games/live/nonexistent") as ws:
+            ws.receive_bytes()
+
+
+def test_broadcast_hub_drops_frames_for_slow_viewers():
+    """Test that a slow viewer keeps only the newest frames."""
+    from app.services.broadcast import BroadcastHub
+    
+    hub = BroadcastHub(max_pending=2)
+    slow = hub.subscribe("g1")
+    frames = [f"frame{i}".encode() for i in range(5)]
+    for frame in frames:
+        assert hub.publish("g1", frame) == 1
+    
+    assert slow.dropped == 3
+    assert slow.queue.qsize() == 2
+    # The same bytes object is shared, not copied per viewer
+    assert slow.queue.get_nowait() is frames[3]
+    assert slow.queue.get_nowait() is frames[4]
@@ -0,0 +1,86 @@
+"""Tests for the metrics subsystem and /metrics endpoint."""
+import re
+import pytest
+from app import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    """Value of one sample in a Prometheus text exposition."""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = "^" + re.escape(name) + (r"\{" + re.escape(wanted) + r"\}" if labels else "") + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    assert match, f"{name} {labels} not found"
+    return float(match.group(1))
+
+
+def test_histogram_exposition():
+    """Test histogram buckets are cumulative with sum and count."""
+    histogram = metrics.Histogram("test_seconds", "Test.", ("kind",), buckets=(0.1, 1.0))
+    try:
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.labels("a").observe(value)
+        text = histogram.render()
+    finally:
+        metrics._metrics.remove(histogram)
+    
+    assert "# TYPE test_seconds histogram" in text
+    assert _sample(text, "test_seconds_bucket", kind="a", le="0.1") == 1
+    assert _sample(text, "test_seconds_bucket", kind="a", le="1.0") == 3
+    assert _sample(text, "test_seconds_bucket", kind="a", le="+Inf") == 4
+    assert _sample(text, "test_seconds_sum", kind="a") == 6.05
+    assert _sample(text, "test_seconds_count", kind="a") == 4
+
+
+def test_metrics_endpoint_records_requests(client, existing_user_token):
+    """Test request latency is recorded per route template, with DB time."""
+    client.get("/api/users/1")
+    client.get("/api/users/1")
+    client.get("/api/nope")
+    client.get("/health")
+    # A parameter value that also appears in the rest of the path
+    client.get("/api/games/live/live")
+    
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    
+    route = "/api/users/{user_id}"
+    assert _sample(text, "http_requests_total", method="GET", route=route, status="200") == 2
+    assert _sample(text, "http_request_duration_seconds_count", method="GET", route=route) == 2
+    assert _sample(text, "http_requests_total", method="GET", route="unmatched", status="404") == 1
+    assert _sample(text, "http_requests_total", method="GET", route="/health", status="200") == 1
+    assert _sample(text, "http_requests_total", method="GET", route="/api/games/live/{game_id}", status="404") == 1
+    # Only the /metrics request itself is in flight
+    assert _sample(text, "http_requests_in_flight") == 1
+    assert _sample(text, "db_queries_total") > 0
+    assert _sample(text, "http_request_db_seconds_count", method="GET", route=route) == 2
+
+
+def test_metrics_bcrypt_caches_and_live_games(client, existing_user_token, db_session):
+    """Test bcrypt timings, cache statistics and live game counts."""
+    from app.models.game import GameMode
+    from app.services import live_registry, user_cache
+    
+    user_cache.cache.clear()
+    client.get("/api/users/1")
+    client.get("/api/users/1")
+    live_registry.registry.start(1, GameMode.WALLS)
+    
+    text = client.get("/metrics").text
+    
+    # Creating and logging in the user hashed and verified a password
+    assert _sample(text, "bcrypt_duration_seconds_count", operation="hash") == 1
+    assert _sample(text, "bcrypt_duration_seconds_count", operation="verify") == 1
+    assert _sample(text, "cache_hits_total", cache="user") == 1
+    assert _sample(text, "cache_misses_total", cache="user") == 1
+    assert _sample(text, "cache_hit_ratio", cache="user") == 0.5
+    assert _sample(text, "live_games", mode="walls") == 1
+    assert _sample(text, "live_games", mode="pass-through") == 0
@@ -0,0 +1,147 @@
+"""Tests for on-demand request profiling."""
+import json
+import threading
+import time
+import pytest
+from app import profiling
+from app.config import settings
+
+TOKEN = "profile-secret"
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", TOKEN)
+    return tmp_path
+
+
+def _busy_wait(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampler_records_stacks_in_both_formats():
+    """Test the sampler sees the running function and both formats list it."""
+    sampler = profiling.StackSampler(threading.get_ident(), interval=0.001, max_seconds=5)
+    sampler.start()
+    _busy_wait(0.1)
+    samples = sampler.stop()
+
+    assert sum(samples.values()) > 10
+    text = profiling.collapsed(samples)
+    assert "_busy_wait (tests/test_profiling.py:" in text
+    stack, count = text.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+
+    profile = profiling.speedscope(samples, "test", 0.001)
+    frames = profile["shared"]["frames"]
+    sampled = profile["profiles"][0]
+    assert any(frame["name"] == "_busy_wait" for frame in frames)
+    assert len(sampled["samples"]) == len(sampled["weights"]) == len(samples)
+    assert all(0 <= index < len(frames) for stack in sampled["samples"] for index in stack)
+
+
+def test_request_with_token_is_profiled(client, profile_dir):
+    """Test a request with the profiling token writes its profile."""
+    response = client.get("/api/leaderboard", headers={"X-Profile-Token": TOKEN})
+
+    assert response.status_code == 200
+    name = response.headers["X-Profile"]
+    assert "-GET-api_leaderboard-" in name
+    assert (profile_dir / f"{name}.collapsed").exists()
+    profile = json.loads((profile_dir / f"{name}.speedscope.json").read_text())
+    assert profile["profiles"][0]["type"] == "sampled"
+
+    # A wrong token, or none, is not profiled
+    for headers in ({"X-Profile-Token": "wrong"}, {}):
+        response = client.get("/api/leaderboard", headers=headers)
+        assert "X-Profile" not in response.headers
+    assert profiling.list_profiles() == [name]
+
+
+def test_sampling_from_settings(client, profile_dir, monkeypatch):
+    """Test the configured rate and paths pick requests without a token."""
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(settings, "PROFILE_PATHS", ["/api/leaderboard"])
+
+    assert "X-Profile" in client.get("/api/leaderboard").headers
+    assert "X-Profile" not in client.get("/api/avatars").headers
+
+
+def test_admin_endpoint_changes_sampling_at_runtime(client, profile_dir):
+    """Test sampling can be switched on and back off without a restart."""
+    headers = {"X-Profile-Token": TOKEN}
+    assert client.get("/api/admin/profiling").status_code == 403
+    assert client.get("/api/admin/profiling", headers=headers).json()["source"] == "settings"
+    assert "X-Profile" not in client.get("/api/avatars").headers
+
+    response = client.put(
+        "/api/admin/profiling", headers=headers, json={"sample_rate": 1.0, "paths": ["/api/avatars"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["source"] == "runtime"
+    assert "X-Profile" in client.get("/api/avatars").headers
+    assert "X-Profile" not in client.get("/api/leaderboard").headers
+    # Other workers read the override from the shared state in the background
+    profiling.reset()
+    assert profiling.get_sampling()["source"] == "settings"
+    profiling.refresh_override()
+    assert profiling.get_sampling()["paths"] == ["/api/avatars"]
+
+    response = client.delete("/api/admin/profiling", headers=headers)
+    assert response.json()["source"] == "settings"
+    assert len(response.json()["profiles"]) == 1
+    assert "X-Profile" not in client.get("/api/avatars").headers
+
+
+def test_override_refreshed_off_the_request_path(client, profile_dir, monkeypatch):
+    """Test requests never read the shared state; the refresher thread does."""
+    from app.services import shared_state
+    
+    state = shared_state.get_state()
+    get_shards = state.get_shards
+    readers = []
+    monkeypatch.setattr(
+        state, "get_shards", lambda group: readers.append(threading.current_thread().name) or get_shards(group)
+    )
+    monkeypatch.setattr(profiling, "OVERRIDE_REFRESH_SECONDS", 0.01)
+    # Set by another worker
+    state.put_shard(profiling.OVERRIDE_GROUP, profiling.OVERRIDE_SHARD, {
+        "sample_rate": 1.0, "paths": ["/api/avatars"], "expires_at": time.time() + 60,
+    }, 60)
+    
+    assert "X-Profile" not in client.get("/api/avatars").headers
+    assert readers == []
+    profiling.start_refresher()
+    try:
+        while profiling.get_override() is None:
+            time.sleep(0.01)
+    finally:
+        profiling.stop_refresher()
+    
+    assert "X-Profile" in client.get("/api/avatars").headers
+    assert set(readers) == {"profiling-override"}
+
+
+def test_admin_endpoint_hidden_without_token(client):
+    """Test the admin endpoint does not exist unless a token is configured."""
+    response = client.get("/api/admin/profiling", headers={"X-Profile-Token": ""})
+
+    assert response.status_code == 404
+
+
+def test_non_ascii_token_is_rejected(client, profile_dir, monkeypatch):
+    """Test a token header with non-ASCII characters is refused, not an error."""
+    headers = {"X-Profile-Token": "café".encode()}
+    
+    response = client.get("/health", headers=headers)
+    assert response.status_code == 200
+    assert "X-Profile" not in response.headers
+    assert client.get("/api/admin/profiling", headers=headers).status_code == 403
+    
+    # A non-ASCII token works when sent as UTF-8
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "café")
+    assert "X-Profile" in client.get("/health", headers=headers).headers
+    assert client.get("/api/admin/profiling", headers=headers).status_code == 200
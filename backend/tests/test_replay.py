@@ -0,0 +1,165 @@
+"""Tests for replay storage and score verification."""
+import pytest
+from app.config import settings
+from app.models.game import GameMode
+from app.services import verification_service
+from app.services.replay import decode_replay, encode_replay, simulate, verify_replays
+from app.services.snake_engine import Direction, SnakeGame
+
+
+def play_greedy(mode, seed, max_ticks=400):
+    """Play a game that steers towards the food, recording a replay."""
+    game = SnakeGame(mode, seed)
+    inputs = []
+    tick = 0
+    while tick < max_ticks and game.alive:
+        (hx, hy), (fx, fy) = game.snake[0], game.food
+        if fx != hx:
+            wanted = Direction.RIGHT if fx > hx else Direction.LEFT
+        else:
+            wanted = Direction.DOWN if fy > hy else Direction.UP
+        if wanted != game.direction and wanted != game.direction.opposite():
+            game.change_direction(wanted)
+            inputs.append((tick, int(wanted)))
+        game.step()
+        tick += 1
+    return {"seed": seed, "ticks": tick, "inputs": inputs}, game.score
+
+
+def test_replay_round_trip():
+    """Test that packing and unpacking a replay is lossless and compact."""
+    replay, _ = play_greedy(GameMode.WALLS, seed=5)
+    packed = encode_replay(replay["seed"], replay["ticks"], replay["inputs"])
+    
+    assert decode_replay(packed) == (replay["seed"], replay["ticks"], replay["inputs"])
+    assert len(packed) <= 8 + 2 * len(replay["inputs"])
+
+
+def test_simulate_reproduces_score():
+    """Test that re-simulating a replay gives the score that was played."""
+    replay, score = play_greedy(GameMode.PASS_THROUGH, seed=11)
+    
+    assert score > 0
+    assert simulate(GameMode.PASS_THROUGH, replay["seed"], replay["ticks"], replay["inputs"]) == score
+
+
+def test_verify_replays_batch():
+    """Test batch verification against honest and inflated claims."""
+    jobs = []
+    expected = []
+    for seed in range(20):
+        mode = GameMode.WALLS if seed % 2 else GameMode.PASS_THROUGH
+        replay, score = play_greedy(mode, seed)
+        packed = encode_replay(replay["seed"], replay["ticks"], replay["inputs"])
+        honest = seed % 3 != 0
+        jobs.append((mode, packed, score if honest else score + 100))
+        expected.append(honest)
+    
+    assert verify_replays(jobs) == expected
+
+
+def test_verify_replays_in_process_pool(monkeypatch):
+    """Test that verification works in worker processes."""
+    monkeypatch.setattr(settings, "VERIFICATION_WORKERS", 1)
+    replay, score = play_greedy(GameMode.WALLS, seed=3)
+    packed = encode_replay(replay["seed"], replay["ticks"], replay["inputs"])
+    try:
+        assert verification_service.run_verification([(GameMode.WALLS, packed, score)]) == [True]
+    finally:
+        verification_service.shutdown()
+
+
+@pytest.fixture
+def inline_verification(monkeypatch):
+    """Verify replays in the background thread instead of worker processes."""
+    monkeypatch.setattr(settings, "VERIFICATION_WORKERS", 0)
+
+
+def test_submit_score_with_valid_replay(client, auth_headers, inline_verification):
+    """Test that an honest replay is verified and stays on the leaderboard."""
+    replay, score = play_greedy(GameMode.WALLS, seed=21)
+    response = client.post(
+        "/api/games/score",
+        json={"score": score, "mode": "walls", "duration": 60, "replay": replay},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    
+    data = client.get("/api/leaderboard").json()
+    assert [entry["score"] for entry in data] == [score]
+
+
+def test_submit_score_with_forged_replay(client, auth_headers, inline_verification):
+    """Test that a score the replay does not reproduce is removed from the leaderboard."""
+    client.post(
+        "/api/games/score",
+        json={"score": 50, "mode": "walls", "duration": 60},
+        headers=auth_headers,
+    )
+    replay, score = play_greedy(GameMode.WALLS, seed=21)
+    response = client.post(
+        "/api/games/score",
+        json={"score": score + 1000, "mode": "walls", "duration": 60, "replay": replay},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    
+    data = client.get("/api/leaderboard").json()
+    assert [entry["score"] for entry in data] == [50]
+    # The rejected score no longer counts as the user's high score
+    assert data[0]["user"]["highScore"] == 50
+
+
+def test_submit_score_with_unordered_replay(client, auth_headers):
+    """Test that malformed replays are rejected up front."""
+    response = client.post(
+        "/api/games/score",
+        json={
+            "score": 10,
+            "mode": "walls",
+            "duration": 60,
+            "replay": {"seed": 1, "ticks": 10, "inputs": [[5, 0], [2, 1]]},
+        },
+        headers=auth_headers,
+    )
+    
+    assert response.status_code == 422
+
+
+def test_concurrent_verification_runs_simulate_once(client, auth_headers, inline_verification, monkeypatch):
+    """Test runs started while one is in progress leave the scores to it."""
+    import threading
+    
+    started, release = threading.Event(), threading.Event()
+    simulated = []
+    run_verification = verification_service.run_verification
+    
+    def slow_verification(jobs):
+        simulated.append(len(jobs))
+        started.set()
+        release.wait(5)
+        return run_verification(jobs)
+    
+    monkeypatch.setattr(verification_service, "run_verification", slow_verification)
+    # Submit without the background run, then verify from several threads
+    verify = verification_service.verify_pending_scores
+    monkeypatch.setattr(verification_service, "verify_pending_scores", lambda: 0)
+    replay, score = play_greedy(GameMode.WALLS, seed=21)
+    for _ in range(3):
+        client.post(
+            "/api/games/score",
+            json={"score": score, "mode": "walls", "duration": 60, "replay": replay},
+            headers=auth_headers,
+        )
+    
+    results = []
+    first = threading.Thread(target=lambda: results.append(verify()))
+    first.start()
+    assert started.wait(5)
+    others = [verify() for _ in range(3)]
+    release.set()
+    first.join(5)
+    
+    assert others == [0, 0, 0]
+    assert results == [3]
+    assert simulated == [3]
@@ -0,0 +1,46 @@
+"""Tests for the fast JSON response path."""
+import json
+from datetime import datetime, UTC
+from fastapi.encoders import jsonable_encoder
+from app import responses
+from app.models.game import GameMode, LeaderboardEntry
+from app.models.user import User
+
+
+def _entries():
+    user = User(id=1, username="Fast", email="fast@example.com", avatar="", version=3)
+    return [
+        LeaderboardEntry(rank=i, user=user, score=100 - i, mode=GameMode.WALLS, date=datetime(2026, 1, i, tzinfo=UTC))
+        for i in range(1, 4)
+    ]
+
+
+def test_dumps_matches_default_encoding():
+    """Test models, lists of models and plain content encode like FastAPI does."""
+    entries = _entries()
+    expected = jsonable_encoder(entries, by_alias=True)
+    
+    assert json.loads(responses.dumps(entries)) == expected
+    assert json.loads(responses.dumps(entries[0])) == expected[0]
+    assert "version" not in expected[0]["user"]
+    plain = {"when": datetime(2026, 1, 1, tzinfo=UTC), "mode": GameMode.WALLS, "items": []}
+    assert json.loads(responses.dumps(plain)) == jsonable_encoder(plain)
+
+
+def test_dumps_without_orjson(monkeypatch):
+    """Test the standard library fallback."""
+    monkeypatch.setattr(responses, "orjson", None)
+    
+    assert json.loads(responses.dumps({"name": "Änne", "n": [1, 2]})) == {"name": "Änne", "n": [1, 2]}
+
+
+def test_fast_endpoints_match_response_model(client, auth_headers):
+    """Test endpoints on the fast path still produce their documented shape."""
+    from pydantic import TypeAdapter
+    
+    client.post("/api/games/score", json={"score": 70, "mode": "walls", "duration": 9}, headers=auth_headers)
+    response = client.get("/api/leaderboard")
+    
+    assert response.headers["content-type"] == "application/json"
+    entries = TypeAdapter(list[LeaderboardEntry]).validate_python(response.json())
+    assert response.json() == jsonable_encoder(entries, by_alias=True)
@@ -0,0 +1,66 @@
+"""Tests for the synthetic dataset generator."""
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from app.database import models
+from app.database.seed import populate
+from app.services import auth_service, db_service
+
+
+def _dump(engine):
+    with engine.connect() as conn:
+        users = conn.execute(select(models.User).order_by(models.User.id)).all()
+        scores = conn.execute(select(models.Score).order_by(models.Score.id)).all()
+    return users, scores
+
+
+def test_populate_is_deterministic(tmp_path):
+    """Test the same seed gives the same rows and another seed does not."""
+    engines = [create_engine(f"sqlite:///{tmp_path / name}.db") for name in ("a", "b", "c")]
+    populate(engines[0], 200, seed=7, batch_size=50)
+    populate(engines[1], 200, seed=7, batch_size=50)
+    populate(engines[2], 200, seed=8, batch_size=50)
+    
+    assert _dump(engines[0]) == _dump(engines[1])
+    assert _dump(engines[0]) != _dump(engines[2])
+
+
+def test_populate_keeps_user_stats_consistent(tmp_path):
+    """Test generated players' stats match their generated scores."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    counts = populate(engine, 300, seed=1, batch_size=64)
+    
+    with Session(engine) as db:
+        assert db.scalar(select(func.count(models.User.id))) == 300
+        assert db.scalar(select(func.count(models.Score.id))) == counts["scores"]
+        rows = db.execute(
+            select(models.Score.user_id, func.count(), func.max(models.Score.score)).group_by(models.Score.user_id)
+        )
+        stats = {user_id: (games, high) for user_id, games, high in rows}
+        for user in db.scalars(select(models.User)):
+            assert (user.games_played, user.high_score) == stats.get(user.id, (0, 0))
+        # Heavy tailed: some never play, and the busiest player far exceeds the mean
+        assert 0 < len(stats) < 300
+        assert max(games for games, _ in stats.values()) > 5 * counts["scores"] / 300
+
+
+def test_populate_appends_and_players_can_log_in(tmp_path):
+    """Test a second run adds new players who log in with the shared password."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    populate(engine, 20, seed=1)
+    counts = populate(engine, 20, seed=2, password="hunter22")
+    
+    with Session(engine) as db:
+        assert db.scalar(select(func.count(models.User.id))) == 40
+        user = db_service.get_user_by_email(db, counts["first_email"].upper())
+        assert user.id == 21
+        assert auth_service.authenticate_user(db, user.email, "hunter22") is not None
+
+
+def test_populate_migrates_an_older_database(baseline_engine):
+    """Test seeding a database from before the key columns first adds them."""
+    populate(baseline_engine, 20, seed=1)
+    
+    with Session(baseline_engine) as db:
+        assert db_service.get_user_by_username(db, "snakemaster").id == 1
+        assert len(db_service.search_users(db, "snakem")) == 1
+        assert db.scalar(select(func.count(models.User.id)).where(models.User.username_key.is_(None))) == 0
@@ -0,0 +1,257 @@
+"""Tests for the shared state backends."""
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, UTC
+import pytest
+from app.models.game import GameMode
+from app.services import db_service, shared_state
+from app.services.live_registry import LiveGameRegistry
+from app.services.shared_state import InProcessState, RedisState, SQLiteState, create_state
+from tests.fake_redis import FakeRedisServer
+
+
+@pytest.fixture(scope="module")
+def redis_server():
+    with FakeRedisServer() as server:
+        yield server
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def state(request, tmp_path):
+    if request.param == "memory":
+        return InProcessState()
+    if request.param == "sqlite":
+        return create_state(f"sqlite:///{tmp_path / 'state.db'}")
+    state = create_state(request.getfixturevalue("redis_server").url)
+    state.clear()
+    return state
+
+
+@pytest.fixture
+def sqlite_state(db_session, tmp_path):
+    """Use a SQLite backend for the app, as a multi-worker deployment would."""
+    previous = shared_state.get_state()
+    state = SQLiteState(str(tmp_path / "state.db"))
+    shared_state.set_state(state)
+    yield state
+    shared_state.set_state(previous)
+
+
+def test_token_revocation(state):
+    """Test revoked tokens are reported until their TTL runs out."""
+    state.revoke_token("token-a", ttl_seconds=0.2)
+
+    assert state.is_token_revoked("token-a")
+    assert not state.is_token_revoked("token-b")
+    time.sleep(0.3)
+    assert not state.is_token_revoked("token-a")
+
+
+def test_live_game_round_trip(state):
+    """Test live game summaries can be published, listed and withdrawn."""
+    started_at = datetime.now(UTC)
+    state.put_live_game("g1", {"id": "g1", "player_id": 1, "score": 10, "mode": GameMode.WALLS, "started_at": started_at}, 5)
+    state.put_live_game("g2", {"id": "g2", "player_id": 2, "score": 20, "mode": GameMode.PASS_THROUGH}, 5)
+
+    game = state.get_live_game("g1")
+    assert game["score"] == 10
+    assert game["mode"] == GameMode.WALLS
+    assert sorted(g["id"] for g in state.list_live_games()) == ["g1", "g2"]
+
+    state.remove_live_game("g1")
+    assert state.get_live_game("g1") is None
+    assert [g["id"] for g in state.list_live_games()] == ["g2"]
+
+
+def test_live_games_expire(state):
+    """Test live games that stop being refreshed disappear."""
+    state.put_live_game("quiet", {"id": "quiet"}, ttl_seconds=0.2)
+    state.put_live_game("busy", {"id": "busy"}, ttl_seconds=5)
+    time.sleep(0.3)
+
+    assert state.get_live_game("quiet") is None
+    assert [g["id"] for g in state.list_live_games()] == ["busy"]
+
+
+def test_clear(state):
+    """Test clear removes revocations and live games."""
+    state.revoke_token("token", 60)
+    state.put_live_game("g1", {"id": "g1"}, 60)
+    state.clear()
+
+    assert not state.is_token_revoked("token")
+    assert state.list_live_games() == []
+
+
+def test_live_games_paged_in_order(state):
+    """Test pages follow each order and mode, and follow updates and removals."""
+    for i, (score, viewers) in enumerate([(5, 1), (9, 0), (5, 3), (0, 2)]):
+        mode = GameMode.WALLS if i % 2 else GameMode.PASS_THROUGH
+        state.put_live_game(f"g{i}", {"id": f"g{i}", "score": score, "viewers": viewers, "mode": mode}, 5)
+    state.put_live_game("quiet", {"id": "quiet", "score": 99, "viewers": 99, "mode": GameMode.WALLS}, 0.2)
+    time.sleep(0.3)
+
+    def ids(mode=None, sort="score", after=None, limit=10):
+        return [g["id"] for g in state.page_live_games(mode, sort, after, limit)]
+
+    assert ids() == ["g1", "g0", "g2", "g3"]
+    assert ids(limit=2) == ["g1", "g0"]
+    assert ids(after=(-5, "g0")) == ["g2", "g3"]
+    assert ids(sort="viewers") == ["g2", "g3", "g0", "g1"]
+    assert ids(mode="walls") == ["g1", "g3"]
+    assert ids(mode="pass-through", sort="viewers", after=(-3, "g2")) == ["g0"]
+
+    state.put_live_game("g3", {"id": "g3", "score": 7, "viewers": 2, "mode": GameMode.WALLS}, 5)
+    state.remove_live_game("g1")
+    assert ids() == ["g3", "g0", "g2"]
+    assert ids(mode="walls") == ["g3"]
+
+
+def test_sqlite_pages_live_games_by_index(tmp_path):
+    """Test a page of live games is a range scan, not a sort of every game."""
+    state = SQLiteState(str(tmp_path / "state.db"))
+    conn = state._connection()
+
+    def plan(sql, params):
+        return " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+    query = "SELECT value FROM live_games WHERE mode = ? AND (score_order, game_id) > (?, ?) ORDER BY score_order, game_id LIMIT ?"
+    assert "USING INDEX ix_live_games_mode_score (mode=? AND (score_order,game_id)>(?,?))" in plan(query, ("walls", -5, "g", 10))
+    query = "SELECT value FROM live_games ORDER BY viewers_order, game_id LIMIT ?"
+    assert "TEMP B-TREE" not in plan(query, (10,))
+
+
+def test_redis_backends_share_state(redis_server):
+    """Test two Redis clients (two workers) see each other's writes."""
+    first, second = create_state(redis_server.url), create_state(redis_server.url)
+    assert isinstance(first, RedisState)
+    first.clear()
+
+    first.revoke_token("token", 60)
+    first.put_live_game("g1", {"id": "g1"}, 60)
+
+    assert second.is_token_revoked("token")
+    assert second.get_live_game("g1") == {"id": "g1"}
+
+
+def test_sqlite_shared_across_processes(tmp_path):
+    """Test a revocation written by another process is visible here."""
+    path = tmp_path / "state.db"
+    state = SQLiteState(str(path))
+    script = (
+        "from app.services.shared_state import SQLiteState;"
+        f"SQLiteState({str(path)!r}).revoke_token('token', 60)"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+    assert state.is_token_revoked("token")
+
+
+def test_sqlite_url_paths_read_as_sqlalchemy_does(tmp_path, monkeypatch):
+    """Test a relative SQLite URL names a file in the working directory."""
+    monkeypatch.chdir(tmp_path)
+    
+    assert create_state("sqlite:///./state.db").path == "./state.db"
+    assert (tmp_path / "state.db").exists()
+    assert create_state(f"sqlite:///{tmp_path / 'other.db'}").path == str(tmp_path / "other.db")
+
+
+def test_unsupported_url():
+    """Test an unknown backend scheme is rejected."""
+    with pytest.raises(ValueError):
+        create_state("memcached://localhost")
+
+
+def test_logout_visible_to_other_workers(client, auth_headers, sqlite_state):
+    """Test a token revoked on one worker is rejected by another."""
+    assert client.post("/api/auth/logout", headers=auth_headers).status_code == 200
+
+    other_worker = SQLiteState(sqlite_state.path)
+    assert other_worker.is_token_revoked(auth_headers["Authorization"].split()[1])
+    assert client.get("/api/auth/me", headers=auth_headers).status_code == 401
+
+
+def test_live_games_listed_from_shared_state(client, db_session, test_user, sqlite_state):
+    """Test live games started on one worker are listed by another."""
+    user = db_service.get_user_by_email(db_session, test_user["email"])
+    now = [0.0]
+    registry = LiveGameRegistry(ttl_seconds=15, max_sessions=10, clock=lambda: now[0], sync_seconds=1.0)
+    session = registry.start(user.id, GameMode.WALLS)
+
+    # A new, empty registry stands in for the worker answering the request
+    response = client.get("/api/games/live")
+    assert response.status_code == 200
+    assert [g["id"] for g in response.json()] == [session.id]
+
+    # Score updates are written through at most once per sync interval
+    registry.update(session.id, score=50)
+    assert db_service.get_live_game(session.id)["score"] == 0
+    now[0] = 1.5
+    registry.update(session.id, score=60)
+    assert db_service.get_live_game(session.id)["score"] == 60
+    assert db_service.get_live_games(GameMode.PASS_THROUGH) == []
+
+    registry.remove(session.id)
+    assert client.get(f"/api/games/live/{session.id}").status_code == 404
+
+
+def test_live_games_paginated_from_shared_state(sqlite_state):
+    """Test pages across workers use the same ordering and cursors."""
+    registry = LiveGameRegistry(ttl_seconds=15, max_sessions=10, sync_seconds=0)
+    for i in range(5):
+        registry.start(i, GameMode.WALLS, game_id=f"g{i}")
+        registry.update(f"g{i}", score=i)
+
+    first, cursor = db_service.get_live_games_page(limit=3)
+    rest, end = db_service.get_live_games_page(limit=3, cursor=cursor)
+
+    assert [g["id"] for g in first + rest] == ["g4", "g3", "g2", "g1", "g0"]
+    assert end is None
+
+
+@pytest.mark.asyncio
+async def test_registry_writes_off_the_event_loop(sqlite_state, monkeypatch):
+    """Test writes made on the event loop are batched into the threadpool."""
+    loop_thread = threading.get_ident()
+    writers = []
+    put_live_game = sqlite_state.put_live_game
+    
+    def record_put(game_id, data, ttl_seconds):
+        writers.append(threading.get_ident())
+        put_live_game(game_id, data, ttl_seconds)
+    
+    monkeypatch.setattr(sqlite_state, "put_live_game", record_put)
+    registry = LiveGameRegistry(ttl_seconds=15, max_sessions=10, sync_seconds=0)
+    for i in range(3):
+        registry.start(i, GameMode.WALLS, game_id=f"g{i}")
+    registry.remove("g0")
+    
+    # Nothing is written until the loop gets a chance to flush
+    assert sqlite_state.list_live_games() == []
+    while registry._flushing:
+        await asyncio.sleep(0.01)
+    
+    assert sorted(game["id"] for game in sqlite_state.list_live_games()) == ["g1", "g2"]
+    assert len(writers) == 2 and loop_thread not in writers
+
+
+def test_live_game_routes_read_shared_state_in_threadpool(client, db_session, test_user, sqlite_state, monkeypatch):
+    """Test the async live game routes do not read a blocking backend on the loop."""
+    user = db_service.get_user_by_email(db_session, test_user["email"])
+    LiveGameRegistry(ttl_seconds=15, max_sessions=10).start(user.id, GameMode.WALLS, game_id="g1")
+    readers = []
+    for name in ("page_live_games", "get_live_game"):
+        method = getattr(sqlite_state, name)
+        monkeypatch.setattr(
+            sqlite_state, name,
+            lambda *args, _method=method: readers.append(threading.current_thread().name) or _method(*args),
+        )
+    
+    assert [game["id"] for game in client.get("/api/games/live").json()] == ["g1"]
+    assert client.get("/api/games/live/g1").status_code == 200
+    
+    assert len(readers) == 2
+    assert all(name.startswith("AnyIO worker thread") for name in readers)
@@ -0,0 +1,136 @@
+"""Tests for the server-side snake engine.
+
+The rule tests mirror `frontend/src/__tests__/snakeLogic.test.ts` so both
+implementations are held to the same behaviour.
+"""
+import random
+import numpy as np
+from app.models.game import GameMode, GRID_SIZE
+from app.services.snake_engine import (
+    BatchSnakeEngine,
+    Direction,
+    Mulberry32,
+    SnakeGame,
+    INITIAL_SPEED,
+    POINTS_PER_FOOD,
+)
+
+
+def test_mulberry32_matches_javascript():
+    """Test against values produced by the reference JavaScript mulberry32."""
+    rng = Mulberry32(42)
+    assert [rng.randrange(20) for _ in range(5)] == [12, 8, 17, 13, 3]
+
+
+def test_initial_state():
+    """Test the initial snake, direction and score."""
+    game = SnakeGame(GameMode.WALLS)
+    center = GRID_SIZE // 2
+
+    assert game.snake == [(center, center), (center - 1, center), (center - 2, center)]
+    assert game.direction == Direction.RIGHT
+    assert game.score == 0
+    assert game.speed == INITIAL_SPEED
+    assert game.food not in game.snake
+
+
+def test_move_in_current_direction():
+    """Test that the snake moves one cell per tick."""
+    game = SnakeGame(GameMode.WALLS)
+    game.food = (0, 0)
+    head = game.snake[0]
+    game.step()
+
+    assert game.snake[0] == (head[0] + 1, head[1])
+    assert len(game.snake) == 3
+
+
+def test_cannot_reverse_direction():
+    """Test that turning back onto the neck is ignored."""
+    game = SnakeGame(GameMode.WALLS)
+    game.change_direction(Direction.LEFT)
+    assert game.next_direction == Direction.RIGHT
+
+    game.change_direction(Direction.UP)
+    assert game.next_direction == Direction.UP
+
+
+def test_grow_when_eating_food():
+    """Test that eating food grows the snake and scores points."""
+    game = SnakeGame(GameMode.WALLS)
+    game.food = (game.snake[0][0] + 1, game.snake[0][1])
+    game.step()
+
+    assert len(game.snake) == 4
+    assert game.score == POINTS_PER_FOOD
+    assert game.speed == INITIAL_SPEED - 5
+    assert game.food not in game.snake
+
+
+def test_wall_collision_in_walls_mode():
+    """Test that leaving the board ends a walls game."""
+    game = SnakeGame(GameMode.WALLS)
+    game.snake = [(GRID_SIZE - 1, 10)]
+
+    assert game.step() is False
+    assert game.alive is False
+
+
+def test_wrap_around_in_pass_through_mode():
+    """Test that the snake wraps to the other side in pass-through mode."""
+    game = SnakeGame(GameMode.PASS_THROUGH)
+    game.snake = [(GRID_SIZE - 1, 10), (GRID_SIZE - 2, 10)]
+    game.food = (0, 0)
+
+    assert game.step() is True
+    assert game.snake[0] == (0, 10)
+
+
+def test_self_collision():
+    """Test that running into the body ends the game."""
+    game = SnakeGame(GameMode.WALLS)
+    game.snake = [(5, 5), (6, 5), (6, 4), (5, 4), (4, 4), (4, 5)]
+    game.direction = Direction.UP
+    game.next_direction = Direction.UP
+
+    assert game.step() is False
+
+
+def test_moving_into_tail_is_allowed():
+    """Test that the head may take the cell the tail is leaving."""
+    game = SnakeGame(GameMode.WALLS)
+    game.snake = [(5, 5), (6, 5), (6, 4), (5, 4)]
+    game.food = (0, 0)
+    game.direction = Direction.UP
+    game.next_direction = Direction.UP
+
+    assert game.step() is True
+    assert game.snake[0] == (5, 4)
+
+
+def test_batch_engine_matches_reference():
+    """Test that batch stepping matches the single-game reference exactly."""
+    count = 200
+    modes = [GameMode.WALLS if i % 2 else GameMode.PASS_THROUGH for i in range(count)]
+    seeds = list(range(count))
+    engine = BatchSnakeEngine(modes, seeds)
+    games = [SnakeGame(mode, seed) for mode, seed in zip(modes, seeds)]
+    rng = random.Random(0)
+
+    for _ in range(300):
+        turning = [i for i in range(count) if rng.random() < 0.3]
+        directions = [rng.randrange(4) for _ in turning]
+        for i, direction in zip(turning, directions):
+            games[i].change_direction(Direction(direction))
+        engine.change_direction(np.array(turning), np.array(directions))
+
+        engine.step()
+        for game in games:
+            game.step()
+
+        for i, game in enumerate(games):
+            assert engine.alive[i] == game.alive
+            if game.alive:
+                assert engine.snake(i) == game.snake
+                assert engine.food_position(i) == game.food
+                assert engine.score[i] == game.score
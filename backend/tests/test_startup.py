@@ -0,0 +1,93 @@
+"""Tests for startup behaviour and cold-start timings."""
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_startup_timings_reported(monkeypatch):
+    """Test that the lifespan hook reports a per-phase breakdown."""
+    monkeypatch.setattr(settings, "SCHEMA_INIT", "skip")
+    with TestClient(app) as client:
+        response = client.get("/health/startup")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert "import_routers" in data["phases"]
+    assert data["ready_ms"] is not None
+
+
+def test_import_does_not_load_heavy_dependencies():
+    """Test that importing the app does not import jose, bcrypt or numpy."""
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('jose', 'bcrypt', 'numpy') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        env={"SCHEMA_INIT": "skip", "PATH": ""},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == ""
+
+
+
+def test_ready_only_after_warmup(monkeypatch, db_session):
+    """Test /ready answers 503 until warmup has run, then reports it."""
+    import time
+    from app.services import warmup_service
+    
+    monkeypatch.setattr(settings, "SCHEMA_INIT", "skip")
+    warmup_service.reset()
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+        deadline = time.monotonic() + 10
+        while (response := client.get("/ready")).status_code == 503:
+            assert response.json()["status"] == "warming_up"
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    
+    data = response.json()
+    assert data["status"] == "ready"
+    assert set(data["steps"]) == {"connections", "queries", "caches", "imports"}
+    assert data["errors"] == {}
+    assert data["warmup_ms"] >= 0
+
+
+def test_warmup_primes_user_cache(client, auth_headers):
+    """Test warmup loads the top players into the user cache."""
+    from app.services import user_cache, warmup_service
+    
+    client.post("/api/games/score", json={"score": 80, "mode": "walls", "duration": 10}, headers=auth_headers)
+    user_cache.cache.clear()
+    
+    report = warmup_service.run()
+    
+    assert report["errors"] == {}
+    assert [u.username for u in user_cache.cache.get_many(range(1, 10)).values()] == ["TestUser"]
+
+
+def test_failed_warmup_step_still_becomes_ready(monkeypatch, db_session):
+    """Test a failing step is reported without blocking readiness."""
+    from app.services import warmup_service
+    
+    def broken(db):
+        raise RuntimeError("database unavailable")
+    
+    monkeypatch.setattr(warmup_service, "STEPS", [("broken", broken), *warmup_service.STEPS[1:2]])
+    warmup_service.reset()
+    
+    report = warmup_service.run()
+    
+    assert warmup_service.is_ready()
+    assert report["errors"] == {"broken": "database unavailable"}
+    assert set(report["steps"]) == {"broken", "queries"}
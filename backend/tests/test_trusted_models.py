@@ -0,0 +1,78 @@
+"""Tests that trusted construction matches validated models."""
+import warnings
+import pytest
+from datetime import datetime, UTC, timedelta
+from app.database import models
+from app.models import trusted
+from app.models.game import GameMode, LeaderboardEntry, LiveGame
+from app.models.user import User
+
+
+def _dump(model):
+    # Serialization warnings mean a field holds the wrong type
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        return model.model_dump(mode="json", by_alias=True)
+
+
+@pytest.fixture
+def rows(db_session):
+    """Users and scores as stored by the application."""
+    users = []
+    for i, name in enumerate(["Plain", "Ünïcode", "With_Underscore"]):
+        user = models.User(
+            username=name, email=f"{name.lower()}@example.com", hashed_password="x",
+            avatar=f"/api/avatars/{i}-b6e3f4.svg", high_score=i * 100, games_played=i,
+        )
+        db_session.add(user)
+        db_session.flush()
+        db_session.add(models.Score(user_id=user.id, score=i * 10, mode=GameMode.WALLS, duration=5,
+                                    date=datetime(2026, 1, 1) + timedelta(hours=i)))
+        users.append(user)
+    db_session.commit()
+    db_session.expire_all()
+    return users
+
+
+def test_user_from_row_matches_validation(rows):
+    """Test users built from rows equal validated ones, hidden fields included."""
+    for row in rows:
+        built = trusted.user_from_row(row)
+        validated = User.model_validate(row)
+        assert _dump(built) == _dump(validated)
+        assert (built.version, built.updated_at) == (validated.version, validated.updated_at)
+
+
+def test_leaderboard_entry_matches_validation(db_session, rows):
+    """Test leaderboard entries built from rows equal validated ones."""
+    from app.services import db_service
+    
+    for rank, score in enumerate(db_service.get_leaderboard(db_session), start=1):
+        validated = LeaderboardEntry(rank=rank, user=score.user, score=score.score, mode=score.mode, date=score.date)
+        assert _dump(trusted.leaderboard_entry(rank, score)) == _dump(validated)
+
+
+@pytest.mark.parametrize("shared", [False, True], ids=["registry", "shared-state"])
+def test_live_game_matches_validation(rows, shared):
+    """Test live games built from registry and shared state dicts equal validated ones."""
+    game = {
+        "id": "g1", "player_id": rows[0].id, "score": 30, "mode": GameMode.WALLS,
+        "viewers": 2, "unique_viewers": 5, "started_at": datetime(2026, 1, 1, 12, tzinfo=UTC),
+    }
+    if shared:
+        # As read back from JSON
+        game = {**game, "mode": "walls", "started_at": game["started_at"].isoformat()}
+    validated = LiveGame(player=rows[0], **{k: v for k, v in game.items() if k != "player_id"})
+    
+    assert _dump(trusted.live_game(game, rows[0])) == _dump(validated)
+
+
+def test_score_history_entry_matches_validation(db_session, rows):
+    """Test score history entries built from rows equal validated ones."""
+    from app.models.game import ScoreHistoryEntry
+    from app.services import db_service
+    
+    for user in rows:
+        history, _ = db_service.get_score_history(db_session, user.id)
+        for row in history:
+            assert _dump(trusted.score_history_entry(row)) == _dump(ScoreHistoryEntry.model_validate(row))
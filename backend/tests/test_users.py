@@ -85,4 +85,451 @@ def test_get_avatars(client):
     assert isinstance(data, list)
     assert len(data) > 0
     assert all(isinstance(url, str) for url in data)
-    assert all(url.startswith("https://") for url in data)
+    # Served by this API rather than a third party
+    assert all(url.startswith("/api/avatars/") and url.endswith(".svg") for url in data)
+
+
+def test_get_avatar_image(client):
+    """Test every listed avatar is served as an immutable SVG."""
+    for url in client.get("/api/avatars").json():
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/svg+xml"
+        assert "immutable" in response.headers["cache-control"]
+        assert response.content.startswith(b"<svg")
+    
+    response = client.get(url, headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+    assert client.get("/api/avatars/bad%22id-zzzzzz.svg").status_code == 404
+
+
+def test_avatar_rendering_is_deterministic_and_cached(tmp_path):
+    """Test avatars render the same bytes and are stored on disk."""
+    from app.services.avatar_service import AvatarCache, render_avatar
+    
+    assert render_avatar("Totoro", "c0aede") == render_avatar("Totoro", "c0aede")
+    assert render_avatar("Totoro", "c0aede") != render_avatar("Ponyo", "c0aede")
+    assert b'fill="#c0aede"' in render_avatar("Totoro", "c0aede")
+    
+    cache = AvatarCache(max_entries=1, directory=str(tmp_path))
+    data = cache.load("Totoro-c0aede")
+    assert (tmp_path / "Totoro-c0aede.svg").read_bytes() == data
+    cache.load("Ponyo-ffdfbf")
+    assert cache.get("Totoro-c0aede") is None  # evicted from memory
+    
+    (tmp_path / "Totoro-c0aede.svg").write_bytes(b"<svg>from disk</svg>")
+    assert cache.load("Totoro-c0aede") == b"<svg>from disk</svg>"
+    assert cache.load("../etc-c0aede") is None
+
+
+def test_avatar_disk_store_is_capped(tmp_path):
+    """Test the least recently used avatar files are removed past the cap."""
+    import os
+    from app.services.avatar_service import AvatarCache
+    
+    cache = AvatarCache(max_entries=1, directory=str(tmp_path), max_files=10)
+    for i in range(10):
+        cache.load(f"Seed{i}-c0aede")
+        os.utime(tmp_path / f"Seed{i}-c0aede.svg", (i, i))
+    # Reading from disk marks a file as used
+    cache.load("Seed0-c0aede")
+    cache.load("Seed11-c0aede")
+    
+    names = sorted(path.name for path in tmp_path.iterdir())
+    assert len(names) == 9
+    assert "Seed0-c0aede.svg" in names and "Seed11-c0aede.svg" in names
+    assert "Seed1-c0aede.svg" not in names and "Seed2-c0aede.svg" not in names
+
+
+def test_user_loader_batches_lookups(db_session, assert_max_queries):
+    """Test the user loader resolves queued ids with one query."""
+    from app.database import models
+    from app.services.loaders import UserLoader
+    
+    ids = []
+    for i in range(3):
+        user = models.User(username=f"Batch{i}", email=f"batch{i}@example.com", hashed_password="x", avatar="")
+        db_session.add(user)
+        db_session.flush()
+        ids.append(user.id)
+    db_session.commit()
+    
+    loader = UserLoader(db_session)
+    with assert_max_queries(1):
+        users = loader.get_many(ids + [9999])
+        assert loader.get(ids[0]) is users[0]
+    
+    assert [u.username for u in users[:3]] == ["Batch0", "Batch1", "Batch2"]
+    assert users[3] is None
+
+
+@pytest.fixture
+def bulk_users(db_session):
+    """Create three users and return their ids."""
+    from app.database import models
+    
+    ids = []
+    for i in range(3):
+        user = models.User(username=f"Bulk{i}", email=f"bulk{i}@example.com", hashed_password="x", avatar="")
+        db_session.add(user)
+        db_session.flush()
+        ids.append(user.id)
+    db_session.commit()
+    return ids
+
+
+def test_get_users_bulk(client, bulk_users, assert_max_queries):
+    """Test bulk lookup keeps request order and reports missing ids with one query."""
+    ids = [bulk_users[2], 9999, bulk_users[0], bulk_users[2]]
+    
+    with assert_max_queries(1):
+        response = client.get("/api/users?ids=" + ",".join(map(str, ids)))
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert [u["username"] for u in data["users"]] == ["Bulk2", "Bulk0"]
+    assert data["missing"] == [9999]
+    assert "hashed_password" not in data["users"][0]
+
+
+def test_get_users_bulk_is_bounded(client, monkeypatch):
+    """Test oversized and malformed id lists are rejected."""
+    from app.config import settings
+    
+    monkeypatch.setattr(settings, "USERS_BULK_MAX_IDS", 3)
+    assert client.get("/api/users?ids=1,2,3,4").status_code == 400
+    assert client.get("/api/users?ids=1,two").status_code == 400
+    assert client.get("/api/users?ids=").status_code == 400
+
+
+def test_get_users_served_from_cache(client, bulk_users, assert_max_queries):
+    """Test cached users are not queried again."""
+    ids = ",".join(map(str, bulk_users))
+    client.get(f"/api/users?ids={ids}")
+    
+    with assert_max_queries(0):
+        assert len(client.get(f"/api/users?ids={ids}").json()["users"]) == 3
+        assert client.get(f"/api/users/{bulk_users[1]}").json()["username"] == "Bulk1"
+
+
+def test_user_cache_invalidated_on_profile_update(client, auth_headers):
+    """Test a profile update is visible immediately despite the cache."""
+    me = client.get("/api/auth/me", headers=auth_headers).json()
+    assert client.get(f"/api/users/{me['id']}").json()["username"] == "TestUser"
+    
+    client.patch("/api/users/profile", json={"username": "Renamed"}, headers=auth_headers)
+    
+    assert client.get(f"/api/users/{me['id']}").json()["username"] == "Renamed"
+    assert client.get(f"/api/users?ids={me['id']}").json()["users"][0]["username"] == "Renamed"
+
+
+def test_user_cache_expires_and_evicts():
+    """Test TTL expiry and LRU eviction."""
+    from app.models.user import User
+    from app.services.user_cache import UserCache
+    
+    now = [0.0]
+    cache = UserCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    for i in (1, 2):
+        cache.put(User(id=i, username=f"User{i}", email=f"u{i}@example.com", avatar=""))
+    cache.get(1)
+    cache.put(User(id=3, username="User3", email="u3@example.com", avatar=""))
+    
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    now[0] = 11.0
+    assert cache.get(1) is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_user_cache_is_thread_safe():
+    """Test concurrent puts, gets and invalidations keep the cache consistent."""
+    import sys
+    import threading
+    from app.models.user import User
+    from app.services.user_cache import UserCache
+    
+    interval = sys.getswitchinterval()
+    # Switch threads as often as possible to expose races
+    sys.setswitchinterval(1e-6)
+    try:
+        cache = UserCache(max_entries=4, ttl_seconds=60)
+        users = [User(id=i, username=f"User{i}", email=f"u{i}@example.com", avatar="") for i in range(8)]
+        errors = []
+        
+        def churn():
+            try:
+                for _ in range(2000):
+                    for user in users:
+                        cache.put(user)
+                        cache.get(user.id - 1)
+                        cache.invalidate(user.id - 2)
+            except Exception as exc:
+                errors.append(exc)
+        
+        threads = [threading.Thread(target=churn) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    
+    assert errors == []
+    assert len(cache) <= 4
+    assert cache.hits + cache.misses == 4 * 2000 * 8
+
+
+@pytest.fixture
+def score_history(db_session, test_user):
+    """Give the test user 25 scores, alternating modes, one minute apart."""
+    from datetime import datetime, timedelta
+    from app.database import models
+    from app.models.game import GameMode
+    from app.services import db_service
+    
+    user = db_service.get_user_by_email(db_session, test_user["email"])
+    start = datetime(2026, 1, 1)
+    for i in range(25):
+        db_session.add(models.Score(
+            user_id=user.id,
+            score=i,
+            mode=GameMode.WALLS if i % 2 else GameMode.PASS_THROUGH,
+            duration=i * 2,
+            date=start + timedelta(minutes=i),
+        ))
+    # Same timestamp as the newest game: the id breaks the tie
+    db_session.add(models.Score(user_id=user.id, score=100, mode=GameMode.WALLS, duration=1, date=start + timedelta(minutes=24)))
+    db_session.commit()
+    return user.id
+
+
+def test_score_history_paginates_newest_first(client, score_history, assert_max_queries):
+    """Test following X-Next-Cursor walks every score once, newest first."""
+    seen = []
+    cursor = None
+    while True:
+        url = f"/api/users/{score_history}/scores?limit=10" + (f"&cursor={cursor}" if cursor else "")
+        with assert_max_queries(2):
+            response = client.get(url)
+        assert response.status_code == 200
+        seen.extend(entry["score"] for entry in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    
+    assert seen == [100] + list(range(24, -1, -1))
+
+
+def test_score_history_filter_by_mode(client, score_history):
+    """Test the mode filter and the compact row shape."""
+    data = client.get(f"/api/users/{score_history}/scores?mode=walls&limit=3").json()
+    
+    assert [entry["score"] for entry in data] == [100, 23, 21]
+    assert set(data[0]) == {"id", "score", "mode", "duration", "date", "verification"}
+
+
+def test_score_history_errors(client, score_history):
+    """Test unknown users and malformed cursors."""
+    assert client.get("/api/users/9999/scores").status_code == 404
+    assert client.get(f"/api/users/{score_history}/scores?cursor=bogus").status_code == 400
+
+
+def test_score_history_with_no_verification_status(client, db_session, score_history):
+    """Test scores from before verification existed are listed as unverified."""
+    from sqlalchemy import text
+    
+    db_session.execute(text("UPDATE scores SET verification = NULL"))
+    db_session.commit()
+    
+    response = client.get(f"/api/users/{score_history}/scores?limit=3")
+    
+    assert response.status_code == 200
+    assert [entry["verification"] for entry in response.json()] == ["unverified"] * 3
+
+
+def test_score_history_uses_covering_index(db_session, score_history):
+    """Test history pages are read from the covering index alone."""
+    from sqlalchemy import event
+    from app.models.game import GameMode
+    from app.services import db_service
+    
+    _, cursor = db_service.get_score_history(db_session, score_history, mode=GameMode.WALLS, limit=2)
+    captured = []
+    
+    def capture(conn, dbapi_cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+    
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        db_service.get_score_history(db_session, score_history, mode=GameMode.WALLS, limit=2, cursor=cursor)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    
+    statement, parameters = captured[0]
+    dbapi_connection = db_session.connection().connection.dbapi_connection
+    plan = " ".join(row[-1] for row in dbapi_connection.execute("EXPLAIN QUERY PLAN " + statement, parameters))
+    assert "COVERING INDEX ix_scores_user_mode_date" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.fixture
+def named_users(db_session):
+    """Create users with overlapping name prefixes."""
+    from app.database import models
+    
+    for name in ["SnakeMaster", "snakebite", "Snail", "Snäke", "Cobra"]:
+        db_session.add(models.User(username=name, email=f"{name.lower()}@example.com", hashed_password="x", avatar=""))
+    db_session.commit()
+
+
+def test_search_users_by_prefix(client, named_users):
+    """Test prefix search ignores case and returns names in order."""
+    response = client.get("/api/users/search?q=SNAKE")
+    
+    assert response.status_code == 200
+    assert [u["username"] for u in response.json()] == ["snakebite", "SnakeMaster"]
+    assert [u["username"] for u in client.get("/api/users/search?q=sn&limit=2").json()] == ["Snail", "snakebite"]
+    assert client.get("/api/users/search?q=python").json() == []
+    assert client.get("/api/users/search?q=").status_code == 422
+
+
+def test_search_users_without_a_next_character(db_session, named_users):
+    """Test prefixes ending in the last code point or holding surrogates are safe."""
+    from app.database import models
+    from app.services import db_service
+    
+    db_session.add(models.User(username="Snake\U0010ffff", email="max@example.com", hashed_password="x", avatar=""))
+    db_session.commit()
+    
+    assert [u.username for u in db_service.search_users(db_session, "snake\U0010ffff")] == ["Snake\U0010ffff"]
+    assert [u.username for u in db_service.search_users(db_session, "a\ud7ff")] == []
+    assert db_service.search_users(db_session, "sn\ud800") == []
+
+
+def test_search_users_uses_index_range(db_session, named_users):
+    """Test the search is an index range scan, not a table scan."""
+    from sqlalchemy import event
+    from app.services import db_service
+    
+    captured = []
+    
+    def capture(conn, dbapi_cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+    
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        db_service.search_users(db_session, "snake")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    
+    statement, parameters = captured[0]
+    dbapi_connection = db_session.connection().connection.dbapi_connection
+    plan = " ".join(row[-1] for row in dbapi_connection.execute("EXPLAIN QUERY PLAN " + statement, parameters))
+    assert "USING INDEX ix_users_username_key (username_key>? AND username_key<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_update_profile_change_case_of_own_name(client, auth_headers):
+    """Test a user can change only the case of their own username."""
+    response = client.patch("/api/users/profile", json={"username": "TESTUSER"}, headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.json()["user"]["username"] == "TESTUSER"
+
+
+def test_init_db_adds_normalized_columns(tmp_path, monkeypatch):
+    """Test an existing users table gains and backfills the normalized columns."""
+    import sqlite3
+    from sqlalchemy import create_engine
+    from app.database import init_db
+    
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR UNIQUE, email VARCHAR UNIQUE, "
+                     "hashed_password VARCHAR, avatar VARCHAR, high_score INTEGER, games_played INTEGER, created_at DATETIME)")
+        conn.execute("INSERT INTO users (username, email) VALUES ('SnakeMaster', 'Snake@Example.com')")
+    monkeypatch.setattr(init_db, "engine", create_engine(f"sqlite:///{path}"))
+    
+    init_db.init_db()
+    
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT username_key, email_key FROM users").fetchall() == [("snakemaster", "snake@example.com")]
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"ix_users_username_key", "ix_users_email_key", "ix_scores_user_mode_date"} <= indexes
+
+
+def test_init_db_fills_new_columns_of_existing_rows(baseline_engine):
+    """Test rows from the original schema get defaults for every added column."""
+    from sqlalchemy import text
+    from app.database import init_db
+    
+    init_db.init_db()
+    
+    with baseline_engine.connect() as conn:
+        assert conn.execute(text("SELECT version, updated_at = created_at FROM users")).all() == [(0, 1)]
+        assert conn.execute(text("SELECT verification FROM scores")).all() == [("UNVERIFIED",)]
+
+
+def test_get_user_conditional_request(client, auth_headers, assert_max_queries):
+    """Test profiles carry validators and unchanged ones are answered with 304."""
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    response = client.get(f"/api/users/{user_id}")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "public, max-age=5, must-revalidate"
+    assert "last-modified" in response.headers
+    
+    # The profile is cached, so the 304 needs no query at all
+    with assert_max_queries(0):
+        response = client.get(f"/api/users/{user_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    
+    response = client.get(f"/api/users/{user_id}", headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert response.status_code == 304
+
+
+def test_get_user_etag_changes_with_profile_and_scores(client, auth_headers):
+    """Test profile updates and new scores bump the user's version."""
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    first = client.get(f"/api/users/{user_id}").headers["etag"]
+    
+    client.patch("/api/users/profile", json={"username": "Renamed"}, headers=auth_headers)
+    response = client.get(f"/api/users/{user_id}", headers={"If-None-Match": first})
+    assert response.status_code == 200
+    assert response.json()["username"] == "Renamed"
+    second = response.headers["etag"]
+    assert second != first
+    
+    client.post("/api/games/score", json={"score": 50, "mode": "walls", "duration": 10}, headers=auth_headers)
+    response = client.get(f"/api/users/{user_id}", headers={"If-None-Match": second})
+    assert response.status_code == 200
+    assert response.json()["highScore"] == 50
+
+
+def test_get_avatars_conditional_request(client):
+    """Test the avatar list is cacheable and revalidates with its ETag."""
+    response = client.get("/api/avatars")
+    assert response.headers["cache-control"] == "public, max-age=86400"
+    
+    response = client.get("/api/avatars", headers={"If-None-Match": f'"x", {response.headers["etag"]}'})
+    assert response.status_code == 304
+    assert client.get("/api/avatars", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_username_keys_sort_by_code_point():
+    """Test the key columns use code-point order on PostgreSQL, as prefix search needs."""
+    from sqlalchemy.dialects import postgresql, sqlite
+    from sqlalchemy.schema import CreateTable
+    from app.database import models
+    
+    table = models.User.__table__
+    ddl = str(CreateTable(table).compile(dialect=postgresql.dialect()))
+    
+    assert 'username_key VARCHAR COLLATE "C"' in ddl
+    assert 'email_key VARCHAR COLLATE "C"' in ddl
+    # SQLite has no "C" collation; its default already compares code points
+    assert "COLLATE" not in str(CreateTable(table).compile(dialect=sqlite.dialect()))
@@ -0,0 +1,128 @@
+"""Tests for sharded viewer counts and unique viewer estimates."""
+import pytest
+from app.models.game import GameMode
+from app.services import shared_state
+from app.services.live_registry import LiveGameRegistry
+from app.services.shared_state import SQLiteState
+from app.services.viewer_stats import HyperLogLog, ShardedCounter, ViewerStats, WORKER_ID
+
+
+@pytest.mark.parametrize("distinct", [10, 1000, 50000])
+def test_hyperloglog_estimate(distinct):
+    """Test the estimate stays within a few standard errors of the truth."""
+    sketch = HyperLogLog()
+    for i in range(distinct):
+        sketch.add(f"viewer-{i}")
+        sketch.add(f"viewer-{i}")  # repeats are not counted again
+
+    assert abs(sketch.count() - distinct) <= max(1, 0.05 * distinct)
+
+
+def test_hyperloglog_merge_is_union():
+    """Test merging sketches estimates the union of their items."""
+    first, second = HyperLogLog(), HyperLogLog()
+    for i in range(3000):
+        first.add(str(i))
+    for i in range(2000, 5000):
+        second.add(str(i))
+
+    first.merge(HyperLogLog.from_str(second.to_str()))
+
+    assert abs(first.count() - 5000) <= 250
+    with pytest.raises(ValueError):
+        first.merge(HyperLogLog(precision=10))
+
+
+def test_sharded_counter():
+    """Test shards are updated independently and summed on read."""
+    counter = ShardedCounter()
+    counter.add("a", 3)
+    counter.add("b", 2)
+    counter.add("a", -1)
+    counter.set("c", 4)
+    assert counter.value == 8
+
+    counter.retain(["a", "b"])
+    assert counter.value == 4
+
+
+def test_viewer_stats_join_and_leave():
+    """Test current viewers go down on leave while unique viewers do not."""
+    stats = ViewerStats()
+    stats.join("user:1")
+    stats.join("user:2")
+    stats.join("user:1")
+    stats.leave()
+
+    assert stats.viewers == 2
+    assert stats.unique_viewers == 2
+
+
+def test_hyperloglog_count_tracks_registers():
+    """Test the running sum behind the estimate matches a full recount."""
+    sketch = HyperLogLog()
+    for i in range(20000):
+        sketch.add(str(i))
+    other = HyperLogLog()
+    for i in range(15000, 40000):
+        other.add(str(i))
+    sketch.merge(other)
+    sketch.add("one more")
+    
+    assert sketch.count() == HyperLogLog(sketch.precision, sketch.registers).count()
+
+
+def test_viewer_shards_merged_across_workers(db_session, tmp_path):
+    """Test a worker's published stats include other workers' shards."""
+    previous = shared_state.get_state()
+    state = SQLiteState(str(tmp_path / "state.db"))
+    shared_state.set_state(state)
+    try:
+        now = [0.0]
+        registry = LiveGameRegistry(ttl_seconds=15, max_sessions=10, clock=lambda: now[0], sync_seconds=1.0)
+        session = registry.start(1, GameMode.WALLS)
+        for i in range(3):
+            registry.viewer_joined(session.id, f"user:{i}")
+
+        # Another worker has two spectators, one of whom also watched here
+        other = ViewerStats()
+        other.join("user:2")
+        other.join("user:7")
+        state.put_shard(f"viewers:{session.id}", "other-worker", other.local_shard(), 15)
+
+        now[0] = 2.0
+        registry.update(session.id, score=10)
+
+        published = state.get_live_game(session.id)
+        assert published["viewers"] == 5
+        assert published["unique_viewers"] == 4
+        assert state.get_shards(f"viewers:{session.id}")[WORKER_ID]["viewers"] == 3
+    finally:
+        shared_state.set_state(previous)
+
+
+def test_shards_published_and_merged_only_when_changed(monkeypatch):
+    """Test idle shards are neither republished nor merged again."""
+    stats = ViewerStats()
+    assert stats.shard_to_publish(0.0, 5) is None  # nobody watched here
+    
+    stats.join("user:1")
+    assert stats.shard_to_publish(0.0, 5)["viewers"] == 1
+    assert stats.shard_to_publish(1.0, 5) is None
+    stats.leave()
+    assert stats.shard_to_publish(2.0, 5)["viewers"] == 0
+    # Republished before it would expire
+    assert stats.shard_to_publish(6.0, 5) is None
+    assert stats.shard_to_publish(7.5, 5) is not None
+    
+    merges = []
+    merge_registers = HyperLogLog.merge_registers
+    monkeypatch.setattr(HyperLogLog, "merge_registers", lambda self, data: merges.append(1) or merge_registers(self, data))
+    other = ViewerStats()
+    other.join("user:2")
+    shards = {"other-worker": other.local_shard()}
+    stats.merge_shards(shards)
+    stats.merge_shards(shards)
+    
+    assert len(merges) == 1
+    assert stats.unique_viewers == 2